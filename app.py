@@ -5,6 +5,10 @@ from flask_cors import CORS
 from config import Config
 from dotenv import load_dotenv
 from models import db
+from cache import init_caches, ensure_catalog_version, recipe_cache, response_cache
+from search_index import ensure_search_index
+from recipe_indexes import init_recipe_indexes, suggestion_index
+from utils import ensure_schema_columns
 from markupsafe import Markup
 import markdown
 import os
@@ -18,11 +22,18 @@ def create_app():
     db.init_app(app)
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
+    init_caches(app)
+    init_recipe_indexes(app)
     
     # Initialize database tables on startup (with error handling for production)
     with app.app_context():
         try:
             db.create_all()
+            ensure_schema_columns()
+            ensure_search_index()
+            ensure_catalog_version()
+            # Autocomplete is served from memory, so load it before the first request
+            suggestion_index.ensure_current()
         except Exception as e:
             # Don't crash if database isn't available yet
             # This can happen during first deploy
@@ -33,8 +44,8 @@ def create_app():
     cors_config = {
         'origins': app.config['CORS_ORIGINS'],
         'methods': ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-        'allow_headers': ['Content-Type', 'Authorization'],
-        'expose_headers': ['Content-Type', 'Authorization'],
+        'allow_headers': ['Content-Type', 'Authorization', 'If-None-Match', 'If-Modified-Since'],
+        'expose_headers': ['Content-Type', 'Authorization', 'ETag', 'Last-Modified'],
         'supports_credentials': True,
         'max_age': 3600
     }
@@ -54,6 +65,9 @@ def create_app():
     app.register_blueprint(group_bp, url_prefix='/api/groups')
     app.register_blueprint(comment_bp, url_prefix='/api/comments')
     
+    from commands import register_commands
+    register_commands(app)
+    
     # API root endpoint for discovery
     @app.route('/')
     def api_root():
@@ -77,7 +91,9 @@ def create_app():
     def health_check():
         return jsonify({
             'status': 'healthy',
-            'service': 'recipe-room-api'
+            'service': 'recipe-room-api',
+            'recipe_cache': recipe_cache.stats(),
+            'response_cache': response_cache.stats()
         }), 200
     
     # API Documentation endpoints
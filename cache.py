@@ -0,0 +1,730 @@
+"""
+Recipe-Room Backend - Caching
+
+Pluggable cache backends (in-process memory, a SQLite file shared by all
+workers on a host, or any server speaking the Redis protocol), the named
+caches built on top of them, route-level response caching for anonymous
+public endpoints, the catalog version counter, and the SQLAlchemy session
+hooks that invalidate cached recipe data after commits.
+"""
+
+import os
+import pickle
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+from urllib.parse import urlparse, unquote
+
+from flask import current_app, request, make_response
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from models import db, Recipe, Rating, Bookmark, Comment, User, catalog_versions
+
+
+class MemoryCacheBackend:
+    """
+    Thread-safe, size-bounded LRU store with per-entry expiry.
+    Private to one worker process.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, keys: Iterable[str]) -> None:
+        """Drop entries if present."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self, prefix: str = '') -> None:
+        """Drop every entry whose key starts with the prefix."""
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and eviction counters."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'evictions': self.evictions
+            }
+
+
+class SQLiteCacheBackend:
+    """
+    Cache stored in a SQLite file, shared by every worker process on a host.
+    Values are pickled; expiry uses wall-clock time so all processes agree.
+    Each thread keeps its own connection. Expired rows are pruned, and the
+    table is trimmed to max_size (soonest-expiring first), every
+    PRUNE_INTERVAL writes.
+    """
+
+    PRUNE_INTERVAL = 200
+
+    def __init__(self, path: str, max_size: int = 10000):
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn().execute(
+            'CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._conn().execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_INTERVAL == 0:
+            self._prune()
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._conn().execute(f'DELETE FROM cache_entries WHERE key IN ({placeholders})', keys)
+
+    def clear(self, prefix: str = '') -> None:
+        self._conn().execute(
+            'DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._conn().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        return {'size': size, 'max_size': self.max_size, 'path': self.path}
+
+    def _prune(self) -> None:
+        conn = self._conn()
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries ORDER BY expires_at '
+            'LIMIT max(0, (SELECT COUNT(*) FROM cache_entries) - ?))',
+            (self.max_size,)
+        )
+
+
+class RedisError(Exception):
+    """Error reply returned by a Redis-protocol server."""
+
+
+class RedisCacheBackend:
+    """
+    Cache stored on a server speaking the Redis protocol (RESP), shared by
+    every worker on every host. Talks to the server over a plain socket with
+    the handful of commands it needs (GET, SET PX, DEL, SCAN), so any
+    compatible server or a local stand-in can be used. Values are pickled
+    and expiry is handled by the server.
+
+    URL format: redis://[:password@]host[:port][/db]
+    """
+
+    SCAN_COUNT = 500
+
+    def __init__(self, url: str, socket_timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        if self.password:
+            self._send('AUTH', self.password)
+        if self.db:
+            self._send('SELECT', self.db)
+
+    def _disconnect(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _send(self, *args) -> Any:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._local.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._local.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by cache server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f'Unexpected reply from cache server: {line!r}')
+
+    def execute(self, *args) -> Any:
+        """Run one command, reconnecting once if the connection dropped."""
+        for attempt in (1, 2):
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self._disconnect()
+                if attempt == 2:
+                    raise
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.execute('GET', key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.execute('SET', key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                     'PX', max(int(ttl * 1000), 1))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            self.execute('DEL', *keys)
+
+    def clear(self, prefix: str = '') -> None:
+        cursor = b'0'
+        while True:
+            cursor, keys = self.execute('SCAN', cursor, 'MATCH', _glob_escape(prefix) + '*',
+                                        'COUNT', self.SCAN_COUNT)
+            if keys:
+                self.execute('DEL', *keys)
+            if cursor in (b'0', '0'):
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {'server': f'{self.host}:{self.port}/{self.db}'}
+
+
+def _glob_escape(value: str) -> str:
+    for char in '\\*?[]':
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+def create_cache_backend(config) -> Any:
+    """
+    Build the cache backend selected by CACHE_BACKEND in the app config.
+
+    Args:
+        config: Flask config mapping
+
+    Returns:
+        A backend instance, or None for per-cache memory backends
+    """
+    backend = (config.get('CACHE_BACKEND') or 'memory').lower()
+    if backend == 'memory':
+        return None
+    if backend == 'sqlite':
+        path = config.get('CACHE_URL') or os.path.join(tempfile.gettempdir(), 'recipe_room_cache.sqlite3')
+        if path.startswith('sqlite:///'):
+            path = path[len('sqlite:///'):]
+        return SQLiteCacheBackend(path, max_size=config.get('CACHE_MAX_ENTRIES', 10000))
+    if backend == 'redis':
+        return RedisCacheBackend(config.get('CACHE_URL') or 'redis://localhost:6379/0')
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}' (expected memory, sqlite or redis)")
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+# Default for Cache.set(generation=...): store unconditionally
+_ANY_GENERATION = object()
+
+
+class Cache:
+    """
+    A named cache on top of a backend. Keys are namespaced so several
+    caches can share one store; hit/miss counters are per worker.
+    Backend failures are logged and treated as misses, so an unavailable
+    cache server degrades to uncached reads instead of failing requests.
+
+    Every delete/clear stores a new generation token in the backend. A
+    value computed from the database is only stored if the generation
+    read before computing it is still current, so a request that read
+    before a concurrent commit cannot put its stale result back after
+    that commit's invalidation.
+    """
+
+    GENERATION_TTL = 86400
+
+    def __init__(self, name: str, max_size: int = 1000, ttl: float = 300,
+                 stale_ttl: float = 0, flight_timeout: float = 10):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.flight_timeout = flight_timeout
+        self.backend = MemoryCacheBackend(max_size)
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.discarded = 0
+        self.errors = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._flights_lock = threading.Lock()
+
+    def configure(self, backend=None, max_size: Optional[int] = None,
+                  ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                  flight_timeout: Optional[float] = None) -> None:
+        """
+        Switch to a shared backend (or a fresh memory one) and set the
+        default TTL, stale-while-revalidate window and single-flight wait.
+        """
+        if ttl is not None:
+            self.ttl = ttl
+        if stale_ttl is not None:
+            self.stale_ttl = stale_ttl
+        if flight_timeout is not None:
+            self.flight_timeout = flight_timeout
+        if backend is not None:
+            self.backend = backend
+        elif max_size is not None:
+            self.backend = MemoryCacheBackend(max_size)
+
+    def _key(self, key: Any) -> str:
+        return f'recipe-room:{self.name}:{key}'
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        try:
+            value = self.backend.get(self._key(key))
+        except Exception as e:
+            self._report(e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None,
+            generation: Any = _ANY_GENERATION) -> None:
+        """
+        Store a value with the given or default TTL in seconds. When a
+        generation token (see generation()) is given, the value is dropped
+        instead if entries were invalidated since that token was read.
+        """
+        if generation is not _ANY_GENERATION and generation != self.generation():
+            self.discarded += 1
+            return
+        try:
+            self.backend.set(self._key(key), value, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            self._report(e)
+
+    def delete(self, *keys: Any) -> None:
+        """Drop entries if present."""
+        try:
+            self.backend.delete([self._key(key) for key in keys])
+        except Exception as e:
+            self._report(e)
+        self._next_generation()
+
+    def clear(self) -> None:
+        """Drop every entry in this cache."""
+        try:
+            self.backend.clear(self._key(''))
+        except Exception as e:
+            self._report(e)
+        self._next_generation()
+
+    def generation(self) -> Optional[str]:
+        """
+        Return the current invalidation generation, shared by every worker
+        using the same backend. Read it before computing a value and pass
+        it to set().
+        """
+        try:
+            return self.backend.get(self._key(':generation'))
+        except Exception as e:
+            self._report(e)
+            return None
+
+    def invalidate(self) -> None:
+        """
+        Invalidate every entry by rotating the generation alone: one write
+        instead of a key scan. Only for caches whose keys include
+        generation(); the old entries are never read again and expire.
+        """
+        self._next_generation()
+
+    def _next_generation(self) -> None:
+        try:
+            self.backend.set(self._key(':generation'), uuid.uuid4().hex, self.GENERATION_TTL)
+        except Exception as e:
+            self._report(e)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       validate: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for a key, computing and storing it on a miss.
+
+        Concurrent misses for the same key in this worker are coalesced
+        (single flight): one caller runs compute() while the others wait up
+        to flight_timeout seconds for its result, then compute themselves.
+        When stale_ttl is set, entries stay servable for that long after
+        they expire; a stale entry is returned at once while a background
+        thread refreshes it, so compute() must not touch the request context.
+        A None result is returned to every waiter but not cached.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+            validate: Optional check of a cached value against its source;
+                values it rejects are recomputed as on a miss
+
+        Returns:
+            The cached or freshly computed value
+        """
+        entry = self.get(key)
+        if entry is not None and validate is not None and not validate(entry[1]):
+            self.discarded += 1
+            entry = None
+        if entry is not None:
+            fresh_until, value = entry
+            if fresh_until > time.time():
+                return value
+            self.stale_hits += 1
+            self._refresh_in_background(key, compute)
+            return value
+
+        flight, leader = self._join_flight(key)
+        if leader:
+            return self._run_flight(key, flight, compute)
+
+        self.coalesced += 1
+        if not flight.done.wait(self.flight_timeout):
+            return compute()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _join_flight(self, key: Hashable):
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _run_flight(self, key: Hashable, flight: _Flight, compute: Callable[[], Any]) -> Any:
+        try:
+            generation = self.generation()
+            flight.value = compute()
+            if flight.value is not None:
+                self.set(key, (time.time() + self.ttl, flight.value), self.ttl + self.stale_ttl,
+                         generation=generation)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _refresh_in_background(self, key: Hashable, compute: Callable[[], Any]) -> None:
+        flight, leader = self._join_flight(key)
+        if not leader:
+            return
+        app = current_app._get_current_object()
+
+        def refresh():
+            with app.app_context():
+                try:
+                    self._run_flight(key, flight, compute)
+                except Exception as e:
+                    self._report(e)
+
+        threading.Thread(target=refresh, name=f'{self.name}-cache-refresh', daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend details and hit/miss counters."""
+        try:
+            stats = dict(self.backend.stats())
+        except Exception as e:
+            self._report(e)
+            stats = {}
+        stats.update({
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'coalesced': self.coalesced,
+            'discarded': self.discarded,
+            'errors': self.errors
+        })
+        return stats
+
+    def _report(self, error: Exception) -> None:
+        self.errors += 1
+        print(f"Warning: {self.name} cache unavailable: {error}", file=sys.stderr)
+
+
+# Serialized Recipe.to_dict(include_owner=True, include_stats=True) payloads by recipe_id
+recipe_cache = Cache('recipe')
+# Search result id lists by plan fingerprint and catalog version, group recipe lists by ETag
+query_cache = Cache('query', ttl=60)
+# Pagination COUNT(*) results by collection key
+count_cache = Cache('count', ttl=30)
+# Rendered responses of anonymous public GET endpoints by path and query string
+response_cache = Cache('response', ttl=30)
+
+_PENDING_KEY = 'invalidated_recipe_ids'
+_CATALOG_BUMPED_KEY = 'catalog_version_bumped'
+CATALOG_VERSION_NAME = 'recipes'
+_listeners_registered = False
+
+
+def init_caches(app) -> None:
+    """
+    Configure the named caches from app config and register the session
+    hooks that invalidate them.
+    """
+    global _listeners_registered
+    config = app.config
+    backend = create_cache_backend(config)
+    flight_timeout = config.get('CACHE_FLIGHT_TIMEOUT', 10)
+    recipe_cache.configure(backend, max_size=config.get('RECIPE_CACHE_SIZE', 1000),
+                           ttl=config.get('RECIPE_CACHE_TTL', 300),
+                           stale_ttl=config.get('RECIPE_CACHE_STALE_TTL', 60),
+                           flight_timeout=flight_timeout)
+    query_cache.configure(backend, max_size=config.get('CACHE_MAX_ENTRIES', 10000),
+                          ttl=config.get('QUERY_CACHE_TTL', 60),
+                          stale_ttl=config.get('QUERY_CACHE_STALE_TTL', 300),
+                          flight_timeout=flight_timeout)
+    count_cache.configure(backend, max_size=config.get('CACHE_MAX_ENTRIES', 10000),
+                          ttl=config.get('COUNT_CACHE_TTL', 30))
+    response_cache.configure(backend, max_size=config.get('CACHE_MAX_ENTRIES', 10000),
+                             ttl=config.get('RESPONSE_CACHE_TTL', 30))
+    if not _listeners_registered:
+        event.listen(Session, 'after_flush', _collect_changed_recipes)
+        event.listen(Session, 'after_commit', _invalidate_changed_recipes)
+        event.listen(Session, 'after_rollback', _discard_changed_recipes)
+        _listeners_registered = True
+
+
+def cached_response(view):
+    """
+    Cache the full response of an anonymous, public GET endpoint.
+    Requests carrying an Authorization header always run the view. Only
+    200 responses are stored, keyed by path and sorted query string; a
+    cache hit still honours If-None-Match / If-Modified-Since. Entries
+    expire after RESPONSE_CACHE_TTL; keys include the cache generation, so
+    a commit that changes any recipe invalidates them all by rotating it,
+    and a response rendered across such a commit is not stored.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or 'Authorization' in request.headers:
+            return view(*args, **kwargs)
+
+        generation = response_cache.generation()
+        key = _response_cache_key(generation)
+        cached = response_cache.get(key)
+        if cached is not None:
+            body, status, headers = cached
+            response = make_response(body, status, headers)
+            return response.make_conditional(request)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.direct_passthrough:
+            headers = [(name, value) for name, value in response.headers.items()
+                       if name in ('Content-Type', 'ETag', 'Last-Modified')]
+            response_cache.set(key, (response.get_data(), response.status_code, headers),
+                               generation=generation)
+        return response
+    return wrapper
+
+
+def _response_cache_key(generation: Optional[str]) -> str:
+    args = sorted(request.args.items(multi=True))
+    key = f'{generation}:{request.path}'
+    if not args:
+        return key
+    return key + '?' + '&'.join(f'{name}={value}' for name, value in args)
+
+
+def mark_recipes_changed(session, *recipe_ids: int) -> None:
+    """
+    Queue recipes for invalidation when the session commits and bump the
+    catalog version in the same transaction.
+    Needed for bulk UPDATE/DELETE statements, which the flush hook cannot see.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).update(recipe_ids)
+    bump_catalog_version(session)
+
+
+def ensure_catalog_version() -> None:
+    """
+    Create the catalog version row if it is missing.
+    Must run inside an app context, after db.create_all().
+    """
+    if db.session.execute(select(catalog_versions.c.cv_version).where(
+        catalog_versions.c.cv_name == CATALOG_VERSION_NAME
+    )).first() is None:
+        db.session.execute(insert(catalog_versions).values(cv_name=CATALOG_VERSION_NAME, cv_version=0))
+        db.session.commit()
+
+
+def get_catalog_version() -> int:
+    """
+    Get the current catalog version (one primary key lookup).
+
+    Returns:
+        Version counter, 0 if it was never bumped
+    """
+    version = db.session.execute(select(catalog_versions.c.cv_version).where(
+        catalog_versions.c.cv_name == CATALOG_VERSION_NAME
+    )).scalar()
+    return version or 0
+
+
+def bump_catalog_version(session) -> None:
+    """
+    Increment the catalog version in the session's current transaction, so
+    it becomes visible exactly when the change commits. Runs at most once
+    per transaction. Called through mark_recipes_changed for every change
+    to a recipe, its engagement or its owner's profile; bulk UPDATEs that
+    do not mark recipes call it directly.
+    """
+    if session.info.get(_CATALOG_BUMPED_KEY):
+        return
+    session.info[_CATALOG_BUMPED_KEY] = True
+    connection = session.connection()
+    result = connection.execute(update(catalog_versions).where(
+        catalog_versions.c.cv_name == CATALOG_VERSION_NAME
+    ).values(cv_version=catalog_versions.c.cv_version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(catalog_versions).values(cv_name=CATALOG_VERSION_NAME, cv_version=1))
+
+
+def _collect_changed_recipes(session, flush_context) -> None:
+    """Record which cached recipes the flushed objects affect."""
+    changed = set()
+    changed_owner_ids = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Recipe):
+            changed.add(obj.recipe_id)
+        elif isinstance(obj, (Rating, Bookmark, Comment)):
+            changed.add(obj.recipe_id)
+        elif isinstance(obj, User) and obj not in session.new:
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in ('username', 'profile_image')):
+                changed_owner_ids.add(obj.id)
+
+    if changed_owner_ids:
+        owned = session.connection().execute(
+            select(Recipe.recipe_id).where(Recipe.recipe_owner_id.in_(changed_owner_ids))
+        ).scalars()
+        changed.update(owned)
+
+    changed.discard(None)
+    if changed:
+        mark_recipes_changed(session, *changed)
+
+
+def _invalidate_changed_recipes(session) -> None:
+    """Drop cache entries for recipes changed by the committed transaction."""
+    session.info.pop(_CATALOG_BUMPED_KEY, None)
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed:
+        recipe_cache.delete(*changed)
+        response_cache.invalidate()
+
+
+def _discard_changed_recipes(session) -> None:
+    """Forget pending invalidations when the transaction is rolled back."""
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_CATALOG_BUMPED_KEY, None)
@@ -0,0 +1,73 @@
+"""
+Recipe-Room Backend - Maintenance Commands
+
+Flask CLI commands for database maintenance jobs.
+Run with: flask --app app <command>
+"""
+
+import click
+
+from utils import (reconcile_recipe_counters, rebuild_ingredient_index, backfill_recipe_countries,
+                   backfill_recipe_total_time, refresh_rating_prior)
+from search_index import rebuild_search_index
+from similar_recipes import rebuild_similarity_index
+from recommendations import rebuild_recommendations
+from trending import update_trending
+
+
+def register_commands(app):
+    """Attach the maintenance commands to the Flask CLI."""
+
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        """Recompute recipe bookmark/comment/rating counters from source tables."""
+        updated = reconcile_recipe_counters()
+        click.echo(f"Corrected engagement counters of {updated} recipes")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the full-text search index from the recipes table."""
+        indexed = rebuild_search_index()
+        click.echo(f"Indexed {indexed} recipes for full-text search")
+
+    @app.cli.command('rebuild-ingredient-index')
+    def rebuild_ingredient_index_command():
+        """Rebuild the recipe_ingredient_terms index from recipe ingredients."""
+        indexed = rebuild_ingredient_index()
+        click.echo(f"Indexed ingredients for {indexed} recipes")
+
+    @app.cli.command('backfill-countries')
+    def backfill_countries_command():
+        """Canonicalize recipe countries and link them to the countries table."""
+        updated = backfill_recipe_countries()
+        click.echo(f"Canonicalized the country of {updated} recipes")
+
+    @app.cli.command('backfill-total-time')
+    def backfill_total_time_command():
+        """Recompute the stored recipe total time from prep and cook times."""
+        updated = backfill_recipe_total_time()
+        click.echo(f"Updated the total time of {updated} recipes")
+
+    @app.cli.command('rebuild-similarity-index')
+    def rebuild_similarity_index_command():
+        """Rebuild the MinHash signatures and LSH buckets behind similar recipes."""
+        indexed = rebuild_similarity_index()
+        click.echo(f"Indexed ingredient signatures for {indexed} recipes")
+
+    @app.cli.command('rebuild-recommendations')
+    def rebuild_recommendations_command():
+        """Recompute the item-item recipe neighbors from ratings and bookmarks."""
+        indexed = rebuild_recommendations()
+        click.echo(f"Computed neighbors for {indexed} recipes")
+
+    @app.cli.command('update-trending')
+    def update_trending_command():
+        """Decay the trending scores and add the events since the last run."""
+        updated = update_trending()
+        click.echo(f"Added new engagement to the trending score of {updated} recipes")
+
+    @app.cli.command('refresh-rating-prior')
+    def refresh_rating_prior_command():
+        """Recompute the global mean rating and every recipe's Bayesian rating."""
+        prior_mean, updated = refresh_rating_prior()
+        click.echo(f"Prior mean rating {prior_mean:.3f}; updated the Bayesian rating of {updated} recipes")
@@ -9,6 +9,53 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///recipe_room.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pagination total counts are cached for this many seconds
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 30))
+    
+    # Cache backend: 'memory' (per worker), 'sqlite' (a file shared by the
+    # workers on one host) or 'redis' (any Redis-protocol server)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    # SQLite file path or redis://[:password@]host:port/db URL
+    CACHE_URL = os.environ.get('CACHE_URL')
+    # Entry limit for the memory and sqlite backends
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    
+    # Recipe detail cache: max entries (memory backend) and TTL in seconds
+    RECIPE_CACHE_SIZE = int(os.environ.get('RECIPE_CACHE_SIZE', 1000))
+    RECIPE_CACHE_TTL = int(os.environ.get('RECIPE_CACHE_TTL', 300))
+    
+    # Expired recipe details are served for this many more seconds while a
+    # background thread refreshes them (0 disables stale-while-revalidate)
+    RECIPE_CACHE_STALE_TTL = int(os.environ.get('RECIPE_CACHE_STALE_TTL', 60))
+    
+    # Search and group recipe list results: TTL and stale-while-revalidate window
+    QUERY_CACHE_TTL = int(os.environ.get('QUERY_CACHE_TTL', 60))
+    QUERY_CACHE_STALE_TTL = int(os.environ.get('QUERY_CACHE_STALE_TTL', 300))
+    
+    # Seconds a request waits for another request rebuilding the same cache
+    # entry before computing it itself
+    CACHE_FLIGHT_TIMEOUT = int(os.environ.get('CACHE_FLIGHT_TIMEOUT', 10))
+    
+    # Anonymous public GET responses are cached for this many seconds
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))
+    
+    # Default minimum trigram similarity (0-1) for fuzzy title search
+    FUZZY_SIMILARITY_THRESHOLD = float(os.environ.get('FUZZY_SIMILARITY_THRESHOLD', 0.3))
+    
+    # Deepest search result reachable by paging: the ordered recipe IDs of
+    # a query are cached up to this many
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))
+    
+    # Seconds between checks for recipe changes made by other workers in the
+    # in-memory recipe indexes (fuzzy titles, autocomplete suggestions)
+    RECIPE_INDEX_REFRESH_INTERVAL = int(os.environ.get('RECIPE_INDEX_REFRESH_INTERVAL', 2))
+    
+    # Minimum seconds between background rebuilds of the pantry matching index
+    PANTRY_INDEX_MIN_AGE = int(os.environ.get('PANTRY_INDEX_MIN_AGE', 30))
+    
+    # Hours for a trending score contribution to lose half its weight
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 48))
+    
     # CORS Configuration
     # Comma-separated list of allowed origins for production
     CORS_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '*').split(',')]
@@ -0,0 +1,112 @@
+"""
+Recipe-Room Backend - Sparse Fieldsets
+
+Helpers for the `fields=` query parameter, e.g.
+`fields=title,image_url,stats.average_rating`.
+A field set is a set of dotted paths; None means "all fields".
+"""
+
+from typing import Any, Optional, Set
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated `fields` parameter.
+
+    Args:
+        raw: Raw query parameter value
+
+    Returns:
+        Set of requested field paths, or None when no projection was requested
+    """
+    if not raw:
+        return None
+    fields = {field.strip() for field in raw.split(',') if field.strip()}
+    return fields or None
+
+
+def wants_field(fields: Optional[Set[str]], name: str) -> bool:
+    """
+    Check whether a top-level field (or any of its sub-fields) was requested.
+
+    Args:
+        fields: Parsed field set (None means all fields)
+        name: Top-level field name
+
+    Returns:
+        True if the field should be computed and emitted
+    """
+    if fields is None:
+        return True
+    prefix = name + '.'
+    return any(field == name or field.startswith(prefix) for field in fields)
+
+
+def subfields(fields: Optional[Set[str]], name: str) -> Optional[Set[str]]:
+    """
+    Get the field set that applies inside a nested object.
+
+    Args:
+        fields: Parsed field set (None means all fields)
+        name: Name of the nested object
+
+    Returns:
+        Field set for the nested object, or None if it was requested whole
+    """
+    if fields is None or name in fields:
+        return None
+    prefix = name + '.'
+    return {field[len(prefix):] for field in fields if field.startswith(prefix)}
+
+
+def project_fields(data: Any, fields: Optional[Set[str]]) -> Any:
+    """
+    Trim a serialized dictionary (or list of them) down to a field set.
+
+    Args:
+        data: Dictionary or list of dictionaries
+        fields: Parsed field set (None means all fields)
+
+    Returns:
+        The projected data
+    """
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [project_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: project_fields(value, subfields(fields, key))
+        for key, value in data.items()
+        if wants_field(fields, key)
+    }
+
+
+def load_only_for_fields(model, fields: Optional[Set[str]]):
+    """
+    Build a load_only() option that fetches just the columns a field set needs.
+    Uses the model's SERIALIZED_COLUMNS, COMPUTED_FIELD_COLUMNS and
+    ALWAYS_LOADED_COLUMNS. Unrequested columns raise instead of lazy
+    loading, so an accidental access shows up as an error rather than as
+    an extra query per row.
+
+    Args:
+        model: Mapped model class
+        fields: Parsed field set (None means all fields)
+
+    Returns:
+        A loader option, or None when all fields were requested
+    """
+    if fields is None:
+        return None
+
+    columns = set(model.ALWAYS_LOADED_COLUMNS)
+    for name, column in model.SERIALIZED_COLUMNS.items():
+        if wants_field(fields, name):
+            columns.add(column)
+    for name, computed_columns in getattr(model, 'COMPUTED_FIELD_COLUMNS', {}).items():
+        if wants_field(fields, name):
+            columns.update(computed_columns)
+    return load_only(*(getattr(model, column) for column in sorted(columns)), raiseload=True)
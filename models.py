@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from fieldsets import wants_field, subfields, project_fields, load_only_for_fields
 
 db = SQLAlchemy()
 
@@ -16,6 +17,7 @@ class User(db.Model):
     profile_image = db.Column(db.String(255))
     user_profile_image = db.Column(db.String(255))  # Alias for compatibility
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Profile changes (for ETags)
     
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
@@ -58,6 +60,100 @@ group_memberships = db.Table('group_memberships',
     db.UniqueConstraint('gm_user_id', 'gm_group_id', name='unique_user_group')
 )
 
+# Inverted index: ingredient term -> recipes using it (kept in sync on recipe
+# writes; `flask rebuild-ingredient-index` rebuilds it)
+recipe_ingredient_terms = db.Table('recipe_ingredient_terms',
+    db.Column('rit_recipe_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Column('rit_term', db.String(200), primary_key=True),
+    db.Index('ix_recipe_ingredient_terms_term', 'rit_term', 'rit_recipe_id')
+)
+
+
+# MinHash signature of each recipe's ingredient names and the LSH band
+# buckets it falls into, for similar-recipe lookups (see similar_recipes.py;
+# `flask rebuild-similarity-index` rebuilds both)
+recipe_minhash = db.Table('recipe_minhash',
+    db.Column('rmh_recipe_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Column('rmh_signature', db.LargeBinary, nullable=False)
+)
+
+recipe_lsh_buckets = db.Table('recipe_lsh_buckets',
+    db.Column('rlb_band', db.SmallInteger, primary_key=True),
+    db.Column('rlb_bucket', db.BigInteger, primary_key=True),
+    db.Column('rlb_recipe_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Index('ix_recipe_lsh_buckets_recipe', 'rlb_recipe_id')
+)
+
+# Item-item neighbors from ratings and bookmarks: the top-N most similar
+# recipes of each recipe by cosine similarity of their user vectors (see
+# recommendations.py; `flask rebuild-recommendations` recomputes the table)
+recipe_neighbors = db.Table('recipe_neighbors',
+    db.Column('rn_recipe_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Column('rn_neighbor_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Column('rn_score', db.Float, nullable=False)
+)
+
+# Trending recipes: an exponentially decayed engagement score per recipe,
+# with the recipe's country so per-country lists use the same index (see
+# trending.py; `flask update-trending` decays and adds new events)
+trending_scores = db.Table('trending_scores',
+    db.Column('ts_recipe_id', db.Integer, db.ForeignKey('recipes.recipe_id'), primary_key=True),
+    db.Column('ts_country_id', db.Integer, db.ForeignKey('countries.country_id'), nullable=True),
+    db.Column('ts_score', db.Float, nullable=False),
+    db.Index('ix_trending_scores_score', 'ts_score'),
+    db.Index('ix_trending_scores_country', 'ts_country_id', 'ts_score')
+)
+
+# Progress of the trending job: when it last ran and the newest rating,
+# bookmark and comment it has counted
+trending_runs = db.Table('trending_runs',
+    db.Column('tr_id', db.Integer, primary_key=True),
+    db.Column('tr_ran_at', db.DateTime, nullable=False),
+    db.Column('tr_last_rating_id', db.Integer, nullable=False, default=0),
+    db.Column('tr_last_bookmark_id', db.Integer, nullable=False, default=0),
+    db.Column('tr_last_comment_id', db.Integer, nullable=False, default=0)
+)
+
+# Engagement already counted by the trending job, one row per kind of event
+# (1 rating, 2 bookmark, 3 comment), user and recipe, with the ID of the
+# row that was counted; lets runs re-scan an overlap window below their
+# watermarks without counting anything twice
+trending_events = db.Table('trending_events',
+    db.Column('te_kind', db.SmallInteger, primary_key=True),
+    db.Column('te_user_id', db.Integer, primary_key=True),
+    db.Column('te_recipe_id', db.Integer, primary_key=True),
+    db.Column('te_event_id', db.Integer, nullable=False),
+    db.Column('te_counted_at', db.DateTime, nullable=False),
+    db.Index('ix_trending_events_counted_at', 'te_counted_at')
+)
+
+# Global prior of the Bayesian recipe ratings: the mean rating over every
+# rated recipe, refreshed periodically by `flask refresh-rating-prior`
+rating_prior = db.Table('rating_prior',
+    db.Column('rp_id', db.Integer, primary_key=True),
+    db.Column('rp_mean', db.Float, nullable=False),
+    db.Column('rp_updated_at', db.DateTime, nullable=False)
+)
+
+# Catalog version counters: 'recipes' is bumped in the same transaction as
+# any recipe write, delete, engagement change or owner profile change, so
+# feed ETags and cached search results can be keyed by it (see
+# cache.bump_catalog_version)
+catalog_versions = db.Table('catalog_versions',
+    db.Column('cv_name', db.String(50), primary_key=True),
+    db.Column('cv_version', db.Integer, nullable=False, default=0)
+)
+
+
+class Country(db.Model):
+    """
+    Canonical country names (see utils.normalize_country_name), referenced
+    by recipes so country filters and facets work on an integer key.
+    """
+    __tablename__ = 'countries'
+    country_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    country_name = db.Column(db.String(100), unique=True, nullable=False)
+
 
 class Recipe(db.Model):
     """
@@ -65,6 +161,15 @@ class Recipe(db.Model):
     Prefix: recipe_ for all fields to avoid collisions
     """
     __tablename__ = 'recipes'
+    __table_args__ = (
+        # Keyset pagination indexes for the main feed and per-user feeds
+        db.Index('ix_recipes_feed', 'recipe_is_deleted', 'recipe_created_at', 'recipe_id'),
+        db.Index('ix_recipes_owner_feed', 'recipe_owner_id', 'recipe_is_deleted', 'recipe_created_at', 'recipe_id'),
+        # Total time range filters ("under 30 minutes")
+        db.Index('ix_recipes_total_time', 'recipe_is_deleted', 'recipe_total_time'),
+        # Top-rated lists (ORDER BY recipe_bayesian_rating DESC, recipe_id DESC)
+        db.Index('ix_recipes_top_rated', 'recipe_is_deleted', 'recipe_bayesian_rating', 'recipe_id'),
+    )
     
     # Primary key
     recipe_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -72,7 +177,8 @@ class Recipe(db.Model):
     # Basic recipe information
     recipe_title = db.Column(db.String(200), nullable=False, index=True)
     recipe_description = db.Column(db.Text, nullable=True)
-    recipe_country = db.Column(db.String(100), nullable=True, index=True)
+    recipe_country = db.Column(db.String(100), nullable=True, index=True)  # Canonical name, as in countries
+    recipe_country_id = db.Column(db.Integer, db.ForeignKey('countries.country_id'), nullable=True, index=True)
     
     # Ingredients and procedure (stored as JSON for flexibility)
     recipe_ingredients = db.Column(db.JSON, nullable=False)  # List of ingredient objects
@@ -82,6 +188,9 @@ class Recipe(db.Model):
     recipe_people_served = db.Column(db.Integer, nullable=False, index=True)
     recipe_prep_time = db.Column(db.Integer, nullable=True)  # In minutes
     recipe_cook_time = db.Column(db.Integer, nullable=True)  # In minutes
+    # Stored prep + cook time (utils.calculate_total_time), set with the times
+    # on create/update; `flask backfill-total-time` recomputes it
+    recipe_total_time = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Image storage (Cloudinary URL)
     recipe_image_url = db.Column(db.String(500), nullable=True)
@@ -90,11 +199,24 @@ class Recipe(db.Model):
     # Ownership and timestamps
     recipe_owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     recipe_created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
-    recipe_updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    recipe_updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Soft delete flag
     recipe_is_deleted = db.Column(db.Boolean, default=False, nullable=False)
     
+    # Denormalized engagement counters (kept in sync by the bookmark, rating
+    # and comment routes; `flask reconcile-counters` rebuilds them)
+    recipe_bookmarks_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    recipe_comments_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Non-deleted only
+    recipe_rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    recipe_rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    recipe_average_rating = db.Column(db.Float, default=0.0, server_default='0', nullable=False, index=True)
+    # Bayesian average: the ratings blended with the global prior mean in
+    # rating_prior (utils.bayesian_rating_expression), 0 when unrated; kept
+    # with the counters, recomputed by `flask refresh-rating-prior`
+    recipe_bayesian_rating = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    recipe_stats_updated_at = db.Column(db.DateTime, nullable=True, index=True)  # Last counter change (for ETags)
+    
     # Relationships
     recipe_owner = db.relationship('User', backref=db.backref('user_recipes', lazy='dynamic'))
     
@@ -117,49 +239,75 @@ class Recipe(db.Model):
     def __repr__(self):
         return f'<Recipe {self.recipe_id}: {self.recipe_title}>'
     
-    def to_dict(self, include_owner=True, include_stats=True):
-        """Convert recipe object to dictionary for JSON serialization."""
-        recipe_data = {
-            'recipe_id': self.recipe_id,
-            'title': self.recipe_title,
-            'description': self.recipe_description,
-            'country': self.recipe_country,
-            'ingredients': self.recipe_ingredients,
-            'procedure': self.recipe_procedure,
-            'people_served': self.recipe_people_served,
-            'prep_time': self.recipe_prep_time,
-            'cook_time': self.recipe_cook_time,
-            'image_url': self.recipe_image_url,
-            'created_at': self.recipe_created_at.isoformat() if self.recipe_created_at else None,
-            'updated_at': self.recipe_updated_at.isoformat() if self.recipe_updated_at else None,
-        }
+    # JSON field name -> column, in serialization order
+    SERIALIZED_COLUMNS = {
+        'title': 'recipe_title',
+        'description': 'recipe_description',
+        'country': 'recipe_country',
+        'ingredients': 'recipe_ingredients',
+        'procedure': 'recipe_procedure',
+        'people_served': 'recipe_people_served',
+        'prep_time': 'recipe_prep_time',
+        'cook_time': 'recipe_cook_time',
+        'image_url': 'recipe_image_url',
+        'created_at': 'recipe_created_at',
+        'updated_at': 'recipe_updated_at',
+    }
+    
+    # Columns needed by the computed fields, for `fields=` column loading
+    COMPUTED_FIELD_COLUMNS = {
+        'owner': ('recipe_owner_id',),
+        'owner_id': ('recipe_owner_id',),
+        'stats': ('recipe_bookmarks_count', 'recipe_comments_count',
+                  'recipe_rating_sum', 'recipe_rating_count'),
+    }
+    
+    # Always loaded: identity, owner preloading and cursor encoding need them
+    ALWAYS_LOADED_COLUMNS = ('recipe_id', 'recipe_owner_id', 'recipe_created_at', 'recipe_bayesian_rating')
+    
+    # Heavy JSON fields left out of the summary representation
+    SUMMARY_EXCLUDED_FIELDS = ('ingredients', 'procedure')
+    
+    def to_dict(self, include_owner=True, include_stats=True, summary=False, fields=None):
+        """
+        Convert recipe object to dictionary for JSON serialization.
+        The summary representation (used by list endpoints) leaves out the
+        ingredients and procedure JSON. `fields` is a parsed sparse fieldset
+        (see fieldsets.py); owner and stats are only built when requested.
+        """
+        recipe_data = {'recipe_id': self.recipe_id}
+        
+        for field, column in self.SERIALIZED_COLUMNS.items():
+            if summary and field in self.SUMMARY_EXCLUDED_FIELDS:
+                continue
+            if wants_field(fields, field):
+                value = getattr(self, column)
+                recipe_data[field] = value.isoformat() if isinstance(value, datetime) else value
         
-        if include_owner and self.recipe_owner:
-            recipe_data['owner'] = {
+        if include_owner and wants_field(fields, 'owner') and self.recipe_owner:
+            recipe_data['owner'] = project_fields({
                 'user_id': self.recipe_owner.id,
                 'username': self.recipe_owner.username,
                 'profile_image': getattr(self.recipe_owner, 'profile_image', None)
-            }
-        else:
+            }, subfields(fields, 'owner'))
+        elif wants_field(fields, 'owner_id'):
             recipe_data['owner_id'] = self.recipe_owner_id
         
-        if include_stats:
-            recipe_data['stats'] = {
-                'bookmarks_count': self.recipe_bookmarks.count() if hasattr(self, 'recipe_bookmarks') else 0,
-                'comments_count': self.recipe_comments.count() if hasattr(self, 'recipe_comments') else 0,
-                'average_rating': self._calculate_average_rating()
-            }
+        if include_stats and wants_field(fields, 'stats'):
+            recipe_data['stats'] = project_fields({
+                'bookmarks_count': self.recipe_bookmarks_count or 0,
+                'comments_count': self.recipe_comments_count or 0,
+                'average_rating': self._calculate_average_rating(),
+                'ratings_count': self.recipe_rating_count or 0
+            }, subfields(fields, 'stats'))
         
         return recipe_data
     
     def _calculate_average_rating(self):
-        """Calculate average rating for this recipe"""
-        if not hasattr(self, 'recipe_ratings'):
-            return 0.0
-        ratings = self.recipe_ratings.all()
-        if not ratings:
+        """Calculate average rating for this recipe from the counter columns"""
+        if not self.recipe_rating_count:
             return 0.0
-        return round(sum(r.rating_value for r in ratings) / len(ratings), 2)
+        return round(self.recipe_rating_sum / self.recipe_rating_count, 2)
 
 class RecipeGroup(db.Model):
     """
@@ -199,35 +347,55 @@ class RecipeGroup(db.Model):
     def __repr__(self):
         return f'<RecipeGroup {self.group_id}: {self.group_name}>'
     
-    def to_dict(self, include_members=False, include_recipes=False):
-        """Convert group to dictionary with optional related data"""
-        group_data = {
-            'group_id': self.group_id,
-            'name': self.group_name,
-            'description': self.group_description,
-            'image_url': self.group_image_url,
-            'owner_id': self.group_owner_id,
-            'created_at': self.group_created_at.isoformat(),
-            'updated_at': self.group_updated_at.isoformat(),
-            'is_active': self.group_is_active,
-            'max_members': self.group_max_members,
-            'members_count': len(self.group_members)
-        }
+    # JSON field name -> column, in serialization order
+    SERIALIZED_COLUMNS = {
+        'name': 'group_name',
+        'description': 'group_description',
+        'image_url': 'group_image_url',
+        'owner_id': 'group_owner_id',
+        'created_at': 'group_created_at',
+        'updated_at': 'group_updated_at',
+        'is_active': 'group_is_active',
+        'max_members': 'group_max_members',
+    }
+    
+    # Always loaded: identity and the ownership/activity checks in the routes
+    ALWAYS_LOADED_COLUMNS = ('group_id', 'group_owner_id', 'group_is_active', 'group_max_members')
+    
+    def to_dict(self, include_members=False, include_recipes=False, fields=None):
+        """
+        Convert group to dictionary with optional related data.
+        `fields` is a parsed sparse fieldset (see fieldsets.py); members and
+        recipes are only loaded when requested.
+        """
+        group_data = {'group_id': self.group_id}
+        
+        for field, column in self.SERIALIZED_COLUMNS.items():
+            if wants_field(fields, field):
+                value = getattr(self, column)
+                group_data[field] = value.isoformat() if isinstance(value, datetime) else value
         
-        if include_members:
-            group_data['members'] = [
+        if wants_field(fields, 'members_count'):
+            group_data['members_count'] = len(self.group_members)
+        
+        if include_members and wants_field(fields, 'members'):
+            group_data['members'] = project_fields([
                 {
                     'user_id': member.id,
                     'username': member.username,
                     'profile_image': getattr(member, 'profile_image', None)
                 }
                 for member in self.group_members
-            ]
+            ], subfields(fields, 'members'))
         
-        if include_recipes:
+        if include_recipes and wants_field(fields, 'recipes'):
+            recipe_fields = subfields(fields, 'recipes')
+            recipes_query = self.group_recipes
+            if recipe_fields is not None:
+                recipes_query = recipes_query.options(load_only_for_fields(Recipe, recipe_fields))
             group_data['recipes'] = [
-                recipe.to_dict(include_owner=False, include_stats=False) 
-                for recipe in self.group_recipes.all()
+                recipe.to_dict(include_owner=False, include_stats=False, fields=recipe_fields)
+                for recipe in recipes_query.all()
             ]
         
         return group_data
@@ -280,12 +448,20 @@ class RecipeEditHistory(db.Model):
 # Placeholder classes for forward references (to be defined by team members)
 class Bookmark(db.Model):
     __tablename__ = 'bookmarks'
+    __table_args__ = (
+        # A user's most recent bookmarks (recommendations)
+        db.Index('ix_bookmarks_user', 'user_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.recipe_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
 class Rating(db.Model):
     __tablename__ = 'ratings'
+    __table_args__ = (
+        # A user's most recent ratings (recommendations)
+        db.Index('ix_ratings_user', 'user_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.recipe_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -304,20 +480,38 @@ class Comment(db.Model):
     # Relationships
     comment_user = db.relationship('User', backref=db.backref('user_comments', lazy='dynamic'))
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'recipe_id': self.recipe_id,
-            'user_id': self.user_id,
-            'comment_text': self.comment_text,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'user': {
+    # JSON field name -> column, in serialization order
+    SERIALIZED_COLUMNS = {
+        'recipe_id': 'recipe_id',
+        'user_id': 'user_id',
+        'comment_text': 'comment_text',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    
+    # Always loaded: identity and the author lookup
+    ALWAYS_LOADED_COLUMNS = ('id', 'user_id')
+    
+    def to_dict(self, fields=None):
+        """
+        Convert comment to dictionary. `fields` is a parsed sparse fieldset
+        (see fieldsets.py); the author is only loaded when requested.
+        """
+        comment_data = {'id': self.id}
+        
+        for field, column in self.SERIALIZED_COLUMNS.items():
+            if wants_field(fields, field):
+                value = getattr(self, column)
+                comment_data[field] = value.isoformat() if isinstance(value, datetime) else value
+        
+        if wants_field(fields, 'user'):
+            comment_data['user'] = project_fields({
                 'user_id': self.comment_user.id,
                 'username': self.comment_user.username,
                 'profile_image': getattr(self.comment_user, 'profile_image', None)
-            } if self.comment_user else None
-        }
+            }, subfields(fields, 'user')) if self.comment_user else None
+        
+        return comment_data
 
 class Payment(db.Model):
     __tablename__ = 'payments'
@@ -0,0 +1,213 @@
+"""
+Recipe-Room Backend - Pantry Matching
+
+"What can I cook" index: every (recipe, ingredient) pair is an occurrence
+with an integer ID, and each ingredient term (full name and single words,
+as in the ingredient index) maps to a sorted NumPy array of occurrence IDs.
+A pantry lookup unions the posting arrays of its terms and counts covered
+occurrences per recipe with np.bincount, so the cost depends on the posting
+sizes, not on the number of recipes scanned in Python.
+
+The index lives in each worker's memory. It is rebuilt when the catalog
+version (see cache.get_catalog_version) changes: synchronously the first
+time, then in a background thread while the previous index keeps serving.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from flask import current_app
+
+from cache import get_catalog_version
+from models import db, Recipe
+from utils import extract_ingredient_names, normalize_ingredient_term, ingredient_name_terms
+
+
+class PantryIndex:
+    """Immutable ingredient -> recipe occurrence postings for one catalog version."""
+
+    def __init__(self, version, recipe_ids: np.ndarray, starts: np.ndarray,
+                 occurrence_recipes: np.ndarray, occurrence_names: np.ndarray,
+                 names: List[str], postings: Dict[str, np.ndarray]):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.recipe_ids = recipe_ids                  # recipe position -> recipe_id
+        self.starts = starts                          # recipe position -> first occurrence (len = recipes + 1)
+        self.occurrence_recipes = occurrence_recipes  # occurrence -> recipe position
+        self.occurrence_names = occurrence_names      # occurrence -> index into names
+        self.names = names
+        self.postings = postings
+        self.ingredient_counts = np.diff(starts)
+
+    @classmethod
+    def build(cls, version, batch_size: int = 2000) -> 'PantryIndex':
+        """
+        Build the index from every non-deleted recipe.
+
+        Args:
+            version: Catalog version the index corresponds to
+            batch_size: Number of recipes loaded per query
+
+        Returns:
+            A new PantryIndex
+        """
+        recipe_ids: List[int] = []
+        starts: List[int] = [0]
+        occurrence_names: List[int] = []
+        name_ids: Dict[str, int] = {}
+
+        last_id = 0
+        while True:
+            rows = db.session.query(Recipe.recipe_id, Recipe.recipe_ingredients).filter(
+                Recipe.recipe_is_deleted == False,
+                Recipe.recipe_id > last_id
+            ).order_by(Recipe.recipe_id).limit(batch_size).all()
+            if not rows:
+                break
+
+            for recipe_id, ingredients in rows:
+                seen = set()
+                for name in extract_ingredient_names(ingredients or []):
+                    name = normalize_ingredient_term(name)
+                    if not name or name in seen:
+                        continue
+                    seen.add(name)
+                    occurrence_names.append(name_ids.setdefault(name, len(name_ids)))
+                recipe_ids.append(recipe_id)
+                starts.append(len(occurrence_names))
+            last_id = rows[-1].recipe_id
+
+        starts_array = np.asarray(starts, dtype=np.int64)
+        occurrence_recipes = np.repeat(
+            np.arange(len(recipe_ids), dtype=np.int32), np.diff(starts_array)
+        )
+        names = [None] * len(name_ids)
+        for name, name_id in name_ids.items():
+            names[name_id] = name
+
+        # Group occurrences by ingredient name, then give each term the
+        # occurrences of every name it appears in
+        occurrence_names_array = np.asarray(occurrence_names, dtype=np.int32)
+        by_name = np.argsort(occurrence_names_array, kind='stable').astype(np.int32)
+        name_starts = np.concatenate((
+            [0], np.cumsum(np.bincount(occurrence_names_array, minlength=len(names)))
+        ))
+        term_names: Dict[str, List[int]] = {}
+        for name_id, name in enumerate(names):
+            for term in ingredient_name_terms(name):
+                term_names.setdefault(term, []).append(name_id)
+
+        postings = {}
+        for term, term_name_ids in term_names.items():
+            parts = [by_name[name_starts[name_id]:name_starts[name_id + 1]] for name_id in term_name_ids]
+            postings[term] = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+        return cls(
+            version=version,
+            recipe_ids=np.asarray(recipe_ids, dtype=np.int64),
+            starts=starts_array,
+            occurrence_recipes=occurrence_recipes,
+            occurrence_names=occurrence_names_array,
+            names=names,
+            postings=postings
+        )
+
+    def match(self, pantry: List[str], limit: int = 20, min_coverage: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Rank recipes by the fraction of their ingredients covered by a pantry.
+
+        Args:
+            pantry: Ingredient names the user has
+            limit: Maximum number of recipes to return
+            min_coverage: Minimum coverage (0-1); recipes need at least one match
+
+        Returns:
+            List of dictionaries with recipe_id, coverage, matched_count,
+            ingredients_count and missing_ingredients, best first
+        """
+        terms = {normalize_ingredient_term(item) for item in pantry}
+        postings = [self.postings[term] for term in terms if term in self.postings]
+        if not postings or limit <= 0:
+            return []
+
+        covered = np.unique(np.concatenate(postings))
+        matched = np.bincount(self.occurrence_recipes[covered], minlength=len(self.recipe_ids))
+        candidates = np.flatnonzero(matched)
+        coverage = matched[candidates] / self.ingredient_counts[candidates]
+        keep = coverage >= min_coverage
+        candidates, coverage = candidates[keep], coverage[keep]
+
+        # Highest coverage first, then most matched ingredients, then newest recipe
+        order = np.lexsort((-self.recipe_ids[candidates], -matched[candidates], -coverage))[:limit]
+
+        covered_mask = np.zeros(len(self.occurrence_names), dtype=bool)
+        covered_mask[covered] = True
+
+        results = []
+        for position in candidates[order]:
+            start, end = self.starts[position], self.starts[position + 1]
+            missing = self.occurrence_names[start:end][~covered_mask[start:end]]
+            results.append({
+                'recipe_id': int(self.recipe_ids[position]),
+                'coverage': round(float(matched[position] / (end - start)), 4),
+                'matched_count': int(matched[position]),
+                'ingredients_count': int(end - start),
+                'missing_ingredients': [self.names[name_id] for name_id in missing]
+            })
+        return results
+
+
+_index: Optional[PantryIndex] = None
+_build_lock = threading.Lock()
+_refreshing = False
+
+
+def get_pantry_index() -> PantryIndex:
+    """
+    Get a pantry index for the current catalog. The first call builds it;
+    after a catalog change the previous index is returned while a
+    background thread rebuilds it (at most once per PANTRY_INDEX_MIN_AGE
+    seconds).
+
+    Returns:
+        The current PantryIndex
+    """
+    global _index, _refreshing
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    if index is None:
+        with _build_lock:
+            if _index is None or _index.version != version:
+                _index = PantryIndex.build(version)
+            return _index
+
+    min_age = current_app.config.get('PANTRY_INDEX_MIN_AGE', 30)
+    if time.monotonic() - index.built_at >= min_age:
+        with _build_lock:
+            start_refresh = not _refreshing
+            _refreshing = True
+        if start_refresh:
+            app = current_app._get_current_object()
+            threading.Thread(target=_refresh_index, args=(app,), name='pantry-index-refresh',
+                             daemon=True).start()
+    return index
+
+
+def _refresh_index(app) -> None:
+    global _index, _refreshing
+    try:
+        with app.app_context():
+            version = get_catalog_version()
+            index = PantryIndex.build(version)
+            with _build_lock:
+                _index = index
+    except Exception:
+        app.logger.exception('Pantry index refresh failed')
+    finally:
+        with _build_lock:
+            _refreshing = False
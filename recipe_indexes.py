@@ -0,0 +1,385 @@
+"""
+Recipe-Room Backend - In-Memory Recipe Indexes
+
+Per-worker indexes over the recipes table that stay current through
+deltas instead of full rebuilds: each index remembers the newest
+recipe_updated_at it has applied and re-reads only rows updated since then
+(an indexed range scan). Soft deletes bump recipe_updated_at, so removals
+arrive the same way.
+
+Commits in this worker that touch recipes mark every index for refresh on
+its next use; changes made by other workers are picked up at most
+RECIPE_INDEX_REFRESH_INTERVAL seconds later.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+import re
+import threading
+import time
+from typing import Dict, List, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Recipe
+from utils import extract_ingredient_names, normalize_ingredient_term
+
+# Rows committed slightly out of timestamp order are re-read this far back
+REFRESH_OVERLAP = timedelta(seconds=5)
+_EPOCH = datetime(1970, 1, 1)
+
+_STALE_KEY = 'recipe_indexes_stale'
+_indexes: List['RecipeIndex'] = []
+_listeners_registered = False
+
+
+class RecipeIndex(ABC):
+    """
+    Base class for an in-memory index kept in sync with the recipes table.
+    Subclasses list the COLUMNS they need and implement add(), remove()
+    and clear().
+    """
+
+    COLUMNS: Tuple = (Recipe.recipe_id,)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._checked_at = None
+        self._stale = True
+        _indexes.append(self)
+
+    @abstractmethod
+    def add(self, row) -> None:
+        """Index one recipe row (selected with COLUMNS)."""
+
+    @abstractmethod
+    def remove(self, recipe_id: int) -> None:
+        """Drop a recipe from the index if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    def mark_stale(self) -> None:
+        """Force a refresh on the next ensure_current() call."""
+        self._stale = True
+
+    def ensure_current(self) -> None:
+        """
+        Apply recipe changes made since the last refresh. The first call
+        loads every recipe; later calls only read recently updated rows and
+        run at most once per RECIPE_INDEX_REFRESH_INTERVAL seconds unless a
+        local commit marked the index stale.
+        """
+        interval = current_app.config.get('RECIPE_INDEX_REFRESH_INTERVAL', 2)
+        now = time.monotonic()
+        if not self._stale and self._checked_at is not None and now - self._checked_at < interval:
+            return
+
+        with self._lock:
+            if not self._stale and self._checked_at is not None and now - self._checked_at < interval:
+                return
+            self._stale = False
+            self._checked_at = now
+
+            query = db.session.query(Recipe.recipe_is_deleted, Recipe.recipe_updated_at, *self.COLUMNS)
+            if self._version is None:
+                self.clear()
+                query = query.filter(Recipe.recipe_is_deleted == False)
+            else:
+                query = query.filter(Recipe.recipe_updated_at >= self._version - REFRESH_OVERLAP)
+
+            for row in query.yield_per(1000):
+                self.remove(row.recipe_id)
+                if not row.recipe_is_deleted:
+                    self.add(row)
+                if self._version is None or row.recipe_updated_at > self._version:
+                    self._version = row.recipe_updated_at
+
+            if self._version is None:
+                # Empty catalog: later refreshes read every new row
+                self._version = _EPOCH
+
+
+# pg_trgm-compatible trigrams: lowercase alphanumeric words, each padded
+# with two spaces in front and one behind
+_WORD_PATTERN = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(value: str) -> Set[str]:
+    """
+    Get the pg_trgm-style trigram set of a string.
+
+    Args:
+        value: Text to split
+
+    Returns:
+        Set of trigrams
+    """
+    grams = set()
+    for word in _WORD_PATTERN.findall((value or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TitleTrigramIndex(RecipeIndex):
+    """
+    Trigram postings over recipe titles for fuzzy matching where pg_trgm is
+    not available. Similarity is the pg_trgm measure: shared trigrams over
+    the size of the union of both trigram sets.
+    """
+
+    COLUMNS = (Recipe.recipe_id, Recipe.recipe_title)
+
+    def __init__(self):
+        super().__init__()
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+    def add(self, row) -> None:
+        grams = trigrams(row.recipe_title)
+        self._grams[row.recipe_id] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(row.recipe_id)
+
+    def remove(self, recipe_id: int) -> None:
+        for gram in self._grams.pop(recipe_id, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(recipe_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def clear(self) -> None:
+        self._grams.clear()
+        self._postings.clear()
+
+    def search(self, value: str, threshold: float, limit: int) -> List[Tuple[int, float]]:
+        """
+        Find titles similar to a string.
+
+        Args:
+            value: Text to match
+            threshold: Minimum similarity (0-1)
+            limit: Maximum number of matches
+
+        Returns:
+            List of (recipe_id, similarity), most similar first
+        """
+        self.ensure_current()
+        query_grams = trigrams(value)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._postings.get(gram, ()))
+
+            # similarity >= threshold needs at least threshold * |query| shared trigrams
+            min_shared = threshold * len(query_grams)
+            matches = []
+            for recipe_id, count in shared.items():
+                if count < min_shared:
+                    continue
+                similarity = count / (len(query_grams) + len(self._grams[recipe_id]) - count)
+                if similarity >= threshold:
+                    matches.append((recipe_id, similarity))
+
+        matches.sort(key=lambda match: (-match[1], -match[0]))
+        return matches[:limit]
+
+
+title_trigram_index = TitleTrigramIndex()
+
+
+def _word_starts(value: str) -> List[str]:
+    """Every suffix of a normalized string that starts at a word, e.g. 'a b' -> ['a b', 'b']."""
+    words = value.split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class _PrefixList:
+    """Sorted (key, item) pairs with reference counts, searched by prefix with bisect."""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, object]] = []
+        self._refs: Counter = Counter()
+
+    def add(self, key: str, item) -> None:
+        if self._refs[(key, item)] == 0:
+            insort(self._entries, (key, item))
+        self._refs[(key, item)] += 1
+
+    def discard(self, key: str, item) -> None:
+        refs = self._refs.get((key, item), 0)
+        if refs > 1:
+            self._refs[(key, item)] = refs - 1
+            return
+        self._refs.pop((key, item), None)
+        position = bisect_left(self._entries, (key, item))
+        if position < len(self._entries) and self._entries[position] == (key, item):
+            del self._entries[position]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._refs.clear()
+
+    def items_with_prefix(self, prefix: str, max_scan: int) -> List[Tuple[str, object]]:
+        """Return up to max_scan (key, item) pairs whose key starts with the prefix."""
+        matches = []
+        position = bisect_left(self._entries, (prefix,))
+        while position < len(self._entries) and len(matches) < max_scan:
+            key, item = self._entries[position]
+            if not key.startswith(prefix):
+                break
+            matches.append((key, item))
+            position += 1
+        return matches
+
+
+class SuggestionIndex(RecipeIndex):
+    """
+    Sorted prefix lists of recipe titles, ingredient names and countries
+    for search-as-you-type. Every word start is indexed, so "carb" also
+    suggests "Spaghetti Carbonara". Ingredients and countries are ranked by
+    how many recipes use them; titles prefer matches at the start.
+    """
+
+    COLUMNS = (Recipe.recipe_id, Recipe.recipe_title, Recipe.recipe_ingredients, Recipe.recipe_country)
+
+    # Most prefix matches examined per group before ranking
+    MAX_SCAN = 500
+
+    def __init__(self):
+        super().__init__()
+        self._titles = _PrefixList()
+        self._ingredients = _PrefixList()
+        self._countries = _PrefixList()
+        self._recipes: Dict[int, Tuple[str, Tuple[str, ...], str]] = {}
+        self._ingredient_counts: Counter = Counter()
+        self._country_counts: Counter = Counter()
+
+    def add(self, row) -> None:
+        title = row.recipe_title or ''
+        ingredients = tuple(sorted({
+            normalize_ingredient_term(name)
+            for name in extract_ingredient_names(row.recipe_ingredients or [])
+        } - {''}))
+        country = ' '.join((row.recipe_country or '').split())
+        self._recipes[row.recipe_id] = (title, ingredients, country)
+
+        for key in _word_starts(normalize_ingredient_term(title)):
+            self._titles.add(key, row.recipe_id)
+        for name in ingredients:
+            self._ingredient_counts[name] += 1
+            for key in _word_starts(name):
+                self._ingredients.add(key, name)
+        if country:
+            self._country_counts[country] += 1
+            for key in _word_starts(country.lower()):
+                self._countries.add(key, country)
+
+    def remove(self, recipe_id: int) -> None:
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is None:
+            return
+        title, ingredients, country = entry
+
+        for key in _word_starts(normalize_ingredient_term(title)):
+            self._titles.discard(key, recipe_id)
+        for name in ingredients:
+            self._ingredient_counts[name] -= 1
+            if self._ingredient_counts[name] <= 0:
+                del self._ingredient_counts[name]
+            for key in _word_starts(name):
+                self._ingredients.discard(key, name)
+        if country:
+            self._country_counts[country] -= 1
+            if self._country_counts[country] <= 0:
+                del self._country_counts[country]
+            for key in _word_starts(country.lower()):
+                self._countries.discard(key, country)
+
+    def clear(self) -> None:
+        self._titles.clear()
+        self._ingredients.clear()
+        self._countries.clear()
+        self._recipes.clear()
+        self._ingredient_counts.clear()
+        self._country_counts.clear()
+
+    def suggest(self, prefix: str, limit: int = 5) -> Dict[str, list]:
+        """
+        Suggest titles, ingredient names and countries for a typed prefix.
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum suggestions per group
+
+        Returns:
+            Dictionary with 'titles' ({recipe_id, title}), 'ingredients' and 'countries' lists
+        """
+        self.ensure_current()
+        prefix = normalize_ingredient_term(prefix)
+        if not prefix:
+            return {'titles': [], 'ingredients': [], 'countries': []}
+
+        with self._lock:
+            titles = {}
+            for key, recipe_id in self._titles.items_with_prefix(prefix, self.MAX_SCAN):
+                title = self._recipes[recipe_id][0]
+                starts_title = normalize_ingredient_term(title).startswith(prefix)
+                rank = (not starts_title, len(title), title.lower(), -recipe_id)
+                if recipe_id not in titles or rank < titles[recipe_id]:
+                    titles[recipe_id] = rank
+
+            ingredients = {name for _, name in self._ingredients.items_with_prefix(prefix, self.MAX_SCAN)}
+            countries = {country for _, country in self._countries.items_with_prefix(prefix, self.MAX_SCAN)}
+
+            return {
+                'titles': [
+                    {'recipe_id': recipe_id, 'title': self._recipes[recipe_id][0]}
+                    for recipe_id in sorted(titles, key=titles.get)[:limit]
+                ],
+                'ingredients': sorted(
+                    ingredients, key=lambda name: (-self._ingredient_counts[name], name)
+                )[:limit],
+                'countries': sorted(
+                    countries, key=lambda country: (-self._country_counts[country], country)
+                )[:limit]
+            }
+
+
+suggestion_index = SuggestionIndex()
+
+
+def init_recipe_indexes(app) -> None:
+    """Register the session hooks that mark the indexes stale after local commits."""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(Session, 'after_flush', _note_recipe_changes)
+        event.listen(Session, 'after_commit', _mark_indexes_stale)
+        event.listen(Session, 'after_rollback', _discard_recipe_changes)
+        _listeners_registered = True
+
+
+def _note_recipe_changes(session, flush_context) -> None:
+    if any(isinstance(obj, Recipe) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info[_STALE_KEY] = True
+
+
+def _mark_indexes_stale(session) -> None:
+    if session.info.pop(_STALE_KEY, False):
+        for index in _indexes:
+            index.mark_stale()
+
+
+def _discard_recipe_changes(session) -> None:
+    session.info.pop(_STALE_KEY, None)
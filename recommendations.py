@@ -0,0 +1,263 @@
+"""
+Recipe-Room Backend - Recommendations
+
+"Recommended for you" by item-item collaborative filtering. Ratings and
+bookmarks form a sparse user x recipe matrix of interaction weights; two
+recipes are similar when the same users engaged with them (cosine
+similarity of their user columns).
+
+The similarities are computed offline by `flask rebuild-recommendations`
+(meant to run periodically, e.g. nightly) and only the top
+NEIGHBORS_PER_RECIPE of each recipe are kept in recipe_neighbors. Serving
+reads the neighbor lists of the user's most recent interactions and adds
+them up, weighted by how strongly the user engaged with each recipe.
+Ratings and bookmarks carry no timestamps, so recency follows their IDs.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from models import db, Recipe, Rating, Bookmark, recipe_neighbors
+
+# Neighbors stored per recipe
+NEIGHBORS_PER_RECIPE = 50
+# Interactions of a user read per request
+RECENT_INTERACTIONS = 50
+# Interactions of a user used by the offline build (most recent first), which
+# bounds the number of recipe pairs a single heavy user generates
+MAX_USER_INTERACTIONS = 500
+# Co-occurring pairs generated per block of users during the build
+PAIR_BLOCK_SIZE = 2000000
+BOOKMARK_WEIGHT = 1.0
+
+
+def rating_weight(rating_value: int) -> float:
+    """
+    Get the interaction weight of a rating: 0 for 1 star, 1 for 5 stars.
+
+    Args:
+        rating_value: Rating from 1 to 5
+
+    Returns:
+        Weight between 0 and 1
+    """
+    return max(0.0, min(1.0, (rating_value - 1) / 4))
+
+
+def _load_interactions() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Every rating and bookmark of a non-deleted recipe as (user_id, recipe_id, weight, sequence) arrays."""
+    rows = []
+    ratings = db.session.query(Rating.user_id, Rating.recipe_id, Rating.rating_value, Rating.id).join(
+        Recipe, Recipe.recipe_id == Rating.recipe_id
+    ).filter(Recipe.recipe_is_deleted == False)
+    for user_id, recipe_id, rating_value, sequence in ratings.yield_per(10000):
+        rows.append((user_id, recipe_id, rating_weight(rating_value), sequence))
+
+    bookmarks = db.session.query(Bookmark.user_id, Bookmark.recipe_id, Bookmark.id).join(
+        Recipe, Recipe.recipe_id == Bookmark.recipe_id
+    ).filter(Recipe.recipe_is_deleted == False)
+    for user_id, recipe_id, sequence in bookmarks.yield_per(10000):
+        rows.append((user_id, recipe_id, BOOKMARK_WEIGHT, sequence))
+
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), empty
+    users, recipes, weights, sequences = zip(*rows)
+    return (np.asarray(users, dtype=np.int64), np.asarray(recipes, dtype=np.int64),
+            np.asarray(weights, dtype=np.float64), np.asarray(sequences, dtype=np.int64))
+
+
+def _group_starts(sorted_keys: np.ndarray) -> np.ndarray:
+    """Positions where a new key begins in a sorted array."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(sorted_keys)) + 1))
+
+
+def _sum_by_key(keys: np.ndarray, values: np.ndarray, support: np.ndarray):
+    """Add up values and support counts per distinct key; returns sorted keys."""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return (unique_keys, np.bincount(inverse, values, minlength=len(unique_keys)),
+            np.bincount(inverse, support, minlength=len(unique_keys)))
+
+
+def compute_recipe_neighbors(users: np.ndarray, recipes: np.ndarray, weights: np.ndarray,
+                             sequences: np.ndarray, neighbors: int = NEIGHBORS_PER_RECIPE,
+                             min_support: int = 2):
+    """
+    Compute each recipe's most similar recipes from interaction triples.
+    The sparse matrix product X^T X is formed from the co-occurring recipe
+    pairs of every user, generated with array operations in blocks of users.
+
+    Args:
+        users: User ID per interaction
+        recipes: Recipe ID per interaction
+        weights: Interaction weight per interaction
+        sequences: Recency order per interaction (higher is newer)
+        neighbors: Neighbors kept per recipe
+        min_support: Minimum number of users shared by two recipes
+
+    Returns:
+        Tuple of (recipe_ids, neighbor_ids, scores) arrays, grouped by recipe
+        with the most similar neighbor first
+    """
+    if not len(recipes):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+
+    recipe_ids, items = np.unique(recipes, return_inverse=True)
+    _, user_positions = np.unique(users, return_inverse=True)
+    item_count = len(recipe_ids)
+
+    # One entry per (user, recipe): keep the strongest and newest interaction
+    keys = user_positions.astype(np.int64) * item_count + items
+    order = np.argsort(keys, kind='stable')
+    starts = _group_starts(keys[order])
+    keys = keys[order][starts]
+    weights = np.maximum.reduceat(weights[order], starts)
+    sequences = np.maximum.reduceat(sequences[order], starts)
+    keep = weights > 0
+    keys, weights, sequences = keys[keep], weights[keep], sequences[keep]
+    users, items = keys // item_count, keys % item_count
+
+    # Most recent MAX_USER_INTERACTIONS per user, grouped by user
+    order = np.lexsort((-sequences, users))
+    users, items, weights = users[order], items[order], weights[order]
+    user_starts = _group_starts(users)
+    ranks = np.arange(len(users)) - np.repeat(user_starts, np.diff(np.append(user_starts, len(users))))
+    keep = ranks < MAX_USER_INTERACTIONS
+    users, items, weights = users[keep], items[keep], weights[keep]
+
+    norms = np.sqrt(np.bincount(items, weights * weights, minlength=item_count))
+    _, users = np.unique(users, return_inverse=True)
+    counts = np.bincount(users)
+    entry_starts = np.concatenate(([0], np.cumsum(counts)))
+    pair_totals = np.cumsum(counts * counts)
+
+    pair_keys = np.zeros(0, dtype=np.int64)
+    dots = np.zeros(0)
+    support = np.zeros(0)
+    first = 0
+    while first < len(counts):
+        done = pair_totals[first - 1] if first else 0
+        last = max(int(np.searchsorted(pair_totals, done + PAIR_BLOCK_SIZE, side='right')), first + 1)
+
+        # Every ordered pair of entries of the same user in this block
+        entries = np.arange(entry_starts[first], entry_starts[last])
+        repeats = counts[users[entries]]
+        left = np.repeat(entries, repeats)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        right = entry_starts[users[left]] + offsets
+        distinct = left != right
+        left, right = left[distinct], right[distinct]
+
+        block_keys, block_dots, block_support = _sum_by_key(
+            items[left] * item_count + items[right], weights[left] * weights[right], np.ones(len(left))
+        )
+        pair_keys, dots, support = _sum_by_key(
+            np.concatenate((pair_keys, block_keys)), np.concatenate((dots, block_dots)),
+            np.concatenate((support, block_support))
+        )
+        first = last
+
+    keep = support >= min_support
+    pair_keys, dots = pair_keys[keep], dots[keep]
+    left, right = pair_keys // item_count, pair_keys % item_count
+    scores = dots / (norms[left] * norms[right])
+
+    # Top neighbors of each recipe
+    order = np.lexsort((recipe_ids[right], -scores, left))
+    left, right, scores = left[order], right[order], scores[order]
+    group_starts = _group_starts(left) if len(left) else np.zeros(0, dtype=np.int64)
+    ranks = np.arange(len(left)) - np.repeat(group_starts, np.diff(np.append(group_starts, len(left))))
+    keep = ranks < neighbors
+    return recipe_ids[left[keep]], recipe_ids[right[keep]], scores[keep]
+
+
+def rebuild_recommendations(batch_size: int = 5000) -> int:
+    """
+    Recompute the recipe_neighbors table from ratings and bookmarks and commit.
+
+    Args:
+        batch_size: Number of neighbor rows inserted per statement
+
+    Returns:
+        Number of recipes with at least one neighbor
+    """
+    recipe_ids, neighbor_ids, scores = compute_recipe_neighbors(*_load_interactions())
+
+    db.session.execute(recipe_neighbors.delete())
+    for start in range(0, len(recipe_ids), batch_size):
+        db.session.execute(recipe_neighbors.insert(), [
+            {'rn_recipe_id': int(recipe_id), 'rn_neighbor_id': int(neighbor_id), 'rn_score': float(score)}
+            for recipe_id, neighbor_id, score in zip(recipe_ids[start:start + batch_size],
+                                                     neighbor_ids[start:start + batch_size],
+                                                     scores[start:start + batch_size])
+        ])
+    db.session.commit()
+    return len(np.unique(recipe_ids))
+
+
+def _recent_interactions(user_id: int) -> Dict[int, float]:
+    """The user's most recent ratings and bookmarks as recipe_id -> weight."""
+    seeds: Dict[int, float] = {}
+    ratings = db.session.query(Rating.recipe_id, Rating.rating_value).filter(
+        Rating.user_id == user_id
+    ).order_by(Rating.id.desc()).limit(RECENT_INTERACTIONS)
+    for recipe_id, rating_value in ratings:
+        seeds[recipe_id] = max(seeds.get(recipe_id, 0.0), rating_weight(rating_value))
+
+    bookmarks = db.session.query(Bookmark.recipe_id).filter(
+        Bookmark.user_id == user_id
+    ).order_by(Bookmark.id.desc()).limit(RECENT_INTERACTIONS)
+    for (recipe_id,) in bookmarks:
+        seeds[recipe_id] = max(seeds.get(recipe_id, 0.0), BOOKMARK_WEIGHT)
+
+    return {recipe_id: weight for recipe_id, weight in seeds.items() if weight > 0}
+
+
+def recommend_recipes(user_id: int, limit: int = 20) -> List[Tuple[int, float]]:
+    """
+    Recommend recipes for a user from the neighbors of recently rated and
+    bookmarked recipes. Recipes the user already rated, bookmarked or owns
+    are left out.
+
+    Args:
+        user_id: ID of the user
+        limit: Maximum number of recipes to return
+
+    Returns:
+        List of (recipe_id, score), best first
+    """
+    seeds = _recent_interactions(user_id)
+    if not seeds or limit <= 0:
+        return []
+
+    scores: Dict[int, float] = defaultdict(float)
+    rows = db.session.query(
+        recipe_neighbors.c.rn_recipe_id, recipe_neighbors.c.rn_neighbor_id, recipe_neighbors.c.rn_score
+    ).filter(recipe_neighbors.c.rn_recipe_id.in_(list(seeds)))
+    for recipe_id, neighbor_id, score in rows:
+        scores[neighbor_id] += seeds[recipe_id] * score
+    if not scores:
+        return []
+
+    candidates = list(scores)
+    seen = {recipe_id for (recipe_id,) in db.session.query(Rating.recipe_id).filter(
+        Rating.user_id == user_id, Rating.recipe_id.in_(candidates)
+    )}
+    seen.update(recipe_id for (recipe_id,) in db.session.query(Bookmark.recipe_id).filter(
+        Bookmark.user_id == user_id, Bookmark.recipe_id.in_(candidates)
+    ))
+    available = {recipe_id for (recipe_id,) in db.session.query(Recipe.recipe_id).filter(
+        Recipe.recipe_id.in_(candidates),
+        Recipe.recipe_is_deleted == False,
+        Recipe.recipe_owner_id != user_id
+    )}
+
+    ranked = sorted(
+        ((recipe_id, score) for recipe_id, score in scores.items()
+         if recipe_id in available and recipe_id not in seen),
+        key=lambda item: (-item[1], -item[0])
+    )
+    return ranked[:limit]
@@ -9,10 +9,13 @@ Prefix: /api/comments
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 
 from models import Comment, Recipe, User
 from database import db
+from fieldsets import parse_fields, wants_field, load_only_for_fields
+from utils import adjust_recipe_counters, paginate_query, invalidate_counts
 
 # Setup blueprint
 comment_bp = Blueprint('comments', __name__, url_prefix='/api/comments')
@@ -23,7 +26,8 @@ def get_recipe_comments(recipe_id):
     """
     Get all comments for a specific recipe.
     Public endpoint - no authentication required
-    Query params: page, per_page
+    Query params: page, per_page, include_total (default true),
+    fields (comma-separated sparse fieldset)
     """
     try:
         # Check if recipe exists
@@ -37,6 +41,8 @@ def get_recipe_comments(recipe_id):
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        fields = parse_fields(request.args.get('fields'))
         
         # Get comments (newest first)
         comments_query = Comment.query.filter_by(
@@ -44,24 +50,27 @@ def get_recipe_comments(recipe_id):
             is_deleted=False
         ).order_by(Comment.created_at.desc())
         
-        # Paginate
-        paginated_comments = comments_query.paginate(
+        # Load only the requested columns, and the authors in one batch when wanted
+        if fields is not None:
+            comments_query = comments_query.options(load_only_for_fields(Comment, fields))
+        if wants_field(fields, 'user'):
+            comments_query = comments_query.options(selectinload(Comment.comment_user))
+        
+        # Paginate (totals are optional and served from the count cache)
+        comments, pagination = paginate_query(
+            comments_query,
             page=page,
             per_page=min(per_page, 100),
-            error_out=False
+            include_total=include_total,
+            count_key=f'recipe_comments:{recipe_id}'
         )
         
-        comments_list = [comment.to_dict() for comment in paginated_comments.items]
+        comments_list = [comment.to_dict(fields=fields) for comment in comments]
         
         return jsonify({
             'success': True,
             'comments': comments_list,
-            'pagination': {
-                'current_page': paginated_comments.page,
-                'total_pages': paginated_comments.pages,
-                'total_items': paginated_comments.total,
-                'per_page': per_page
-            }
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -118,7 +127,9 @@ def create_comment():
         )
         
         db.session.add(new_comment)
+        adjust_recipe_counters(recipe_id, comments=1)
         db.session.commit()
+        invalidate_counts(f'recipe_comments:{recipe_id}')
         
         return jsonify({
             'success': True,
@@ -235,7 +246,9 @@ def delete_comment(comment_id):
         # Soft delete
         comment.is_deleted = True
         comment.updated_at = datetime.utcnow()
+        adjust_recipe_counters(comment.recipe_id, comments=-1)
         db.session.commit()
+        invalidate_counts(f'recipe_comments:{comment.recipe_id}')
         
         return jsonify({
             'success': True,
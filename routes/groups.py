@@ -15,7 +15,11 @@ from datetime import datetime
 
 from models import RecipeGroup, Recipe, User, group_memberships, recipe_group_members
 from database import db
-from utils import upload_image_to_cloudinary, delete_image_from_cloudinary
+from fieldsets import parse_fields, load_only_for_fields
+from cache import query_cache
+from utils import (upload_image_to_cloudinary, delete_image_from_cloudinary, bulk_format_recipes,
+                   is_summary_view, apply_recipe_view, get_group_version, build_etag, latest_timestamp,
+                   not_modified_response, set_cache_validators)
 
 #setting up the blueprint
 group_bp = Blueprint('groups', __name__, url_prefix='/api/groups')
@@ -25,10 +29,12 @@ group_bp = Blueprint('groups', __name__, url_prefix='/api/groups')
 def get_user_groups():
     """
     Get all groups the current user belongs to.
+    Query params: fields (comma-separated sparse fieldset)
     Requires authentication.
     """
     try:
         current_user_id = int(get_jwt_identity())
+        fields = parse_fields(request.args.get('fields'))
         
         # Get user from database
         user = User.query.get(current_user_id)
@@ -39,10 +45,13 @@ def get_user_groups():
             }), 404
         
         # Get all groups user is a member of
-        groups = user.joined_groups.filter_by(group_is_active=True).all()
+        groups_query = user.joined_groups.filter_by(group_is_active=True)
+        if fields is not None:
+            groups_query = groups_query.options(load_only_for_fields(RecipeGroup, fields))
+        groups = groups_query.all()
         
         groups_list = [
-            group.to_dict(include_members=True, include_recipes=False) 
+            group.to_dict(include_members=True, include_recipes=False, fields=fields) 
             for group in groups
         ]
         
@@ -62,16 +71,21 @@ def get_user_groups():
 def get_group_by_id(group_id):
     """
     Get detailed information about a specific group.
+    Query params: fields (comma-separated sparse fieldset)
     User must be a member to view.
     """
     try:
         current_user_id = int(get_jwt_identity())
+        fields = parse_fields(request.args.get('fields'))
         
         # Find group
-        group = RecipeGroup.query.filter_by(
+        group_query = RecipeGroup.query.filter_by(
             group_id=group_id, 
             group_is_active=True
-        ).first()
+        )
+        if fields is not None:
+            group_query = group_query.options(load_only_for_fields(RecipeGroup, fields))
+        group = group_query.first()
         
         if not group:
             return jsonify({
@@ -87,10 +101,19 @@ def get_group_by_id(group_id):
                 'message': 'You are not a member of this group'
             }), 403
         
-        return jsonify({
+        # Answer conditional requests before serializing members and recipes
+        group_version = get_group_version(group_id)
+        etag = build_etag(*group_version)
+        last_modified = latest_timestamp(*group_version)
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+        
+        response = jsonify({
             'success': True,
-            'group': group.to_dict(include_members=True, include_recipes=True)
-        }), 200
+            'group': group.to_dict(include_members=True, include_recipes=True, fields=fields)
+        })
+        return set_cache_validators(response, etag, last_modified), 200
         
     except Exception as e:
         return jsonify({
@@ -485,6 +508,8 @@ def remove_group_member(group_id, user_id):
 def get_group_recipes(group_id):
     """
     Get all recipes associated with a group.
+    Query params: view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset)
     Must be a group member.
     """
     try:
@@ -509,18 +534,37 @@ def get_group_recipes(group_id):
                 'error': 'Permission denied'
             }), 403
         
-        # Get all recipes in this group
-        recipes = group.group_recipes.filter_by(recipe_is_deleted=False).all()
-        
-        recipes_list = [
-            recipe.to_dict(include_owner=True, include_stats=True) 
-            for recipe in recipes
-        ]
-        
-        return jsonify({
+        # Answer conditional requests before loading the recipes
+        group_version = get_group_version(group_id)
+        etag = build_etag(*group_version)
+        last_modified = latest_timestamp(*group_version)
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+        
+        # Get all recipes in this group (summary view unless view=full)
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
+        
+        def load_group_recipes():
+            recipes = apply_recipe_view(
+                Recipe.query.join(
+                    recipe_group_members, recipe_group_members.c.rgm_recipe_id == Recipe.recipe_id
+                ).filter(
+                    recipe_group_members.c.rgm_group_id == group_id,
+                    Recipe.recipe_is_deleted == False
+                ), summary, fields
+            ).all()
+            return bulk_format_recipes(recipes, include_full_details=True, summary=summary, fields=fields)
+        
+        # Cached per ETag (group version + view/fields); membership is checked above
+        recipes_list = query_cache.get_or_compute(f'group_recipes:{etag}', load_group_recipes)
+        
+        response = jsonify({
             'success': True,
             'recipes': recipes_list
-        }), 200
+        })
+        return set_cache_validators(response, etag, last_modified), 200
         
     except Exception as e:
         return jsonify({
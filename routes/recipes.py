@@ -10,21 +10,39 @@ Prefix: /api/recipes
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
 from datetime import datetime
 
 # Import models
 from models import Recipe, RecipeGroup, RecipeEditHistory, recipe_group_members, group_memberships, Rating, Bookmark
 from database import db
-from utils import validate_recipe_data, upload_image_to_cloudinary, delete_image_from_cloudinary
+from fieldsets import parse_fields, wants_field
+from cache import recipe_cache, cached_response, get_catalog_version
+from search_index import index_recipe, remove_recipe_from_index
+from search_planner import search_response
+from similar_recipes import find_similar_recipes, sync_recipe_minhash
+from recommendations import recommend_recipes
+from trending import get_trending
+from utils import (validate_recipe_data, validate_recipe_times, upload_image_to_cloudinary,
+                   delete_image_from_cloudinary, bulk_format_recipes, adjust_recipe_counters, paginate_recipes_by_cursor, encode_recipe_cursor,
+                   paginate_query, invalidate_counts, is_summary_view, apply_recipe_view,
+                   get_recipe_version, load_recipe_detail, build_etag,
+                   latest_timestamp, not_modified_response, set_cache_validators, sync_recipe_ingredient_terms,
+                   set_recipe_country, calculate_total_time, normalize_country_name, get_country_id,
+                   parse_recipe_sort, recipe_sort_order)
 #setting up the blueprint
 recipe_bp = Blueprint('recipes', __name__, url_prefix='/api/recipes')
 #recipe endpoints
 @recipe_bp.route('/', methods=['GET'])
+@cached_response
 def get_all_recipes():
     """
     Get all recipes with optional pagination.
-    Query params: page (default 1), per_page (default 20)
+    Query params: page (default 1), per_page (default 20),
+    sort (newest by default, or top_rated by Bayesian average rating),
+    cursor (keyset pagination; pass an empty cursor for the first page),
+    include_total (default true; false skips the total count),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset, e.g. title,stats.average_rating)
     Public endpoint - no authentication required
     """
     try:
@@ -32,39 +50,77 @@ def get_all_recipes():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        
         # Ensure reasonable limits
         per_page = min(per_page, 100)  # Max 100 items per page
         
-        # Query non-deleted recipes, ordered by creation date (newest first)
-        recipes_query = Recipe.query.filter_by(recipe_is_deleted=False).order_by(
-            Recipe.recipe_created_at.desc()
-        )
+        try:
+            sort = parse_recipe_sort(request.args.get('sort'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        # Feed cards use the summary view unless view=full or fields= is requested
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
+        
+        # Answer conditional requests from the catalog version before querying the page
+        etag = build_etag(get_catalog_version())
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
         
-        # Paginate results
-        paginated_recipes = recipes_query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
+        # Query non-deleted recipes
+        recipes_query = apply_recipe_view(Recipe.query.filter_by(recipe_is_deleted=False), summary, fields)
+        
+        # Cursor mode: seek past the last seen recipe, no OFFSET and no COUNT
+        if 'cursor' in request.args:
+            try:
+                recipes, next_cursor = paginate_recipes_by_cursor(
+                    recipes_query, request.args.get('cursor'), per_page, sort
+                )
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+            
+            response = jsonify({
+                'success': True,
+                'recipes': bulk_format_recipes(recipes, include_full_details=True, summary=summary, fields=fields),
+                'pagination': {
+                    'per_page': per_page,
+                    'has_next': next_cursor is not None,
+                    'next_cursor': next_cursor
+                }
+            })
+            return set_cache_validators(response, etag), 200
+        
+        # Ordered by creation date (newest first) or Bayesian rating
+        recipes_query = recipes_query.order_by(*recipe_sort_order(sort))
+        
+        # Paginate results (totals are optional and served from the count cache)
+        recipes, pagination = paginate_query(
+            recipes_query,
+            page=page,
+            per_page=per_page,
+            include_total=include_total,
+            count_key='recipes'
         )
+        pagination['next_cursor'] = encode_recipe_cursor(recipes[-1], sort) if pagination['has_next'] else None
         
-        # Convert to dict
-        recipes_list = [
-            recipe.to_dict(include_owner=True, include_stats=True) 
-            for recipe in paginated_recipes.items
-        ]
+        # Convert to dict (owners are loaded for the whole page at once)
+        recipes_list = bulk_format_recipes(recipes, include_full_details=True, summary=summary, fields=fields)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'recipes': recipes_list,
-            'pagination': {
-                'current_page': paginated_recipes.page,
-                'total_pages': paginated_recipes.pages,
-                'total_items': paginated_recipes.total,
-                'per_page': per_page,
-                'has_next': paginated_recipes.has_next,
-                'has_prev': paginated_recipes.has_prev
-            }
-        }), 200
+            'pagination': pagination
+        })
+        return set_cache_validators(response, etag), 200
         
     except Exception as e:
         return jsonify({
@@ -76,26 +132,63 @@ def get_all_recipes():
 def get_recipe_by_id(recipe_id):
     """
     Get a single recipe by ID.
+    Query params: fields (comma-separated sparse fieldset)
     Public endpoint - no authentication required
     """
     try:
-        # Find recipe
-        recipe = Recipe.query.filter_by(
-            recipe_id=recipe_id, 
-            recipe_is_deleted=False
-        ).first()
+        fields = parse_fields(request.args.get('fields'))
         
-        if not recipe:
+        # One lightweight version lookup decides whether the body is needed at all
+        version = get_recipe_version(recipe_id)
+        if not version:
             return jsonify({
                 'success': False,
                 'error': 'Recipe not found'
             }), 404
         
+        etag = build_etag(*version)
+        last_modified = latest_timestamp(version[0], version[1])
+        not_modified = not_modified_response(etag, last_modified)
+        if not_modified:
+            return not_modified
+        
+        if fields is None:
+            # The default representation comes from the recipe detail cache;
+            # concurrent misses share one rebuild, expired entries are served
+            # while they refresh in the background, and entries whose version
+            # no longer matches are rebuilt (another worker's write does not
+            # invalidate this worker's in-process cache)
+            detail = recipe_cache.get_or_compute(
+                recipe_id, lambda: load_recipe_detail(recipe_id),
+                validate=lambda cached: cached['version'] == tuple(version)
+            )
+            if not detail:
+                return jsonify({
+                    'success': False,
+                    'error': 'Recipe not found'
+                }), 404
+            recipe_data = detail['recipe']
+        else:
+            # Find recipe
+            recipe = apply_recipe_view(Recipe.query.filter_by(
+                recipe_id=recipe_id, 
+                recipe_is_deleted=False
+            ), summary=False, fields=fields).first()
+            
+            if not recipe:
+                return jsonify({
+                    'success': False,
+                    'error': 'Recipe not found'
+                }), 404
+            
+            recipe_data = recipe.to_dict(include_owner=True, include_stats=True, fields=fields)
+        
         # Return detailed recipe info
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'recipe': recipe.to_dict(include_owner=True, include_stats=True)
-        }), 200
+            'recipe': recipe_data
+        })
+        return set_cache_validators(response, etag, last_modified), 200
         
     except Exception as e:
         return jsonify({
@@ -145,7 +238,6 @@ def create_recipe():
         new_recipe = Recipe(
             recipe_title=data['title'],
             recipe_description=data.get('description'),
-            recipe_country=data.get('country'),
             recipe_ingredients=data['ingredients'],
             recipe_procedure=data['procedure'],
             recipe_people_served=data['people_served'],
@@ -155,8 +247,14 @@ def create_recipe():
             recipe_image_public_id=image_public_id,
             recipe_owner_id=current_user_id
         )
+        new_recipe.recipe_total_time = calculate_total_time(new_recipe.recipe_prep_time, new_recipe.recipe_cook_time)
+        set_recipe_country(new_recipe, data.get('country'))
                 # Add to database
         db.session.add(new_recipe)
+        db.session.flush()
+        index_recipe(new_recipe)
+        sync_recipe_ingredient_terms(new_recipe)
+        sync_recipe_minhash(new_recipe)
         db.session.commit()
         
         # Log the creation in edit history
@@ -168,6 +266,7 @@ def create_recipe():
         )
         db.session.add(edit_log)
         db.session.commit()
+        invalidate_counts('recipes', f'user_recipes:{current_user_id}')
         
         return jsonify({
             'success': True,
@@ -229,11 +328,19 @@ def update_recipe(recipe_id):
         data = request.get_json()
         changes = {}  # Track what was changed for edit history
         
+        # Times feed the stored total time, so they must be numbers
+        validation_error = validate_recipe_times(data)
+        if validation_error:
+            return jsonify({
+                'success': False,
+                'error': 'Validation failed',
+                'message': validation_error
+            }), 400
+        
         # Update allowed fields
         updateable_fields = {
             'title': 'recipe_title',
             'description': 'recipe_description',
-            'country': 'recipe_country',
             'ingredients': 'recipe_ingredients',
             'procedure': 'recipe_procedure',
             'people_served': 'recipe_people_served',
@@ -249,6 +356,15 @@ def update_recipe(recipe_id):
                     setattr(recipe, model_field, new_value)
                     changes[json_field] = {'old': old_value, 'new': new_value}
         
+        recipe.recipe_total_time = calculate_total_time(recipe.recipe_prep_time, recipe.recipe_cook_time)
+        
+        # Countries are stored canonicalized and linked to the countries table
+        if 'country' in data:
+            old_value = recipe.recipe_country
+            set_recipe_country(recipe, data['country'])
+            if recipe.recipe_country != old_value:
+                changes['country'] = {'old': old_value, 'new': recipe.recipe_country}
+        
         # Handle image update
         if 'image' in data and data['image']:
             try:
@@ -269,6 +385,9 @@ def update_recipe(recipe_id):
         
         # Update timestamp
         recipe.recipe_updated_at = datetime.utcnow()
+        index_recipe(recipe)
+        sync_recipe_ingredient_terms(recipe)
+        sync_recipe_minhash(recipe)
         
         # Commit changes
         db.session.commit()
@@ -339,6 +458,9 @@ def delete_recipe(recipe_id):
         # Soft delete (set flag instead of actually deleting)
         recipe.recipe_is_deleted = True
         recipe.recipe_updated_at = datetime.utcnow()
+        remove_recipe_from_index(recipe.recipe_id)
+        sync_recipe_ingredient_terms(recipe)
+        sync_recipe_minhash(recipe)
         
         # Log deletion
         edit_log = RecipeEditHistory(
@@ -350,6 +472,7 @@ def delete_recipe(recipe_id):
         db.session.add(edit_log)
         
         db.session.commit()
+        invalidate_counts('recipes', f'user_recipes:{current_user_id}')
         
         return jsonify({
             'success': True,
@@ -374,40 +497,76 @@ def delete_recipe(recipe_id):
 def get_recipes_by_user(user_id):
     """
     Get all recipes created by a specific user.
+    Query params: page, per_page, cursor (keyset pagination),
+    include_total (default true; false skips the total count),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset, e.g. title,stats.average_rating)
     Public endpoint.
     """
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)  # Max 100 items per page
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
+        
+        # Answer conditional requests from the catalog version before querying the page
+        etag = build_etag(get_catalog_version())
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
         
         # Query user's recipes
-        recipes_query = Recipe.query.filter_by(
+        recipes_query = apply_recipe_view(Recipe.query.filter_by(
             recipe_owner_id=user_id,
             recipe_is_deleted=False
-        ).order_by(Recipe.recipe_created_at.desc())
+        ), summary, fields)
         
-        # Paginate
-        paginated_recipes = recipes_query.paginate(
-            page=page, 
-            per_page=min(per_page, 100), 
-            error_out=False
+        # Cursor mode: seek past the last seen recipe, no OFFSET and no COUNT
+        if 'cursor' in request.args:
+            try:
+                recipes, next_cursor = paginate_recipes_by_cursor(
+                    recipes_query, request.args.get('cursor'), per_page
+                )
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+            
+            response = jsonify({
+                'success': True,
+                'recipes': bulk_format_recipes(recipes, include_full_details=True, summary=summary, fields=fields),
+                'pagination': {
+                    'per_page': per_page,
+                    'has_next': next_cursor is not None,
+                    'next_cursor': next_cursor
+                }
+            })
+            return set_cache_validators(response, etag), 200
+        
+        # Paginate (totals are optional and served from the count cache)
+        recipes, pagination = paginate_query(
+            recipes_query.order_by(
+                Recipe.recipe_created_at.desc(),
+                Recipe.recipe_id.desc()
+            ),
+            page=page,
+            per_page=per_page,
+            include_total=include_total,
+            count_key=f'user_recipes:{user_id}'
         )
+        pagination['next_cursor'] = encode_recipe_cursor(recipes[-1]) if pagination['has_next'] else None
         
-        recipes_list = [
-            recipe.to_dict(include_owner=True, include_stats=True) 
-            for recipe in paginated_recipes.items
-        ]
+        recipes_list = bulk_format_recipes(recipes, include_full_details=True, summary=summary, fields=fields)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'recipes': recipes_list,
-            'pagination': {
-                'current_page': paginated_recipes.page,
-                'total_pages': paginated_recipes.pages,
-                'total_items': paginated_recipes.total,
-                'per_page': per_page
-            }
-        }), 200
+            'pagination': pagination
+        })
+        return set_cache_validators(response, etag), 200
         
     except Exception as e:
         return jsonify({
@@ -473,47 +632,187 @@ def get_recipe_edit_history(recipe_id):
 
 # Additional endpoints for discover, rating, and bookmarks
 @recipe_bp.route('/discover', methods=['GET'])
+@cached_response
 def discover_recipes():
     """
     Discover recipes with optional filters.
-    Query params: name, ingredient, people_served, country, rating
+    Takes the same query params as /api/search/recipes (see search_planner):
+    q, name, ingredient, ingredients, exclude, match (all|any), people_served,
+    country, rating, min_total_time, max_total_time, max_prep_time, fuzzy,
+    similarity, describe, sort, facets, limit (default 20, max 100), cursor, view and fields
+    Public endpoint - no authentication required
+    """
+    return search_response('Failed to discover recipes')
+
+@recipe_bp.route('/<int:recipe_id>/similar', methods=['GET'])
+@cached_response
+def get_similar_recipes(recipe_id):
+    """
+    Get the recipes with the most similar ingredient sets, ranked by
+    estimated Jaccard similarity (MinHash/LSH, see similar_recipes).
+    Query params: limit (default 10, max 50),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset)
     Public endpoint - no authentication required
     """
     try:
-        query = Recipe.query.filter_by(recipe_is_deleted=False)
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a number'
+            }), 400
         
-        # Filter by name
-        if name := request.args.get('name'):
-            query = query.filter(Recipe.recipe_title.ilike(f'%{name}%'))
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
         
-        # Filter by ingredient
-        if ingredient := request.args.get('ingredient'):
-            query = query.filter(Recipe.recipe_ingredients.ilike(f'%{ingredient}%'))
+        recipe = Recipe.query.filter_by(recipe_id=recipe_id, recipe_is_deleted=False).first()
+        if not recipe:
+            return jsonify({
+                'success': False,
+                'error': 'Recipe not found'
+            }), 404
+        
+        matches = find_similar_recipes(recipe, limit=limit)
+        
+        # Load the matches in one query and keep the similarity order
+        recipes = apply_recipe_view(Recipe.query.filter(
+            Recipe.recipe_id.in_([match_id for match_id, _ in matches]),
+            Recipe.recipe_is_deleted == False
+        ), summary, fields).all()
+        recipes_by_id = {similar.recipe_id: similar for similar in recipes}
+        matches = [match for match in matches if match[0] in recipes_by_id]
+        
+        recipes_list = bulk_format_recipes([recipes_by_id[match_id] for match_id, _ in matches],
+                                           include_full_details=True, summary=summary, fields=fields)
+        if wants_field(fields, 'similarity'):
+            for recipe_data, (_, similarity) in zip(recipes_list, matches):
+                recipe_data['similarity'] = round(similarity, 4)
+        
+        return jsonify({
+            'success': True,
+            'recipe_id': recipe_id,
+            'count': len(recipes_list),
+            'recipes': recipes_list
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Failed to find similar recipes',
+            'message': str(e)
+        }), 500
+
+@recipe_bp.route('/trending', methods=['GET'])
+@cached_response
+def get_trending_recipes():
+    """
+    Get the recipes with the most recent ratings, bookmarks and comments,
+    weighted with exponential time decay (precomputed, see trending).
+    Query params: country (trending in one country), limit (default 20, max 100),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset)
+    Public endpoint - no authentication required
+    """
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a number'
+            }), 400
+        
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
+        
+        country = normalize_country_name(request.args.get('country'))
+        if country:
+            country_id = get_country_id(country)
+            matches = get_trending(limit, country_id) if country_id else []
+        else:
+            matches = get_trending(limit)
+        
+        # Load the trending recipes in one query and keep the ranking order
+        recipes = apply_recipe_view(Recipe.query.filter(
+            Recipe.recipe_id.in_([match_id for match_id, _ in matches]),
+            Recipe.recipe_is_deleted == False
+        ), summary, fields).all()
+        recipes_by_id = {trending.recipe_id: trending for trending in recipes}
+        matches = [match for match in matches if match[0] in recipes_by_id]
+        
+        recipes_list = bulk_format_recipes([recipes_by_id[match_id] for match_id, _ in matches],
+                                           include_full_details=True, summary=summary, fields=fields)
+        if wants_field(fields, 'trending_score'):
+            for recipe_data, (_, score) in zip(recipes_list, matches):
+                recipe_data['trending_score'] = round(score, 4)
+        
+        return jsonify({
+            'success': True,
+            'country': country,
+            'count': len(recipes_list),
+            'recipes': recipes_list
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Failed to retrieve trending recipes',
+            'message': str(e)
+        }), 500
+
+@recipe_bp.route('/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_recipes():
+    """
+    "Recommended for you": recipes liked by the users who rated or bookmarked
+    the same recipes as the current user (see recommendations).
+    Query params: limit (default 20, max 100),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset)
+    Requires authentication.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a number'
+            }), 400
         
-        # Filter by people served
-        if people := request.args.get('people_served'):
-            query = query.filter(Recipe.recipe_people_served == int(people))
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
         
-        # Filter by country
-        if country := request.args.get('country'):
-            query = query.filter(Recipe.recipe_country == country)
+        matches = recommend_recipes(user_id, limit=limit)
         
-        # Filter by rating
-        if rating := request.args.get('rating'):
-            query = query.join(Rating).group_by(Recipe.recipe_id).having(func.avg(Rating.rating_value) >= float(rating))
+        # Load the recommendations in one query and keep the ranking order
+        recipes = apply_recipe_view(Recipe.query.filter(
+            Recipe.recipe_id.in_([match_id for match_id, _ in matches]),
+            Recipe.recipe_is_deleted == False
+        ), summary, fields).all()
+        recipes_by_id = {recommended.recipe_id: recommended for recommended in recipes}
+        matches = [match for match in matches if match[0] in recipes_by_id]
         
-        # Order by newest first
-        recipes = query.order_by(Recipe.recipe_created_at.desc()).all()
+        recipes_list = bulk_format_recipes([recipes_by_id[match_id] for match_id, _ in matches],
+                                           include_full_details=True, summary=summary, fields=fields)
+        if wants_field(fields, 'recommendation_score'):
+            for recipe_data, (_, score) in zip(recipes_list, matches):
+                recipe_data['recommendation_score'] = round(score, 4)
         
         return jsonify({
             'success': True,
-            'recipes': [recipe.to_dict(include_owner=True, include_stats=True) for recipe in recipes]
+            'count': len(recipes_list),
+            'recipes': recipes_list
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': 'Failed to discover recipes',
+            'error': 'Failed to load recommendations',
             'message': str(e)
         }), 500
 
@@ -547,10 +846,12 @@ def rate_recipe(recipe_id):
         # Check if rating exists
         rating = Rating.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
         if rating:
+            adjust_recipe_counters(recipe_id, rating_sum=value - rating.rating_value)
             rating.rating_value = value
         else:
             rating = Rating(user_id=user_id, recipe_id=recipe_id, rating_value=value)
             db.session.add(rating)
+            adjust_recipe_counters(recipe_id, rating_sum=value, rating_count=1)
         
         db.session.commit()
         
@@ -575,6 +876,7 @@ def rate_recipe(recipe_id):
         }), 500
 
 @recipe_bp.route('/<int:recipe_id>/rating', methods=['GET'])
+@cached_response
 def get_recipe_rating(recipe_id):
     """
     Get average rating for a recipe.
@@ -589,13 +891,13 @@ def get_recipe_rating(recipe_id):
                 'error': 'Recipe not found'
             }), 404
         
-        # Calculate average rating
-        avg = db.session.query(func.avg(Rating.rating_value)).filter(Rating.recipe_id == recipe_id).scalar()
-        count = Rating.query.filter_by(recipe_id=recipe_id).count()
+        # Average rating comes from the recipe's counter columns
+        count = recipe.recipe_rating_count
+        avg = recipe.recipe_rating_sum / count if count else 0
         
         return jsonify({
             'success': True,
-            'average': round(avg or 0, 1),
+            'average': round(avg, 1),
             'count': count
         }), 200
         
@@ -635,6 +937,7 @@ def bookmark_recipe(recipe_id):
         # Create bookmark
         bookmark = Bookmark(user_id=user_id, recipe_id=recipe_id)
         db.session.add(bookmark)
+        adjust_recipe_counters(recipe_id, bookmarks=1)
         db.session.commit()
         
         return jsonify({
@@ -671,6 +974,7 @@ def remove_bookmark(recipe_id):
         deleted = Bookmark.query.filter_by(user_id=user_id, recipe_id=recipe_id).delete()
         
         if deleted:
+            adjust_recipe_counters(recipe_id, bookmarks=-deleted)
             db.session.commit()
             return jsonify({
                 'success': True,
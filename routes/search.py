@@ -7,56 +7,144 @@ Prefix: /api/search
 """
 
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
-from models import db, Recipe, Rating
+from models import Recipe
+from fieldsets import parse_fields, wants_field, subfields, project_fields
+from cache import cached_response
+from search_planner import search_response
+from pantry import get_pantry_index
+from recipe_indexes import suggestion_index
+from utils import bulk_format_recipes, parse_ingredient_terms, is_summary_view, apply_recipe_view
 
 search_bp = Blueprint('search', __name__)
 
+# Largest pantry accepted by the pantry endpoint
+MAX_PANTRY_ITEMS = 100
+
 @search_bp.route('/recipes', methods=['GET'])
+@cached_response
 def search_recipes():
     """
     Search recipes with various filters.
-    Query params: name, ingredient, people_served, country, rating
+    Query params: q (full-text over all fields), name, ingredient, ingredients, exclude,
+    match (all|any), people_served, country, rating,
+    min_total_time, max_total_time, max_prep_time (minutes),
+    fuzzy (typo-tolerant title match on name or q), similarity (fuzzy threshold, 0-1),
+    describe (rank q by TF-IDF similarity to descriptions and procedures),
+    sort (relevance by default, newest, or top_rated by Bayesian average rating),
+    facets (include counts per country, people served, total time and rating for the filters),
+    limit (default 20, max 100), cursor (next_cursor of the previous page),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset, e.g. title,stats.average_rating)
+    Public endpoint - no authentication required
+    """
+    return search_response('Search failed')
+
+
+@search_bp.route('/pantry', methods=['GET'])
+def pantry_recipes():
+    """
+    "What can I cook": rank recipes by the fraction of their ingredients
+    found in the user's pantry, listing what is missing for each.
+    Query params: ingredients (comma-separated pantry items, required),
+    limit (default 20, max 100), min_coverage (0-1, default 0),
+    view (summary by default; full includes ingredients and procedure),
+    fields (comma-separated sparse fieldset)
     Public endpoint - no authentication required
     """
     try:
-        query = Recipe.query.filter_by(recipe_is_deleted=False)
+        pantry = parse_ingredient_terms(request.args.get('ingredients'))
+        if not pantry:
+            return jsonify({
+                'success': False,
+                'error': 'ingredients is required'
+            }), 400
+        if len(pantry) > MAX_PANTRY_ITEMS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_PANTRY_ITEMS} pantry ingredients are allowed'
+            }), 400
         
-        # Filter by name (searches in title)
-        if name := request.args.get('name'):
-            query = query.filter(Recipe.recipe_title.ilike(f'%{name}%'))
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+            min_coverage = float(request.args.get('min_coverage', 0))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit and min_coverage must be numbers'
+            }), 400
         
-        # Filter by ingredient
-        if ingredient := request.args.get('ingredient'):
-            query = query.filter(Recipe.recipe_ingredients.ilike(f'%{ingredient}%'))
+        fields = parse_fields(request.args.get('fields'))
+        summary = is_summary_view(request.args.get('view'), fields)
         
-        # Filter by people served
-        if people := request.args.get('people_served'):
-            query = query.filter(Recipe.recipe_people_served == int(people))
+        matches = get_pantry_index().match(pantry, limit=limit, min_coverage=min_coverage)
         
-        # Filter by country
-        if country := request.args.get('country'):
-            query = query.filter(Recipe.recipe_country == country)
+        # Load the ranked recipes in one query and keep the ranking order
+        recipes = apply_recipe_view(Recipe.query.filter(
+            Recipe.recipe_id.in_([match['recipe_id'] for match in matches]),
+            Recipe.recipe_is_deleted == False
+        ), summary, fields).all()
+        recipes_by_id = {recipe.recipe_id: recipe for recipe in recipes}
+        matches = [match for match in matches if match['recipe_id'] in recipes_by_id]
         
-        # Filter by minimum rating
-        if rating := request.args.get('rating'):
-            query = query.join(Rating).group_by(Recipe.recipe_id).having(
-                func.avg(Rating.rating_value) >= float(rating)
-            )
-        
-        # Order by newest first
-        recipes = query.order_by(Recipe.recipe_created_at.desc()).all()
+        recipes_list = bulk_format_recipes([recipes_by_id[match['recipe_id']] for match in matches],
+                                           include_full_details=True, summary=summary, fields=fields)
+        if wants_field(fields, 'pantry_match'):
+            for recipe_data, match in zip(recipes_list, matches):
+                recipe_data['pantry_match'] = project_fields({
+                    'coverage': match['coverage'],
+                    'matched_count': match['matched_count'],
+                    'ingredients_count': match['ingredients_count'],
+                    'missing_ingredients': match['missing_ingredients']
+                }, subfields(fields, 'pantry_match'))
         
         return jsonify({
             'success': True,
-            'count': len(recipes),
-            'recipes': [recipe.to_dict(include_owner=True, include_stats=True) for recipe in recipes]
+            'count': len(recipes_list),
+            'recipes': recipes_list
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': 'Search failed',
+            'error': 'Pantry search failed',
             'message': str(e)
         }), 500
 
+
+@search_bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Search-as-you-type suggestions: recipe titles, ingredient names and
+    countries starting with (a word starting with) the typed prefix.
+    Served from the per-worker in-memory suggestion index.
+    Query params: q (prefix, required), limit (per group, default 5, max 20)
+    Public endpoint - no authentication required
+    """
+    try:
+        prefix = request.args.get('q', '').strip()
+        if not prefix:
+            return jsonify({
+                'success': False,
+                'error': 'q is required'
+            }), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 5)), 1), 20)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a number'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'query': prefix,
+            'suggestions': suggestion_index.suggest(prefix, limit)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': 'Suggestions failed',
+            'message': str(e)
+        }), 500
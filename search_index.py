@@ -0,0 +1,348 @@
+"""
+Recipe-Room Backend - Full-Text Search Index
+
+Relevance-ranked full-text search over recipe title, ingredients,
+description and procedure.
+- PostgreSQL: a weighted `recipe_search_vector` tsvector column with a GIN
+  index, ranked with ts_rank_cd and highlighted with ts_headline.
+- SQLite: an FTS5 virtual table (`recipes_fts`, rowid = recipe_id), ranked
+  with bm25 and highlighted with snippet().
+Other databases (or SQLite builds without FTS5) fall back to ILIKE filters.
+
+Fuzzy title search uses pg_trgm similarity with a GIN trigram index on
+recipe_title in PostgreSQL, and the in-process trigram index from
+recipe_indexes elsewhere.
+
+The index is written in the same transaction as the recipe change;
+`flask rebuild-search-index` backfills it.
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, String, case, func, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from models import db, Recipe
+from cache import bump_catalog_version
+from recipe_indexes import title_trigram_index
+
+# Highlight markers used in snippets
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+
+# Indexed fields in weight order: A (title) .. D (procedure)
+_FTS5_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+_TOKEN_PATTERN = re.compile(r'[^\W_]+', re.UNICODE)
+
+# 'postgresql', 'sqlite' or None when full-text search is unavailable
+_backend: Optional[str] = None
+# 'postgresql' (pg_trgm) or 'memory' (in-process trigram index)
+_trigram_backend = 'memory'
+
+
+def ensure_search_index() -> None:
+    """
+    Create the full-text index structures for the current database if they
+    are missing, backfilling them when they were just created.
+    Must run inside an app context, after db.create_all().
+    """
+    global _backend, _trigram_backend
+    dialect = db.engine.dialect.name
+    created = False
+
+    if dialect == 'postgresql':
+        with db.engine.begin() as conn:
+            created = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'recipes' AND column_name = 'recipe_search_vector'"
+            )).first() is None
+            conn.execute(text('ALTER TABLE recipes ADD COLUMN IF NOT EXISTS recipe_search_vector tsvector'))
+            conn.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_recipes_search_vector '
+                'ON recipes USING GIN (recipe_search_vector)'
+            ))
+        _backend = 'postgresql'
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                conn.execute(text(
+                    'CREATE INDEX IF NOT EXISTS ix_recipes_title_trgm '
+                    'ON recipes USING GIN (recipe_title gin_trgm_ops)'
+                ))
+            _trigram_backend = 'postgresql'
+        except DBAPIError:
+            # pg_trgm not installable by this role: use the in-process index
+            _trigram_backend = 'memory'
+    elif dialect == 'sqlite':
+        try:
+            with db.engine.begin() as conn:
+                created = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'recipes_fts'"
+                )).first() is None
+                conn.execute(text(
+                    'CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5('
+                    "title, ingredients, description, procedure, tokenize='porter unicode61')"
+                ))
+            _backend = 'sqlite'
+        except OperationalError:
+            # SQLite compiled without FTS5
+            _backend = None
+    else:
+        _backend = None
+
+    if created and _backend:
+        rebuild_search_index()
+
+
+def is_search_index_available() -> bool:
+    """Check whether ranked full-text search is available."""
+    return _backend is not None
+
+
+def _flatten_text(value: Any) -> str:
+    """Join every string inside a JSON value (e.g. ingredient names and quantities)."""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ' '.join(_flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_flatten_text(item) for item in value)
+    return ''
+
+
+def recipe_document(recipe: Recipe) -> dict:
+    """
+    Get the indexed text of a recipe.
+
+    Args:
+        recipe: Recipe object
+
+    Returns:
+        Dictionary of title, ingredients, description and procedure text
+    """
+    return {
+        'title': recipe.recipe_title or '',
+        'ingredients': _flatten_text(recipe.recipe_ingredients),
+        'description': recipe.recipe_description or '',
+        'procedure': _flatten_text(recipe.recipe_procedure)
+    }
+
+
+def index_recipe(recipe: Recipe) -> None:
+    """
+    Add or refresh a recipe in the search index within the current
+    transaction. Soft-deleted recipes are removed instead.
+    The recipe must have been flushed so it has an ID.
+
+    Args:
+        recipe: Recipe object
+    """
+    if recipe.recipe_is_deleted:
+        remove_recipe_from_index(recipe.recipe_id)
+        return
+
+    params = dict(recipe_document(recipe), recipe_id=recipe.recipe_id)
+    if _backend == 'postgresql':
+        db.session.execute(text(
+            "UPDATE recipes SET recipe_search_vector = "
+            "setweight(to_tsvector('english', :title), 'A') || "
+            "setweight(to_tsvector('english', :ingredients), 'B') || "
+            "setweight(to_tsvector('english', :description), 'C') || "
+            "setweight(to_tsvector('english', :procedure), 'D') "
+            "WHERE recipe_id = :recipe_id"
+        ), params)
+    elif _backend == 'sqlite':
+        db.session.execute(text('DELETE FROM recipes_fts WHERE rowid = :recipe_id'), params)
+        db.session.execute(text(
+            'INSERT INTO recipes_fts (rowid, title, ingredients, description, procedure) '
+            'VALUES (:recipe_id, :title, :ingredients, :description, :procedure)'
+        ), params)
+
+
+def remove_recipe_from_index(recipe_id: int) -> None:
+    """
+    Remove a recipe from the search index within the current transaction.
+
+    Args:
+        recipe_id: ID of the recipe
+    """
+    if _backend == 'postgresql':
+        db.session.execute(text(
+            'UPDATE recipes SET recipe_search_vector = NULL WHERE recipe_id = :recipe_id'
+        ), {'recipe_id': recipe_id})
+    elif _backend == 'sqlite':
+        db.session.execute(text('DELETE FROM recipes_fts WHERE rowid = :recipe_id'),
+                           {'recipe_id': recipe_id})
+
+
+def rebuild_search_index(batch_size: int = 500) -> int:
+    """
+    Rebuild the search index for every non-deleted recipe and commit.
+
+    Args:
+        batch_size: Number of recipes loaded per batch
+
+    Returns:
+        Number of recipes indexed
+    """
+    if _backend is None:
+        return 0
+
+    if _backend == 'postgresql':
+        db.session.execute(text('UPDATE recipes SET recipe_search_vector = NULL'))
+    else:
+        db.session.execute(text('DELETE FROM recipes_fts'))
+
+    indexed = 0
+    last_id = 0
+    while True:
+        recipes = Recipe.query.filter(
+            Recipe.recipe_is_deleted == False,
+            Recipe.recipe_id > last_id
+        ).order_by(Recipe.recipe_id).limit(batch_size).all()
+        if not recipes:
+            break
+        for recipe in recipes:
+            index_recipe(recipe)
+        indexed += len(recipes)
+        last_id = recipes[-1].recipe_id
+
+    bump_catalog_version(db.session)
+    db.session.commit()
+    return indexed
+
+
+def _terms(raw: Optional[str]) -> List[str]:
+    """Split user input into plain word tokens (no query operators)."""
+    return _TOKEN_PATTERN.findall(raw or '')
+
+
+def _build_match(text_query: Optional[str], title: Optional[str]) -> Optional[str]:
+    """
+    Build a backend-specific match expression. Every term must match and is
+    treated as a prefix; title terms are restricted to the title.
+    """
+    groups = [(None, _terms(text_query)), ('title', _terms(title))]
+    if not any(terms for _, terms in groups):
+        return None
+
+    if _backend == 'postgresql':
+        weights = {None: '', 'title': 'A'}
+        return ' & '.join(
+            f"{term.lower()}:*{weights[column]}" for column, terms in groups for term in terms
+        )
+
+    clauses = []
+    for column, terms in groups:
+        if not terms:
+            continue
+        expression = ' AND '.join(f'"{term}"*' for term in terms)
+        clauses.append(f'{column} : ({expression})' if column else f'({expression})')
+    return ' AND '.join(clauses)
+
+
+def is_ranked_text_search(text_query: Optional[str] = None, title: Optional[str] = None) -> bool:
+    """
+    Check whether apply_text_search() ranks a query: a full-text index is
+    available and the input contains at least one word (punctuation-only
+    input has nothing to match and falls back to the unranked filters).
+    """
+    return _backend is not None and _build_match(text_query, title) is not None
+
+
+def _match_subquery(match: str):
+    """Selectable of (recipe_id, rank, snippet) for matching recipes; higher rank is better."""
+    if _backend == 'postgresql':
+        statement = text(
+            "SELECT r.recipe_id AS recipe_id, "
+            "ts_rank_cd(r.recipe_search_vector, q) AS rank, "
+            "ts_headline('english', r.recipe_title || ' ' || coalesce(r.recipe_description, ''), q, "
+            f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MinWords=8, MaxWords=24') AS snippet "
+            "FROM recipes r, to_tsquery('english', :match) q "
+            "WHERE r.recipe_search_vector @@ q"
+        )
+    else:
+        weights = ', '.join(str(weight) for weight in _FTS5_WEIGHTS)
+        statement = text(
+            "SELECT rowid AS recipe_id, "
+            f"-bm25(recipes_fts, {weights}) AS rank, "
+            f"snippet(recipes_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) AS snippet "
+            "FROM recipes_fts WHERE recipes_fts MATCH :match"
+        )
+    return statement.bindparams(match=match).columns(
+        recipe_id=Integer, rank=Float, snippet=String
+    ).subquery('search_matches')
+
+
+def apply_text_search(query, text_query: Optional[str] = None,
+                      title: Optional[str] = None) -> Tuple[Any, bool]:
+    """
+    Filter a Recipe query by free text and title terms.
+    With a full-text index the query is joined to the ranked matches and
+    yields (Recipe, snippet) rows ordered by relevance; otherwise ILIKE
+    filters are applied and the query still yields Recipe objects.
+
+    Args:
+        query: Recipe query to filter
+        text_query: Free text matched against all indexed fields
+        title: Terms matched against the title only
+
+    Returns:
+        Tuple of (query, ranked) where ranked tells which row shape applies
+    """
+    if is_ranked_text_search(text_query, title):
+        matches = _match_subquery(_build_match(text_query, title))
+        query = query.join(matches, matches.c.recipe_id == Recipe.recipe_id).add_columns(
+            matches.c.snippet
+        ).order_by(matches.c.rank.desc(), Recipe.recipe_id.desc())
+        return query, True
+
+    if text_query:
+        pattern = f'%{text_query}%'
+        query = query.filter(db.or_(
+            Recipe.recipe_title.ilike(pattern),
+            Recipe.recipe_description.ilike(pattern)
+        ))
+    if title:
+        query = query.filter(Recipe.recipe_title.ilike(f'%{title}%'))
+    return query, False
+
+
+def apply_fuzzy_title_search(query, title: Optional[str], threshold: float,
+                             max_candidates: int = 500):
+    """
+    Filter a Recipe query to titles similar to a (possibly misspelled)
+    string and order it by similarity. The query yields (Recipe, similarity)
+    rows. PostgreSQL uses the pg_trgm % operator, which the GIN trigram index
+    serves; elsewhere the in-process trigram index picks the candidates.
+
+    Args:
+        query: Recipe query to filter
+        title: Text to match against titles
+        threshold: Minimum trigram similarity (0-1)
+        max_candidates: Most matches considered by the in-process index
+
+    Returns:
+        Filtered and ordered query
+    """
+    if _trigram_backend == 'postgresql':
+        # Threshold for the % operator, for this transaction only
+        db.session.execute(text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+                           {'threshold': str(threshold)})
+        similarity = func.similarity(Recipe.recipe_title, title)
+        return query.filter(Recipe.recipe_title.op('%')(title)).add_columns(similarity).order_by(
+            similarity.desc(), Recipe.recipe_id.desc()
+        )
+
+    matches = title_trigram_index.search(title or '', threshold, max_candidates)
+    if not matches:
+        return query.filter(db.false()).add_columns(db.literal(0.0))
+    scores = dict(matches)
+    similarity = case(scores, value=Recipe.recipe_id, else_=0.0)
+    return query.filter(Recipe.recipe_id.in_(list(scores))).add_columns(similarity).order_by(
+        similarity.desc(), Recipe.recipe_id.desc()
+    )
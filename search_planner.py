@@ -0,0 +1,465 @@
+"""
+Recipe-Room Backend - Search Query Planner
+
+The single search code path behind /api/search/recipes and
+/api/recipes/discover.
+- SearchPlan.from_args() validates the query parameters and normalizes
+  them (whitespace-collapsed case-folded terms, de-duplicated sorted
+  ingredient terms, normalized country, parameters that cannot affect the
+  result dropped), so equivalent requests produce the same fingerprint.
+- build_search_query() turns a plan into one Recipe query on indexed
+  predicates: the full-text, trigram or description vector index for
+  text, the ingredient index for ingredients and equality/range filters
+  on indexed columns.
+- find_recipe_ids() runs that query once for the ordered recipe IDs and
+  the total; the result is cached by fingerprint and catalog version, so
+  repeated queries skip the search entirely until a recipe, its
+  engagement or its owner's profile changes.
+- load_search_page() hydrates only the IDs on the requested page. Every
+  plan has a limit and pages with an offset cursor into the cached IDs.
+- search_response() is the whole request handler the endpoints wrap.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from flask import current_app, jsonify, request
+
+from models import db, Recipe
+from cache import query_cache, get_catalog_version
+from fieldsets import parse_fields, wants_field
+from search_index import apply_text_search, apply_fuzzy_title_search, is_ranked_text_search
+from vector_search import apply_description_search
+from utils import (bulk_format_recipes, compute_search_facets, parse_ingredient_terms, filter_by_ingredients,
+                   apply_recipe_view, count_query_rows, is_summary_view, normalize_country_name, get_country_id,
+                   build_etag, not_modified_response,
+                   set_cache_validators, RECIPE_SORT_COLUMNS, recipe_sort_order)
+
+TRUE_VALUES = ('true', '1', 'yes')
+
+
+def _normalize_terms(raw: Optional[str]) -> Optional[str]:
+    """Case-fold search text and collapse its whitespace; None when empty."""
+    value = ' '.join((raw or '').casefold().split())
+    return value or None
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Encode a result offset as an opaque search cursor.
+
+    Args:
+        offset: Number of results already returned
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps({'offset': offset}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_offset_cursor().
+
+    Args:
+        cursor: Opaque cursor string from a previous response
+
+    Returns:
+        Result offset
+
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['offset'])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
+
+
+class SearchPlan:
+    """
+    Normalized, validated search request: the query itself (what
+    fingerprint() covers) plus the page and representation to return.
+    """
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def __init__(self, text: Optional[str] = None, title: Optional[str] = None,
+                 fuzzy_title: Optional[str] = None, similarity: Optional[float] = None,
+                 description: Optional[str] = None,
+                 include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 match: str = 'all', people_served: Optional[int] = None,
+                 country: Optional[str] = None, min_rating: Optional[float] = None,
+                 min_total_time: Optional[int] = None, max_total_time: Optional[int] = None,
+                 max_prep_time: Optional[int] = None, sort: Optional[str] = None,
+                 facets: bool = False, summary: bool = True, fields: Optional[Set[str]] = None,
+                 limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None):
+        self.text = text
+        self.title = title
+        self.fuzzy_title = fuzzy_title
+        self.similarity = similarity if fuzzy_title else None
+        self.description = description
+        self.include = sorted(set(include or []))
+        self.exclude = sorted(set(exclude or []))
+        self.match = match if len(self.include) > 1 else 'all'
+        self.people_served = people_served
+        self.country = country
+        self.min_rating = min_rating
+        self.min_total_time = min_total_time
+        self.max_total_time = max_total_time
+        self.max_prep_time = max_prep_time
+        self.facets = facets
+        self.summary = summary
+        self.fields = fields
+        self.limit = limit
+        self.cursor = cursor or None
+
+        # Whether the text match yields a score per recipe
+        self.scored = bool(self.fuzzy_title or self.description or
+                           is_ranked_text_search(self.text, self.title))
+        if sort in RECIPE_SORT_COLUMNS:
+            self.order = sort
+        elif self.fuzzy_title:
+            self.order = 'similarity'
+        elif self.description:
+            self.order = 'description'
+        elif self.scored:
+            self.order = 'relevance'
+        else:
+            self.order = 'newest'
+        self.offset = decode_offset_cursor(self.cursor) if self.cursor else 0
+
+    @classmethod
+    def from_args(cls, args, default_similarity: float) -> 'SearchPlan':
+        """
+        Build a plan from request query parameters: q, name, ingredient,
+        ingredients, exclude, match, people_served, country, rating,
+        min_total_time, max_total_time, max_prep_time, fuzzy, similarity,
+        describe, sort, facets, view, fields, limit and cursor.
+
+        Args:
+            args: Query parameter mapping (e.g. request.args)
+            default_similarity: Fuzzy threshold used when similarity is not given
+
+        Returns:
+            A SearchPlan
+
+        Raises:
+            ValueError with a client-facing message if a parameter is invalid
+        """
+        match = args.get('match', 'all')
+        if match not in ('all', 'any'):
+            raise ValueError("match must be 'all' or 'any'")
+
+        # relevance (the default) orders text matches by their score and
+        # everything else newest first
+        sort = (args.get('sort') or 'relevance').lower()
+        if sort != 'relevance' and sort not in RECIPE_SORT_COLUMNS:
+            raise ValueError(f"sort must be one of: relevance, {', '.join(RECIPE_SORT_COLUMNS)}")
+
+        text = _normalize_terms(args.get('q'))
+        title = _normalize_terms(args.get('name'))
+
+        # Description mode ranks q against descriptions and procedures by
+        # TF-IDF similarity instead of running any other text search
+        description = None
+        if args.get('describe', 'false').lower() in TRUE_VALUES and text:
+            description = text
+            text = title = None
+
+        # Fuzzy mode matches name (or q) against titles by trigram similarity
+        # instead of running the full-text search
+        fuzzy_title = similarity = None
+        if args.get('fuzzy', 'false').lower() in TRUE_VALUES and (title or text):
+            fuzzy_title = title or text
+            text = title = None
+            try:
+                similarity = float(args.get('similarity', default_similarity))
+            except ValueError:
+                similarity = -1
+            if not 0 < similarity <= 1:
+                raise ValueError('similarity must be a number between 0 and 1')
+
+        # Ingredient index: ingredients=a,b (match=all|any), ingredient=a, exclude=c,d
+        include = parse_ingredient_terms(args.get('ingredients'))
+        include += [term for term in parse_ingredient_terms(args.get('ingredient')) if term not in include]
+        exclude = parse_ingredient_terms(args.get('exclude'))
+
+        people_served = min_rating = None
+        if args.get('people_served'):
+            try:
+                people_served = int(args['people_served'])
+            except ValueError:
+                raise ValueError('people_served must be a whole number')
+        if args.get('rating'):
+            try:
+                min_rating = float(args['rating'])
+            except ValueError:
+                raise ValueError('rating must be a number')
+        country = normalize_country_name(args.get('country'))
+        
+        # Time ranges in minutes
+        times = {}
+        for name in ('min_total_time', 'max_total_time', 'max_prep_time'):
+            if args.get(name):
+                try:
+                    times[name] = int(args[name])
+                except ValueError:
+                    times[name] = -1
+                if times[name] < 0:
+                    raise ValueError(f'{name} must be a whole number of minutes')
+
+        try:
+            limit = int(args.get('limit', cls.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError('limit must be a number')
+        limit = min(max(limit, 1), cls.MAX_LIMIT)
+
+        fields = parse_fields(args.get('fields'))
+        return cls(
+            text=text, title=title, fuzzy_title=fuzzy_title, similarity=similarity,
+            description=description,
+            include=include, exclude=exclude, match=match,
+            people_served=people_served, country=country, min_rating=min_rating, **times, sort=sort,
+            facets=args.get('facets', 'false').lower() in TRUE_VALUES,
+            summary=is_summary_view(args.get('view'), fields), fields=fields,
+            limit=limit, cursor=args.get('cursor')
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the canonical form of the query: the parameters that select and
+        order the results (not the page or the representation).
+
+        Returns:
+            Dictionary of normalized query parameters
+        """
+        return {
+            'text': self.text,
+            'title': self.title,
+            'fuzzy_title': self.fuzzy_title,
+            'similarity': self.similarity,
+            'description': self.description,
+            'include': self.include,
+            'exclude': self.exclude,
+            'match': self.match,
+            'people_served': self.people_served,
+            'country': self.country,
+            'min_rating': self.min_rating,
+            'min_total_time': self.min_total_time,
+            'max_total_time': self.max_total_time,
+            'max_prep_time': self.max_prep_time,
+            'order': self.order
+        }
+
+    def fingerprint(self) -> str:
+        """
+        Get a stable hash of the query, usable as a cache key: equivalent
+        requests (parameter order, case, spacing, page, view) share a
+        fingerprint.
+
+        Returns:
+            Hex digest
+        """
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def build_search_query(plan: SearchPlan, query):
+    """
+    Apply a plan's filters to a query over non-deleted recipes (without
+    paging). Ranked plans add their score column and are ordered by it.
+
+    Args:
+        plan: Search plan
+        query: Query selecting Recipe or Recipe.recipe_id
+
+    Returns:
+        Tuple of (query, score field name or None for unranked plans)
+    """
+
+    # Text: the trigram index for fuzzy titles, the vector index for
+    # descriptions, otherwise full-text (q searches every field, name the title)
+    score_field = None
+    if plan.fuzzy_title:
+        query = apply_fuzzy_title_search(query, plan.fuzzy_title, plan.similarity)
+        score_field = 'similarity'
+    elif plan.description:
+        query = apply_description_search(query, plan.description)
+        score_field = 'similarity'
+    else:
+        query, ranked = apply_text_search(query, plan.text, plan.title)
+        if ranked:
+            score_field = 'snippet'
+
+    query = filter_by_ingredients(query, plan.include, plan.exclude, plan.match)
+
+    # Equality and range filters on indexed columns
+    if plan.people_served is not None:
+        query = query.filter(Recipe.recipe_people_served == plan.people_served)
+    if plan.country:
+        country_id = get_country_id(plan.country)
+        query = query.filter(Recipe.recipe_country_id == country_id if country_id else db.false())
+    if plan.min_rating is not None:
+        query = query.filter(Recipe.recipe_average_rating >= plan.min_rating)
+        if plan.min_rating <= 0:
+            # Unrated recipes average 0; any positive minimum already excludes them
+            query = query.filter(Recipe.recipe_rating_count > 0)
+    
+    # Range scans on the stored total time; recipes without any time (total 0)
+    # are not "under N minutes"
+    if plan.min_total_time is not None:
+        query = query.filter(Recipe.recipe_total_time >= plan.min_total_time)
+    if plan.max_total_time is not None:
+        query = query.filter(Recipe.recipe_total_time.between(1, plan.max_total_time))
+    if plan.max_prep_time is not None:
+        query = query.filter(Recipe.recipe_prep_time <= plan.max_prep_time)
+    return query, score_field
+
+
+def _recipe_id_query(plan: SearchPlan):
+    """A plan's filters applied to a query of non-deleted recipe IDs."""
+    return build_search_query(plan, db.session.query(Recipe.recipe_id).filter(Recipe.recipe_is_deleted == False))
+
+
+def find_recipe_ids(plan: SearchPlan) -> Dict[str, Any]:
+    """
+    Run a plan for its ordered recipe IDs, up to SEARCH_MAX_RESULTS.
+    Plans are ordered by their text match score, or by a recipe sort
+    (newest or top_rated) on its keyset index. Only IDs are selected, so no
+    snippets or recipe columns are produced here.
+
+    Args:
+        plan: Search plan
+
+    Returns:
+        Dictionary with 'ids' (ordered recipe IDs) and 'total' (all matches)
+    """
+    max_results = current_app.config.get('SEARCH_MAX_RESULTS', 1000)
+    query, _ = _recipe_id_query(plan)
+    if plan.order in RECIPE_SORT_COLUMNS:
+        query = query.order_by(None).order_by(*recipe_sort_order(plan.order))
+
+    ids = [row[0] for row in query.with_entities(Recipe.recipe_id).limit(max_results + 1)]
+    total = len(ids) if len(ids) <= max_results else count_query_rows(query)
+    return {'ids': ids[:max_results], 'total': total}
+
+
+def find_search_facets(plan: SearchPlan) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count a plan's matches per facet (see utils.compute_search_facets).
+
+    Args:
+        plan: Search plan
+
+    Returns:
+        Dictionary of facet name -> list of {'value', 'count'}
+    """
+    return compute_search_facets(_recipe_id_query(plan)[0])
+
+
+def load_search_page(plan: SearchPlan, recipe_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Load and format the recipes of one page in the given order. Ranked
+    plans re-run their text match restricted to these IDs, so each recipe
+    gets its score column (the highlighted `snippet`, or the fuzzy or
+    description `similarity`) without computing it for the other matches.
+
+    Args:
+        plan: Search plan
+        recipe_ids: Ordered recipe IDs of the page
+
+    Returns:
+        List of formatted recipe dictionaries
+    """
+    if not recipe_ids:
+        return []
+
+    query = apply_recipe_view(Recipe.query.filter(
+        Recipe.recipe_id.in_(recipe_ids),
+        Recipe.recipe_is_deleted == False
+    ), plan.summary, plan.fields)
+    score_field = None
+    if not plan.scored:
+        rows = [(recipe, None) for recipe in query.all()]
+    else:
+        query, score_field = build_search_query(plan, query)
+        rows = query.all()
+
+    rows_by_id = {recipe.recipe_id: (recipe, score) for recipe, score in rows}
+    rows = [rows_by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in rows_by_id]
+    results = bulk_format_recipes([recipe for recipe, _ in rows], include_full_details=True,
+                                  summary=plan.summary, fields=plan.fields)
+    if score_field and wants_field(plan.fields, score_field):
+        for result, (_, score) in zip(results, rows):
+            result[score_field] = round(score, 4) if isinstance(score, float) else score
+    return results
+
+
+def search_response(error_message: str):
+    """
+    Handle a search request: plan it, answer conditional requests from the
+    catalog version, take the ordered IDs from the query cache (keyed by
+    plan fingerprint and catalog version, so equivalent requests to either
+    endpoint share them) and hydrate the requested page.
+
+    Args:
+        error_message: Error label used if the search fails
+
+    Returns:
+        Flask response tuple
+    """
+    try:
+        try:
+            plan = SearchPlan.from_args(request.args, current_app.config['FUZZY_SIMILARITY_THRESHOLD'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        catalog_version = get_catalog_version()
+        etag = build_etag(catalog_version)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+
+        # compute runs without the request context so that it can also be
+        # refreshed in the background
+        cache_key = f'{plan.fingerprint()}:{catalog_version}'
+        results = query_cache.get_or_compute(f'search:{cache_key}', lambda: find_recipe_ids(plan))
+
+        end = plan.offset + plan.limit
+        recipes_list = load_search_page(plan, results['ids'][plan.offset:end])
+        has_next = end < len(results['ids'])
+        payload = {
+            'success': True,
+            'count': len(recipes_list),
+            'recipes': recipes_list,
+            'pagination': {
+                'limit': plan.limit,
+                'total': results['total'],
+                'has_next': has_next,
+                'next_cursor': encode_offset_cursor(end) if has_next else None
+            }
+        }
+        if plan.facets:
+            payload['facets'] = query_cache.get_or_compute(f'search_facets:{cache_key}',
+                                                           lambda: find_search_facets(plan))
+        response = jsonify(payload)
+        return set_cache_validators(response, etag), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': error_message,
+            'message': str(e)
+        }), 500
@@ -7,6 +7,11 @@ Run this after deploying to create initial test data.
 from app import create_app, db
 from models import User, Recipe, RecipeGroup, Comment, Rating, Bookmark
 from datetime import datetime, timedelta
+from utils import (reconcile_recipe_counters, rebuild_ingredient_index, backfill_recipe_countries,
+                   backfill_recipe_total_time, refresh_rating_prior)
+from search_index import rebuild_search_index
+from similar_recipes import rebuild_similarity_index
+from recommendations import rebuild_recommendations
 
 def seed_database():
     """Create test data in the database."""
@@ -266,6 +271,24 @@ def seed_database():
         db.session.commit()
         print(f"✅ Created test comments")
         
+        # Seed rows bypass the routes, so rebuild the recipe counters and search indexes
+        reconcile_recipe_counters()
+        print("✅ Recipe engagement counters reconciled")
+        prior_mean, _ = refresh_rating_prior()
+        print(f"✅ Bayesian ratings computed (prior mean {prior_mean:.2f})")
+        indexed = rebuild_search_index()
+        print(f"✅ Search index rebuilt for {indexed} recipes")
+        indexed = rebuild_ingredient_index()
+        print(f"✅ Ingredient index rebuilt for {indexed} recipes")
+        indexed = rebuild_similarity_index()
+        print(f"✅ Similarity index rebuilt for {indexed} recipes")
+        indexed = rebuild_recommendations()
+        print(f"✅ Recommendations computed for {indexed} recipes")
+        updated = backfill_recipe_countries()
+        print(f"✅ Countries canonicalized for {updated} recipes")
+        updated = backfill_recipe_total_time()
+        print(f"✅ Total times computed for {updated} recipes")
+        
         print("\n🎉 Database seeding complete!")
         print(f"\nTest Users (use these to login):")
         for user in user_data:
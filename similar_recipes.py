@@ -0,0 +1,201 @@
+"""
+Recipe-Room Backend - Similar Recipes
+
+"More like this" by ingredient overlap. Each recipe's set of normalized
+ingredient names gets a MinHash signature of NUM_PERM values (the minimum
+of a universal hash over the set, per hash function); the fraction of equal
+values between two signatures estimates the Jaccard similarity of the sets.
+
+Signatures are split into BANDS bands of ROWS values and each band is hashed
+into a bucket (LSH banding). A lookup only compares the recipes sharing at
+least one bucket with the query recipe, so its cost depends on the number
+of near matches rather than on the size of the catalog. With 32 bands of 4
+rows, pairs with a Jaccard similarity of 0.5 are found with ~87%
+probability, 0.3 with ~23%.
+
+Signatures and buckets are written in the same transaction as the recipe
+change; `flask rebuild-similarity-index` rebuilds them in NumPy batches.
+"""
+
+import zlib
+from typing import List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import tuple_
+
+from models import db, Recipe, recipe_minhash, recipe_lsh_buckets
+from utils import extract_ingredient_names, normalize_ingredient_term
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Hash functions h(x) = (a * x + b) mod p over 31-bit name hashes; the fixed
+# seed keeps stored signatures comparable across workers and restarts
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240613)
+_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)
+# Odd multipliers combining the ROWS values of a band into one 64-bit bucket
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 62, ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def ingredient_name_set(ingredients) -> Set[str]:
+    """
+    Get the normalized ingredient names of a recipe.
+
+    Args:
+        ingredients: Recipe ingredient objects
+
+    Returns:
+        Set of normalized names
+    """
+    return {normalize_ingredient_term(name) for name in extract_ingredient_names(ingredients or [])} - {''}
+
+
+def minhash_signatures(name_sets: List[Set[str]]) -> np.ndarray:
+    """
+    Compute the MinHash signatures of many ingredient sets at once: every
+    name of every set is hashed by all hash functions in one array
+    operation, then each set takes the minimum over its rows.
+
+    Args:
+        name_sets: Non-empty sets of normalized ingredient names
+
+    Returns:
+        uint32 array of shape (len(name_sets), NUM_PERM)
+    """
+    counts = np.fromiter((len(names) for names in name_sets), dtype=np.int64, count=len(name_sets))
+    name_hashes = np.fromiter(
+        (zlib.crc32(name.encode('utf-8')) & 0x7FFFFFFF for names in name_sets for name in names),
+        dtype=np.uint64, count=int(counts.sum())
+    )
+    values = (name_hashes[:, None] * _A[None, :] + _B[None, :]) % _PRIME
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return np.minimum.reduceat(values, starts, axis=0).astype(np.uint32)
+
+
+def band_buckets(signatures: np.ndarray) -> np.ndarray:
+    """
+    Hash each band of each signature into a bucket.
+
+    Args:
+        signatures: Array of shape (n, NUM_PERM)
+
+    Returns:
+        int64 array of shape (n, BANDS)
+    """
+    bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    # uint64 arithmetic wraps around, which is what we want for hashing
+    return (bands * _BAND_MULTIPLIERS).sum(axis=2, dtype=np.uint64).view(np.int64)
+
+
+def _insert_signatures(recipe_ids: List[int], signatures: np.ndarray) -> None:
+    """Insert signature and bucket rows for recipes (within the current transaction)."""
+    if not recipe_ids:
+        return
+    buckets = band_buckets(signatures)
+    db.session.execute(recipe_minhash.insert(), [
+        {'rmh_recipe_id': recipe_id, 'rmh_signature': signature.astype('<u4').tobytes()}
+        for recipe_id, signature in zip(recipe_ids, signatures)
+    ])
+    db.session.execute(recipe_lsh_buckets.insert(), [
+        {'rlb_band': band, 'rlb_bucket': int(bucket), 'rlb_recipe_id': recipe_id}
+        for recipe_id, row in zip(recipe_ids, buckets)
+        for band, bucket in enumerate(row)
+    ])
+
+
+def sync_recipe_minhash(recipe: Recipe) -> None:
+    """
+    Replace a recipe's signature and buckets within the current
+    transaction. Soft-deleted recipes and recipes without ingredients are
+    removed from the index. The recipe must have been flushed so it has an ID.
+
+    Args:
+        recipe: Recipe object
+    """
+    db.session.execute(recipe_minhash.delete().where(recipe_minhash.c.rmh_recipe_id == recipe.recipe_id))
+    db.session.execute(recipe_lsh_buckets.delete().where(
+        recipe_lsh_buckets.c.rlb_recipe_id == recipe.recipe_id
+    ))
+    if recipe.recipe_is_deleted:
+        return
+
+    names = ingredient_name_set(recipe.recipe_ingredients)
+    if names:
+        _insert_signatures([recipe.recipe_id], minhash_signatures([names]))
+
+
+def rebuild_similarity_index(batch_size: int = 2000) -> int:
+    """
+    Rebuild the signatures and buckets of every non-deleted recipe and commit.
+
+    Args:
+        batch_size: Number of recipes hashed per batch
+
+    Returns:
+        Number of recipes indexed
+    """
+    db.session.execute(recipe_lsh_buckets.delete())
+    db.session.execute(recipe_minhash.delete())
+
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Recipe.recipe_id, Recipe.recipe_ingredients).filter(
+            Recipe.recipe_is_deleted == False,
+            Recipe.recipe_id > last_id
+        ).order_by(Recipe.recipe_id).limit(batch_size).all()
+        if not rows:
+            break
+
+        recipe_ids, name_sets = [], []
+        for recipe_id, ingredients in rows:
+            names = ingredient_name_set(ingredients)
+            if names:
+                recipe_ids.append(recipe_id)
+                name_sets.append(names)
+        if recipe_ids:
+            _insert_signatures(recipe_ids, minhash_signatures(name_sets))
+        indexed += len(recipe_ids)
+        last_id = rows[-1].recipe_id
+
+    db.session.commit()
+    return indexed
+
+
+def find_similar_recipes(recipe: Recipe, limit: int = 10) -> List[Tuple[int, float]]:
+    """
+    Find the recipes whose ingredient sets are most similar to a recipe's.
+
+    Args:
+        recipe: Recipe to match
+        limit: Maximum number of recipes to return
+
+    Returns:
+        List of (recipe_id, estimated Jaccard similarity), most similar first
+    """
+    names = ingredient_name_set(recipe.recipe_ingredients)
+    if not names or limit <= 0:
+        return []
+    signature = minhash_signatures([names])
+    buckets = band_buckets(signature)[0]
+
+    candidate_ids = db.session.query(recipe_lsh_buckets.c.rlb_recipe_id).filter(
+        tuple_(recipe_lsh_buckets.c.rlb_band, recipe_lsh_buckets.c.rlb_bucket).in_(
+            [(band, int(bucket)) for band, bucket in enumerate(buckets)]
+        ),
+        recipe_lsh_buckets.c.rlb_recipe_id != recipe.recipe_id
+    ).distinct()
+    rows = db.session.query(recipe_minhash.c.rmh_recipe_id, recipe_minhash.c.rmh_signature).filter(
+        recipe_minhash.c.rmh_recipe_id.in_(candidate_ids.scalar_subquery())
+    ).all()
+    if not rows:
+        return []
+
+    recipe_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    candidates = np.frombuffer(b''.join(row[1] for row in rows), dtype='<u4').reshape(len(rows), NUM_PERM)
+    similarities = (candidates == signature).mean(axis=1)
+    order = np.lexsort((-recipe_ids, -similarities))[:limit]
+    return [(int(recipe_ids[i]), float(similarities[i])) for i in order]
@@ -0,0 +1,95 @@
+"""
+Shared fixtures: the app runs against a throwaway SQLite database, and
+every test starts from empty tables, caches and in-memory indexes.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix='recipe-room-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-key-with-enough-length')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+import pantry  # noqa: E402
+import utils  # noqa: E402
+from app import app as flask_app  # noqa: E402
+from cache import recipe_cache, query_cache, count_cache, response_cache, ensure_catalog_version  # noqa: E402
+from models import db  # noqa: E402
+from recipe_indexes import _indexes  # noqa: E402
+from search_index import ensure_search_index, is_search_index_available  # noqa: E402
+
+
+def _reset_state():
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    ensure_search_index()
+    if is_search_index_available():
+        with db.engine.begin() as conn:
+            conn.execute(text('DELETE FROM recipes_fts'))
+    ensure_catalog_version()
+
+    for cache in (recipe_cache, query_cache, count_cache, response_cache):
+        cache.clear()
+    for index in _indexes:
+        with index._lock:
+            index.clear()
+            index._version = None
+            index._checked_at = None
+            index._stale = True
+    pantry._index = None
+    utils._country_ids.clear()
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        _reset_state()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in a user; returns the Authorization headers."""
+    def make(name):
+        client.post('/api/auth/register', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'password123'
+        })
+        response = client.post('/api/auth/login', json={
+            'email': f'{name}@example.com', 'password': 'password123'
+        })
+        return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+    return make
+
+
+@pytest.fixture
+def make_recipe(client):
+    """Create a recipe through the API; returns its ID."""
+    def make(headers, title='Chicken Stew', ingredients=('Chicken', 'Garlic'), country='Kenya',
+             prep_time=10, cook_time=20, description='A tasty dish', procedure=('Cook everything well',)):
+        response = client.post('/api/recipes/', headers=headers, json={
+            'title': title,
+            'description': description,
+            'country': country,
+            'ingredients': [{'name': name, 'quantity': '1'} for name in ingredients],
+            'procedure': [{'step': i + 1, 'instruction': step} for i, step in enumerate(procedure)],
+            'people_served': 4,
+            'prep_time': prep_time,
+            'cook_time': cook_time
+        })
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['recipe']['recipe_id']
+    return make
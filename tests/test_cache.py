@@ -0,0 +1,178 @@
+"""Tests for the Cache wrapper (single flight, invalidation races)."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import search_planner
+from app import create_app
+from cache import Cache, MemoryCacheBackend, recipe_cache, response_cache
+
+
+def test_get_or_compute_stores_the_result():
+    cache = Cache('test')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_compute('key', compute) == 'value'
+    assert cache.get_or_compute('key', compute) == 'value'
+    assert len(calls) == 1
+
+
+def test_value_computed_across_an_invalidation_is_not_stored():
+    cache = Cache('test')
+
+    def compute():
+        # A concurrent commit invalidates while this value is being built
+        cache.delete('key')
+        return 'stale'
+
+    assert cache.get_or_compute('key', compute) == 'stale'
+    assert cache.get('key') is None
+    assert cache.discarded == 1
+    assert cache.get_or_compute('key', lambda: 'fresh') == 'fresh'
+    assert cache.get('key')[1] == 'fresh'
+
+
+def test_set_with_outdated_generation_is_dropped():
+    cache = Cache('test')
+    generation = cache.generation()
+    cache.clear()
+
+    cache.set('key', 'stale', generation=generation)
+    assert cache.get('key') is None
+
+    cache.set('key', 'fresh', generation=cache.generation())
+    assert cache.get('key') == 'fresh'
+
+
+def cached_response_for(path):
+    return response_cache.get(f'{response_cache.generation()}:{path}')
+
+
+def test_anonymous_response_is_not_cached_across_a_commit(client, make_user, make_recipe, monkeypatch):
+    make_recipe(make_user('alice'))
+    find_recipe_ids = search_planner.find_recipe_ids
+
+    def find_then_commit_elsewhere(plan):
+        ids = find_recipe_ids(plan)
+        response_cache.invalidate()
+        return ids
+
+    monkeypatch.setattr(search_planner, 'find_recipe_ids', find_then_commit_elsewhere)
+    client.get('/api/recipes/discover')
+    assert cached_response_for('/api/recipes/discover') is None
+
+    monkeypatch.setattr(search_planner, 'find_recipe_ids', find_recipe_ids)
+    client.get('/api/recipes/discover')
+    assert cached_response_for('/api/recipes/discover') is not None
+
+
+def test_writes_invalidate_responses_without_clearing_keys(client, make_user, make_recipe, monkeypatch):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    client.get('/api/recipes/discover')
+    assert cached_response_for('/api/recipes/discover') is not None
+
+    cleared = []
+    monkeypatch.setattr(response_cache.backend, 'clear', lambda prefix='': cleared.append(prefix))
+    client.put(f'/api/recipes/{recipe_id}', headers=headers, json={'title': 'Renamed Stew'})
+    assert cleared == []
+    assert cached_response_for('/api/recipes/discover') is None
+    titles = [recipe['title'] for recipe in client.get('/api/recipes/discover').get_json()['recipes']]
+    assert titles == ['Renamed Stew']
+
+
+def test_recipe_detail_cache_is_invalidated_by_commits(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    url = f'/api/recipes/{recipe_id}'
+
+    client.get(url)
+    assert recipe_cache.get(recipe_id) is not None
+
+    client.put(url, headers=headers, json={'title': 'Renamed Stew'})
+    assert recipe_cache.get(recipe_id) is None
+    assert client.get(url).get_json()['recipe']['title'] == 'Renamed Stew'
+
+    # Owner renames reach the cached owner block too
+    client.put('/api/auth/profile', headers=headers, json={'username': 'alice2'})
+    assert client.get(url).get_json()['recipe']['owner']['username'] == 'alice2'
+
+
+@contextmanager
+def worker_cache(backend):
+    """Serve requests with the given in-process cache, as a separate worker would."""
+    previous = recipe_cache.backend
+    recipe_cache.configure(backend)
+    try:
+        yield
+    finally:
+        recipe_cache.configure(previous)
+
+
+def test_recipe_detail_cache_is_checked_against_other_workers_writes(app, client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    url = f'/api/recipes/{recipe_id}'
+    other_client = create_app().test_client()
+    first_worker, second_worker = MemoryCacheBackend(), MemoryCacheBackend()
+
+    with worker_cache(first_worker):
+        assert client.get(url).get_json()['recipe']['title'] == 'Chicken Stew'
+    with worker_cache(second_worker):
+        assert other_client.put(url, headers=headers, json={'title': 'Renamed Stew'}).status_code == 200
+    with worker_cache(first_worker):
+        assert client.get(url).get_json()['recipe']['title'] == 'Renamed Stew'
+        assert recipe_cache.get(recipe_id)[1]['recipe']['title'] == 'Renamed Stew'
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = Cache('test')
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute('key', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', slow)))
+                 for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while cache.coalesced < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ['value'] * 4
+    assert len(calls) == 1
+
+
+def test_expired_entry_is_served_while_it_refreshes(app):
+    cache = Cache('test', ttl=0.01, stale_ttl=60)
+    cache.get_or_compute('key', lambda: 'old')
+    time.sleep(0.02)
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get_or_compute('key', refresh) == 'old'
+    assert refreshed.wait(5)
+    for _ in range(500):
+        if cache.get('key')[1] == 'new':
+            break
+        time.sleep(0.01)
+    assert cache.get('key')[1] == 'new'
+    assert cache.stale_hits == 1
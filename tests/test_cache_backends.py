@@ -0,0 +1,86 @@
+"""Tests for the cache backends."""
+
+import time
+
+import pytest
+
+from cache import Cache, MemoryCacheBackend, SQLiteCacheBackend, create_cache_backend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCacheBackend(max_size=3)
+    return SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'), max_size=3)
+
+
+def test_set_get_delete_and_prefix_clear(backend):
+    backend.set('a:1', {'value': 1}, ttl=60)
+    backend.set('a:2', [2], ttl=60)
+    backend.set('b:1', 'three', ttl=60)
+    assert backend.get('a:1') == {'value': 1}
+
+    backend.delete(['a:2'])
+    assert backend.get('a:2') is None
+
+    backend.clear('a:')
+    assert backend.get('a:1') is None
+    assert backend.get('b:1') == 'three'
+
+
+def test_entries_expire(backend):
+    backend.set('key', 'value', ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get('key') is None
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_size=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+    backend.get('a')
+    backend.set('c', 3, ttl=60)
+    assert (backend.get('a'), backend.get('b'), backend.get('c')) == (1, None, 3)
+    assert backend.stats()['evictions'] == 1
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteCacheBackend(path).set('key', 'value', ttl=60)
+    assert SQLiteCacheBackend(path).get('key') == 'value'
+
+
+def test_named_caches_share_a_backend_without_collisions(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'))
+    first, second = Cache('first'), Cache('second')
+    first.configure(backend)
+    second.configure(backend)
+
+    first.set('key', 1)
+    second.set('key', 2)
+    first.clear()
+    assert (first.get('key'), second.get('key')) == (None, 2)
+
+
+def test_create_cache_backend(tmp_path):
+    assert create_cache_backend({}) is None
+    assert isinstance(create_cache_backend({'CACHE_BACKEND': 'sqlite', 'CACHE_URL': str(tmp_path / 'c.db')}),
+                      SQLiteCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend({'CACHE_BACKEND': 'memcached'})
+
+
+def test_unavailable_backend_degrades_to_misses():
+    class Broken:
+        def get(self, key):
+            raise ConnectionError('down')
+
+        def set(self, key, value, ttl):
+            raise ConnectionError('down')
+
+    cache = Cache('broken')
+    cache.configure(Broken())
+    cache.set('key', 'value')
+    assert cache.get('key') is None
+    assert cache.get_or_compute('key', lambda: 'computed') == 'computed'
+    assert cache.errors > 0
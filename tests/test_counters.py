@@ -0,0 +1,42 @@
+"""Tests for the denormalized engagement counters."""
+
+from models import db, Recipe
+from utils import reconcile_recipe_counters
+
+
+def _stats(client, recipe_id):
+    return client.get(f'/api/recipes/{recipe_id}').get_json()['recipe']['stats']
+
+
+def test_engagement_updates_counters(client, make_user, make_recipe):
+    recipe_id = make_recipe(make_user('alice'))
+    bob = make_user('bob')
+
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=bob, json={'value': 4})
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=bob)
+    client.post('/api/comments/', headers=bob, json={'recipe_id': recipe_id, 'comment_text': 'Lovely'})
+
+    stats = _stats(client, recipe_id)
+    assert stats['bookmarks_count'] == 1
+    assert stats['comments_count'] == 1
+    assert stats['average_rating'] == 4
+
+
+def test_reconcile_fixes_drifted_counters_and_changes_etag(client, make_user, make_recipe):
+    recipe_id = make_recipe(make_user('alice'))
+    other_id = make_recipe(make_user('carol'), title='Beef Stew')
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=make_user('bob'))
+
+    db.session.execute(db.update(Recipe).where(Recipe.recipe_id == recipe_id).values(recipe_bookmarks_count=7))
+    db.session.commit()
+    etag = client.get('/api/recipes/').headers['ETag']
+    untouched = db.session.get(Recipe, other_id).recipe_stats_updated_at
+
+    assert reconcile_recipe_counters() == 1
+    assert _stats(client, recipe_id)['bookmarks_count'] == 1
+    assert client.get('/api/recipes/', headers={'If-None-Match': etag}).status_code == 200
+    db.session.expire_all()
+    assert db.session.get(Recipe, other_id).recipe_stats_updated_at == untouched
+
+    # Nothing left to correct
+    assert reconcile_recipe_counters() == 0
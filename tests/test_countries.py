@@ -0,0 +1,70 @@
+"""Tests for country canonicalization and filtering."""
+
+from datetime import datetime
+
+import pytest
+
+from models import db, Country, Recipe
+from utils import backfill_recipe_countries, normalize_country_name
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('U.K.', 'United Kingdom'),
+    ('u.k.', 'United Kingdom'),
+    ('UK', 'United Kingdom'),
+    ('U.S.A.', 'United States'),
+    ('U. S. A.', 'United States'),
+    ('us', 'United States'),
+    ('U.S.', 'United States'),
+    ('U.A.E.', 'United Arab Emirates'),
+    ('uae', 'United Arab Emirates'),
+    ('  south   africa ', 'South Africa'),
+    ('Kenya', 'Kenya'),
+    ('', None),
+    (None, None),
+])
+def test_normalize_country_name(raw, expected):
+    assert normalize_country_name(raw) == expected
+
+
+def test_spellings_of_a_country_filter_together(client, make_user, make_recipe):
+    headers = make_user('alice')
+    dotted = make_recipe(headers, title='Fish and Chips', country='U.K.')
+    plain = make_recipe(headers, title='Shepherds Pie', country='uk')
+    make_recipe(headers, title='Ugali', country='Kenya')
+
+    response = client.get('/api/recipes/discover?country=U.K.')
+    assert response.status_code == 200
+    assert {recipe['recipe_id'] for recipe in response.get_json()['recipes']} == {dotted, plain}
+    assert {recipe['country'] for recipe in response.get_json()['recipes']} == {'United Kingdom'}
+
+
+def test_backfill_canonicalizes_stored_spellings(app, make_user, make_recipe):
+    headers = make_user('alice')
+    dotted = make_recipe(headers, title='Fish and Chips', country='UK')
+    plain = make_recipe(headers, title='Ugali', country='Kenya')
+    db.session.execute(db.update(Recipe).where(Recipe.recipe_id == dotted).values(
+        recipe_country='U.K.', recipe_country_id=None
+    ))
+    db.session.commit()
+
+    assert backfill_recipe_countries() == 1
+    recipes = {recipe.recipe_id: recipe for recipe in Recipe.query.all()}
+    assert recipes[dotted].recipe_country == 'United Kingdom'
+    assert recipes[dotted].recipe_country_id == Country.query.filter_by(country_name='United Kingdom').one().country_id
+    assert recipes[plain].recipe_country == 'Kenya'
+    assert backfill_recipe_countries() == 0
+
+
+def test_backfill_keeps_recipe_timestamps(app, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers, country='UK')
+    edited_at = datetime(2020, 1, 1)
+    db.session.execute(db.update(Recipe).where(Recipe.recipe_id == recipe_id).values(
+        recipe_country='U.K.', recipe_country_id=None, recipe_updated_at=edited_at
+    ))
+    db.session.commit()
+
+    assert backfill_recipe_countries() == 1
+    db.session.expire_all()
+    assert db.session.get(Recipe, recipe_id).recipe_updated_at == edited_at
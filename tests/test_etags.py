@@ -0,0 +1,86 @@
+"""Tests for conditional GETs (ETag / If-None-Match) on recipe and group endpoints."""
+
+from tests.test_recipe_feed import count_queries
+
+
+def _revalidate(client, url, etag, headers=None):
+    return client.get(url, headers={**(headers or {}), 'If-None-Match': etag})
+
+
+def test_feed_answers_304_until_a_recipe_changes(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+
+    etag = client.get('/api/recipes/').headers['ETag']
+    assert _revalidate(client, '/api/recipes/', etag).status_code == 304
+
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user('bob'), json={'value': 4})
+    assert _revalidate(client, '/api/recipes/', etag).status_code == 200
+
+
+def test_feed_revalidation_reads_only_the_catalog_version(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers)
+    user_id = client.get('/api/auth/profile', headers=headers).get_json()['id']
+    url = f'/api/recipes/user/{user_id}'
+    etag = client.get(url).headers['ETag']
+
+    with count_queries() as statements:
+        assert _revalidate(client, url, etag).status_code == 304
+    assert len(statements) == 1
+    assert 'catalog_versions' in statements[0]
+
+
+def test_bookmarks_invalidate_feed_etags(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    etag = client.get('/api/recipes/').headers['ETag']
+
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=make_user('bob'))
+    response = _revalidate(client, '/api/recipes/', etag)
+    assert response.status_code == 200
+    assert response.get_json()['recipes'][0]['stats']['bookmarks_count'] == 1
+
+
+def test_owner_rename_invalidates_feed_etags(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers)
+
+    for url in ('/api/recipes/', '/api/recipes/discover', '/api/search/recipes?q=chicken'):
+        etag = client.get(url).headers['ETag']
+        client.put('/api/auth/profile', headers=headers, json={'username': f'alice-{len(url)}'})
+
+        response = _revalidate(client, url, etag)
+        assert response.status_code == 200, url
+        owners = {recipe['owner']['username'] for recipe in response.get_json()['recipes']}
+        assert owners == {f'alice-{len(url)}'}
+
+
+def test_member_rename_invalidates_group_etag(client, make_user):
+    owner = make_user('alice')
+    group_id = client.post('/api/groups/', headers=owner, json={'name': 'Family'}).get_json()['group']['group_id']
+    url = f'/api/groups/{group_id}'
+
+    etag = client.get(url, headers=owner).headers['ETag']
+    assert _revalidate(client, url, etag, owner).status_code == 304
+
+    client.put('/api/auth/profile', headers=owner, json={'username': 'alice2'})
+    response = _revalidate(client, url, etag, owner)
+    assert response.status_code == 200
+    assert [member['username'] for member in response.get_json()['group']['members']] == ['alice2']
+
+
+def test_recipe_detail_revalidation(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    url = f'/api/recipes/{recipe_id}'
+
+    response = client.get(url)
+    etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+    assert _revalidate(client, url, etag).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+    # Representations differ by fields=, so do their ETags
+    assert client.get(f'{url}?fields=title').headers['ETag'] != etag
+
+    client.post('/api/comments/', headers=make_user('bob'), json={'recipe_id': recipe_id, 'comment_text': 'Yum'})
+    assert _revalidate(client, url, etag).status_code == 200
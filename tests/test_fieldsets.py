@@ -0,0 +1,43 @@
+"""Tests for sparse fieldsets (the fields= parameter)."""
+
+from fieldsets import parse_fields, wants_field
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(' , ') is None
+    assert parse_fields('title, stats.average_rating') == {'title', 'stats.average_rating'}
+
+
+def test_wants_field_matches_sub_fields():
+    assert wants_field(None, 'owner')
+    assert wants_field({'owner.username'}, 'owner')
+    assert not wants_field({'title'}, 'owner')
+
+
+def test_recipe_detail_and_feed_projection(client, make_user, make_recipe):
+    recipe_id = make_recipe(make_user('alice'))
+
+    detail = client.get(f'/api/recipes/{recipe_id}?fields=title,owner.username,stats.average_rating')
+    assert detail.get_json()['recipe'] == {
+        'recipe_id': recipe_id,
+        'title': 'Chicken Stew',
+        'owner': {'username': 'alice'},
+        'stats': {'average_rating': 0.0}
+    }
+
+    feed = client.get('/api/recipes/?fields=title').get_json()['recipes']
+    assert feed == [{'recipe_id': recipe_id, 'title': 'Chicken Stew'}]
+
+
+def test_group_and_comment_projection(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    client.post('/api/comments/', headers=headers, json={'recipe_id': recipe_id, 'comment_text': 'Lovely'})
+    group_id = client.post('/api/groups/', headers=headers, json={'name': 'Family'}).get_json()['group']['group_id']
+
+    group = client.get(f'/api/groups/{group_id}?fields=name,members.username', headers=headers).get_json()['group']
+    assert group == {'group_id': group_id, 'name': 'Family', 'members': [{'username': 'alice'}]}
+
+    comments = client.get(f'/api/comments/recipe/{recipe_id}?fields=comment_text').get_json()['comments']
+    assert comments == [{'id': 1, 'comment_text': 'Lovely'}]
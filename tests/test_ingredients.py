@@ -0,0 +1,43 @@
+"""Tests for ingredient queries (all/any/exclude) through the ingredient index."""
+
+import pytest
+
+
+@pytest.fixture
+def recipes(make_user, make_recipe):
+    headers = make_user('alice')
+    return {
+        'stew': make_recipe(headers, title='Chicken Stew', ingredients=('Chicken Breast', 'Garlic', 'Tomato')),
+        'pasta': make_recipe(headers, title='Tomato Pasta', ingredients=('Pasta', 'Tomato', 'Basil')),
+        'salad': make_recipe(headers, title='Green Salad', ingredients=('Lettuce', 'Garlic'))
+    }
+
+
+def _ids(client, query):
+    response = client.get(f'/api/search/recipes?{query}')
+    assert response.status_code == 200, response.get_json()
+    return {recipe['recipe_id'] for recipe in response.get_json()['recipes']}
+
+
+def test_all_ingredients_must_match_by_default(client, recipes):
+    assert _ids(client, 'ingredients=garlic,tomato') == {recipes['stew']}
+
+
+def test_any_ingredient_may_match(client, recipes):
+    assert _ids(client, 'ingredients=basil,lettuce&match=any') == {recipes['pasta'], recipes['salad']}
+
+
+def test_excluded_ingredients_filter_out_recipes(client, recipes):
+    assert _ids(client, 'ingredients=tomato&exclude=garlic') == {recipes['pasta']}
+
+
+def test_single_words_of_ingredient_names_match(client, recipes):
+    assert _ids(client, 'ingredient=chicken') == {recipes['stew']}
+
+
+def test_ingredient_terms_are_normalized(client, recipes):
+    assert _ids(client, 'ingredients=%20Garlic%20,TOMATO') == {recipes['stew']}
+
+
+def test_invalid_match_mode_is_rejected(client):
+    assert client.get('/api/search/recipes?ingredients=a,b&match=most').status_code == 400
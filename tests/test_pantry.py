@@ -0,0 +1,37 @@
+"""Tests for the "what can I cook" pantry search."""
+
+import logging
+
+import pantry
+
+
+def test_pantry_ranks_by_coverage_and_lists_missing(client, make_user, make_recipe):
+    headers = make_user('alice')
+    full = make_recipe(headers, title='Garlic Chicken', ingredients=('Chicken', 'Garlic'))
+    half = make_recipe(headers, title='Beef Stew', ingredients=('Beef', 'Garlic'))
+    make_recipe(headers, title='Fruit Salad', ingredients=('Mango', 'Banana'))
+
+    response = client.get('/api/search/pantry?ingredients=chicken,garlic&min_coverage=0.5')
+    assert response.status_code == 200
+    recipes = response.get_json()['recipes']
+    assert [recipe['recipe_id'] for recipe in recipes] == [full, half]
+    assert recipes[0]['pantry_match']['coverage'] == 1
+    assert recipes[1]['pantry_match']['missing_ingredients'] == ['beef']
+
+
+def test_pantry_requires_ingredients(client):
+    assert client.get('/api/search/pantry').status_code == 400
+
+
+def test_failed_background_refresh_is_logged_with_traceback(app, monkeypatch, caplog):
+    def fail(version):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(pantry.PantryIndex, 'build', staticmethod(fail))
+    pantry._refreshing = True
+    with caplog.at_level(logging.ERROR):
+        pantry._refresh_index(app)
+
+    assert 'Pantry index refresh failed' in caplog.text
+    assert caplog.records[-1].exc_info[0] is RuntimeError
+    assert pantry._refreshing is False
@@ -0,0 +1,132 @@
+"""Tests for the recipe feed endpoints (/api/recipes/ and /api/recipes/user/<id>)."""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_feed_query_count_does_not_grow_with_the_page(client, make_user, make_recipe):
+    fans = [make_user(f'fan{i}') for i in range(2)]
+    for i in range(8):
+        recipe_id = make_recipe(make_user(f'cook{i}'), title=f'Recipe number {i}')
+        for fan in fans:
+            client.post(f'/api/recipes/{recipe_id}/rate', headers=fan, json={'value': 4})
+            client.post(f'/api/recipes/{recipe_id}/bookmark', headers=fan)
+
+    counts = []
+    for per_page in (2, 8):
+        with count_queries() as statements:
+            response = client.get(f'/api/recipes/?per_page={per_page}&view=full&include_total=false',
+                                  headers=fans[0])
+        assert len(response.get_json()['recipes']) == per_page
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+    recipe = response.get_json()['recipes'][0]
+    assert recipe['owner']['username'].startswith('cook')
+    assert recipe['stats']['bookmarks_count'] == 2
+
+
+def test_cursor_pagination_walks_the_feed_without_gaps(client, make_user, make_recipe):
+    headers = make_user('alice')
+    created = [make_recipe(headers, title=f'Recipe number {i}') for i in range(5)]
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        payload = client.get(f'/api/recipes/?per_page=2&cursor={cursor}').get_json()
+        assert 'total_items' not in payload['pagination']
+        seen += [recipe['recipe_id'] for recipe in payload['recipes']]
+        cursor = payload['pagination']['next_cursor']
+    assert seen == list(reversed(created))
+
+
+def test_cursor_is_stable_across_inserts(client, make_user, make_recipe):
+    headers = make_user('alice')
+    created = [make_recipe(headers, title=f'Recipe number {i}') for i in range(4)]
+
+    first = client.get('/api/recipes/?per_page=2&cursor=').get_json()
+    make_recipe(headers, title='Newer recipe')
+    second = client.get(f"/api/recipes/?per_page=2&cursor={first['pagination']['next_cursor']}").get_json()
+    assert [recipe['recipe_id'] for recipe in second['recipes']] == [created[1], created[0]]
+
+
+def test_user_feed_supports_cursors(client, make_user, make_recipe):
+    alice, bob = make_user('alice'), make_user('bob')
+    mine = [make_recipe(alice, title=f'Alice recipe {i}') for i in range(3)]
+    make_recipe(bob, title='Bob recipe')
+    user_id = client.get('/api/auth/profile', headers=alice).get_json()['id']
+
+    payload = client.get(f'/api/recipes/user/{user_id}?per_page=5&cursor=').get_json()
+    assert [recipe['recipe_id'] for recipe in payload['recipes']] == list(reversed(mine))
+    assert payload['pagination']['next_cursor'] is None
+
+
+@pytest.mark.parametrize('cursor', ['', '&cursor='])
+def test_user_feed_reports_the_capped_page_size(client, make_user, make_recipe, cursor):
+    headers = make_user('alice')
+    make_recipe(headers)
+    user_id = client.get('/api/auth/profile', headers=headers).get_json()['id']
+
+    payload = client.get(f'/api/recipes/user/{user_id}?per_page=500{cursor}').get_json()
+    assert payload['pagination']['per_page'] == 100
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get('/api/recipes/?cursor=not-a-cursor').status_code == 400
+
+
+def test_total_counts_are_optional(client, make_user, make_recipe):
+    headers = make_user('alice')
+    for i in range(3):
+        make_recipe(headers, title=f'Recipe number {i}')
+
+    pagination = client.get('/api/recipes/?per_page=2').get_json()['pagination']
+    assert (pagination['total_items'], pagination['total_pages']) == (3, 2)
+
+    pagination = client.get('/api/recipes/?per_page=2&include_total=false').get_json()['pagination']
+    assert 'total_items' not in pagination
+    assert pagination['has_next'] is True
+
+
+def test_cached_total_is_invalidated_by_writes(client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    assert client.get('/api/recipes/', headers=headers).get_json()['pagination']['total_items'] == 1
+
+    make_recipe(headers, title='Beef Stew')
+    assert client.get('/api/recipes/', headers=headers).get_json()['pagination']['total_items'] == 2
+
+    client.delete(f'/api/recipes/{recipe_id}', headers=headers)
+    assert client.get('/api/recipes/', headers=headers).get_json()['pagination']['total_items'] == 1
+
+
+def test_feeds_default_to_the_summary_view(client, make_user, make_recipe):
+    recipe_id = make_recipe(make_user('alice'))
+
+    summary = client.get('/api/recipes/').get_json()['recipes'][0]
+    assert 'ingredients' not in summary and 'procedure' not in summary
+    assert summary['title'] == 'Chicken Stew'
+
+    full = client.get('/api/recipes/?view=full').get_json()['recipes'][0]
+    assert [ingredient['name'] for ingredient in full['ingredients']] == ['Chicken', 'Garlic']
+    assert full['procedure'][0]['instruction'] == 'Cook everything well'
+
+    detail = client.get(f'/api/recipes/{recipe_id}').get_json()['recipe']
+    assert 'ingredients' in detail and 'procedure' in detail
@@ -0,0 +1,44 @@
+"""Tests for the in-memory recipe indexes (suggestions, fuzzy titles)."""
+
+import pytest
+
+from recipe_indexes import RecipeIndex
+
+
+def test_recipe_index_requires_the_index_methods():
+    class Incomplete(RecipeIndex):
+        def add(self, row):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_suggestions_follow_new_and_deleted_recipes(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Pilau Rice', ingredients=('Rice', 'Pilau Masala'))
+    assert [s['title'] for s in client.get('/api/search/suggest?q=pil').get_json()['suggestions']['titles']] == [
+        'Pilau Rice'
+    ]
+
+    recipe_id = make_recipe(headers, title='Pili Pili Prawns', ingredients=('Prawns',))
+    titles = client.get('/api/search/suggest?q=pil').get_json()['suggestions']['titles']
+    assert {s['title'] for s in titles} == {'Pilau Rice', 'Pili Pili Prawns'}
+
+    client.delete(f'/api/recipes/{recipe_id}', headers=headers)
+    titles = client.get('/api/search/suggest?q=pil').get_json()['suggestions']['titles']
+    assert [s['title'] for s in titles] == ['Pilau Rice']
+
+
+def test_suggest_requires_a_prefix(client):
+    assert client.get('/api/search/suggest').status_code == 400
+
+
+def test_fuzzy_title_search_tolerates_typos(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chicken Biryani')
+    make_recipe(headers, title='Beef Stew')
+
+    response = client.get('/api/search/recipes?name=chiken+biriyani&fuzzy=true')
+    assert response.status_code == 200
+    assert [recipe['title'] for recipe in response.get_json()['recipes']] == ['Chicken Biryani']
@@ -0,0 +1,55 @@
+"""Tests for item-item collaborative filtering recommendations."""
+
+import numpy as np
+
+from recommendations import compute_recipe_neighbors, rebuild_recommendations
+
+
+def test_neighbors_match_dense_cosine_similarity():
+    rng = np.random.default_rng(7)
+    dense = (rng.random((30, 8)) < 0.4) * rng.integers(1, 5, (30, 8))
+    users, recipes = np.nonzero(dense)
+    weights = dense[users, recipes].astype(float)
+
+    recipe_ids, neighbor_ids, scores = compute_recipe_neighbors(
+        users, recipes, weights, np.arange(len(users)), min_support=1
+    )
+
+    norms = np.linalg.norm(dense, axis=0)
+    expected = dense.T @ dense / np.outer(norms, norms)
+    for recipe_id, neighbor_id, score in zip(recipe_ids, neighbor_ids, scores):
+        assert abs(score - expected[recipe_id, neighbor_id]) < 1e-9
+    # Each recipe lists every co-occurring recipe, best first
+    for recipe_id in np.unique(recipe_ids):
+        own = scores[recipe_ids == recipe_id]
+        assert list(own) == sorted(own, reverse=True)
+        assert len(own) == np.count_nonzero((dense.T @ dense)[recipe_id]) - 1
+
+
+def test_recommends_what_similar_users_engaged_with(client, make_user, make_recipe):
+    headers = make_user('alice')
+    soup = make_recipe(headers, title='Tomato Soup')
+    bread = make_recipe(headers, title='Garlic Bread')
+    make_recipe(headers, title='Fruit Salad')
+    for name in ('bob', 'carol'):
+        fan = make_user(name)
+        client.post(f'/api/recipes/{soup}/bookmark', headers=fan)
+        client.post(f'/api/recipes/{bread}/rate', headers=fan, json={'value': 5})
+    dave = make_user('dave')
+    client.post(f'/api/recipes/{soup}/bookmark', headers=dave)
+
+    assert rebuild_recommendations() == 2
+
+    response = client.get('/api/recipes/recommended?fields=recipe_id,recommendation_score', headers=dave)
+    assert response.status_code == 200
+    recipes = response.get_json()['recipes']
+    assert [recipe['recipe_id'] for recipe in recipes] == [bread]
+    assert recipes[0]['recommendation_score'] > 0
+
+    # Nothing new for someone who already engaged with both
+    bob = make_user('bob')
+    assert client.get('/api/recipes/recommended', headers=bob).get_json()['recipes'] == []
+
+
+def test_recommendations_require_authentication(client):
+    assert client.get('/api/recipes/recommended').status_code == 401
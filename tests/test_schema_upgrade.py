@@ -0,0 +1,55 @@
+"""Tests for upgrading databases created before the newer recipe and user columns."""
+
+from sqlalchemy import inspect, text
+
+from models import db, Recipe
+from utils import RECIPE_UPGRADE_COLUMNS, ensure_schema_columns
+
+
+def _downgrade_schema():
+    """Rebuild the recipes table without the columns added since the first release."""
+    new_columns = {name for name, ddl in RECIPE_UPGRADE_COLUMNS}
+    with db.engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'recipes'")).scalar()
+        lines = [line for line in ddl.splitlines() if not any(name in line for name in new_columns)]
+        kept = [column['name'] for column in inspect(conn).get_columns('recipes') if column['name'] not in new_columns]
+        conn.execute(text('\n'.join(lines).replace('CREATE TABLE recipes', 'CREATE TABLE recipes_old', 1)))
+        conn.execute(text(f'INSERT INTO recipes_old SELECT {", ".join(kept)} FROM recipes'))
+        conn.execute(text('DROP TABLE recipes'))
+        conn.execute(text('ALTER TABLE recipes_old RENAME TO recipes'))
+        conn.execute(text('ALTER TABLE users DROP COLUMN updated_at'))
+
+
+def test_startup_upgrades_an_old_database(app, client, make_user, make_recipe):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers, country='U.K.', prep_time=15, cook_time=30)
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=headers)
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=headers, json={'value': 4})
+    db.session.remove()
+    _downgrade_schema()
+
+    ensure_schema_columns()
+
+    columns = {column['name'] for column in inspect(db.engine).get_columns('recipes')}
+    assert {name for name, ddl in RECIPE_UPGRADE_COLUMNS} <= columns
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('recipes')}
+    assert {index.name for index in Recipe.__table__.indexes} <= indexes
+
+    recipe = db.session.get(Recipe, recipe_id)
+    assert recipe.recipe_bookmarks_count == 1
+    assert recipe.recipe_rating_count == 1
+    assert recipe.recipe_average_rating == 4
+    assert recipe.recipe_total_time == 45
+    assert recipe.recipe_country == 'United Kingdom'
+    assert recipe.recipe_country_id is not None
+
+    response = client.get('/api/recipes/')
+    assert response.status_code == 200
+    assert [item['recipe_id'] for item in response.get_json()['recipes']] == [recipe_id]
+
+
+def test_upgrade_is_a_no_op_on_a_current_database(app):
+    ensure_schema_columns()
+    ensure_schema_columns()
+    columns = {column['name'] for column in inspect(db.engine).get_columns('recipes')}
+    assert {name for name, ddl in RECIPE_UPGRADE_COLUMNS} <= columns
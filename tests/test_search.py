@@ -0,0 +1,103 @@
+"""Tests for recipe search and discover."""
+
+import pytest
+
+
+def _titles(response):
+    assert response.status_code == 200, response.get_json()
+    return [recipe['title'] for recipe in response.get_json()['recipes']]
+
+
+@pytest.mark.parametrize('url', [
+    '/api/search/recipes?q=!!!',
+    '/api/recipes/discover?q=-',
+    '/api/recipes/discover?name=%2B%2B',
+    '/api/search/recipes?q=%2B%2B&name=...'
+])
+def test_punctuation_only_query_is_not_ranked(client, make_user, make_recipe, url):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chicken Stew')
+    make_recipe(headers, title='Beef Stew')
+
+    # No word to rank by: the ILIKE filters apply, newest first
+    assert _titles(client.get(url)) == []
+
+
+def test_punctuation_only_query_orders_newest_first(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Stew one!')
+    make_recipe(headers, title='Stew two!')
+
+    assert _titles(client.get('/api/search/recipes?q=!')) == ['Stew two!', 'Stew one!']
+
+
+def test_text_query_ranks_matches(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chicken Stew', ingredients=('Chicken',))
+    make_recipe(headers, title='Beef Stew', ingredients=('Beef',))
+
+    assert _titles(client.get('/api/search/recipes?q=chicken')) == ['Chicken Stew']
+
+
+def test_title_matches_rank_above_description_matches(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Beef Stew', ingredients=('Beef',), description='Finish with roasted garlic')
+    make_recipe(headers, title='Garlic Bread', ingredients=('Bread',), description='Crisp and buttery')
+    make_recipe(headers, title='Fruit Salad', ingredients=('Mango',), description='Fresh')
+
+    response = client.get('/api/search/recipes?q=garlic')
+    assert _titles(response) == ['Garlic Bread', 'Beef Stew']
+    assert all(recipe['snippet'] for recipe in response.get_json()['recipes'])
+
+
+def test_text_query_matches_word_prefixes_and_all_terms(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Spicy Chicken Wings', ingredients=('Chicken',))
+    make_recipe(headers, title='Spicy Beef', ingredients=('Beef',))
+
+    assert _titles(client.get('/api/search/recipes?q=spicy+chick')) == ['Spicy Chicken Wings']
+
+
+def test_fuzzy_search_orders_by_similarity_and_applies_threshold(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chocolate Cake')
+    make_recipe(headers, title='Chocolate Chip Cookies')
+    make_recipe(headers, title='Beef Stew')
+
+    assert _titles(client.get('/api/search/recipes?name=choclate+cake&fuzzy=true&similarity=0.2')) == [
+        'Chocolate Cake', 'Chocolate Chip Cookies'
+    ]
+    assert _titles(client.get('/api/search/recipes?name=choclate+cake&fuzzy=true&similarity=0.6')) == [
+        'Chocolate Cake'
+    ]
+
+
+@pytest.mark.parametrize('similarity', ['0', '1.5', 'high'])
+def test_fuzzy_search_rejects_invalid_similarity(client, similarity):
+    response = client.get(f'/api/search/recipes?name=cake&fuzzy=true&similarity={similarity}')
+    assert response.status_code == 400
+
+
+def test_facets_count_every_match_not_just_the_page(client, make_user, make_recipe):
+    headers = make_user('alice')
+    rated = make_recipe(headers, title='Chicken Stew', country='Kenya', prep_time=10, cook_time=20)
+    make_recipe(headers, title='Chicken Salad', country='kenya', prep_time=5, cook_time=5)
+    make_recipe(headers, title='Chicken Parmigiana', country='Italy', prep_time=30, cook_time=40)
+    make_recipe(headers, title='Beef Stew', ingredients=('Beef',), country='Italy')
+    client.post(f'/api/recipes/{rated}/rate', headers=make_user('bob'), json={'value': 5})
+
+    response = client.get('/api/search/recipes?q=chicken&facets=true&limit=1')
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert len(payload['recipes']) == 1
+    assert payload['facets'] == {
+        'country': [{'value': 'Kenya', 'count': 2}, {'value': 'Italy', 'count': 1}],
+        'people_served': [{'value': '3-4', 'count': 3}],
+        'total_time': [{'value': '0-15', 'count': 1}, {'value': '16-30', 'count': 1}, {'value': '61+', 'count': 1}],
+        'rating': [{'value': '4-5', 'count': 1}, {'value': 'unrated', 'count': 2}]
+    }
+
+
+def test_facets_are_omitted_unless_requested(client, make_user, make_recipe):
+    make_recipe(make_user('alice'))
+    assert 'facets' not in client.get('/api/search/recipes?q=chicken').get_json()
@@ -0,0 +1,71 @@
+"""Tests for the search planner shared by /api/search/recipes and /api/recipes/discover."""
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import search_planner
+from search_planner import SearchPlan
+
+
+def _plan(**args):
+    return SearchPlan.from_args(MultiDict(args), default_similarity=0.3)
+
+
+def _ids(response):
+    assert response.status_code == 200, response.get_json()
+    return [recipe['recipe_id'] for recipe in response.get_json()['recipes']]
+
+
+def test_search_and_discover_share_the_planner(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chicken Stew', country='Kenya')
+    make_recipe(headers, title='Chicken Curry', country='India')
+    make_recipe(headers, title='Beef Stew', ingredients=('Beef',), country='Kenya')
+
+    query = 'q=chicken&country=kenya'
+    assert _ids(client.get(f'/api/search/recipes?{query}')) == _ids(client.get(f'/api/recipes/discover?{query}'))
+    assert len(_ids(client.get(f'/api/search/recipes?{query}'))) == 1
+
+
+def test_cursor_pages_through_all_results(client, make_user, make_recipe):
+    headers = make_user('alice')
+    created = [make_recipe(headers, title=f'Stew number {i}') for i in range(5)]
+
+    seen, url = [], '/api/search/recipes?limit=2'
+    while url:
+        payload = client.get(url).get_json()
+        seen += [recipe['recipe_id'] for recipe in payload['recipes']]
+        cursor = payload['pagination']['next_cursor']
+        url = f'/api/search/recipes?limit=2&cursor={cursor}' if cursor else None
+    assert seen == list(reversed(created))
+
+
+@pytest.mark.parametrize('query', ['people_served=many', 'rating=high', 'limit=ten', 'sort=oldest', 'match=some'])
+def test_invalid_parameters_are_rejected(client, query):
+    response = client.get(f'/api/search/recipes?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+
+def test_equivalent_queries_share_a_fingerprint(app):
+    base = _plan(q='Chicken  Stew', ingredients='garlic,tomato', country='kenya')
+    assert _plan(q='chicken stew', ingredients='Tomato, Garlic', country='Kenya', limit='5',
+                 view='full').fingerprint() == base.fingerprint()
+    assert _plan(q='chicken', ingredients='garlic,tomato', country='kenya').fingerprint() != base.fingerprint()
+
+
+def test_search_results_are_cached_until_the_catalog_changes(client, make_user, make_recipe, monkeypatch):
+    headers = make_user('alice')
+    make_recipe(headers, title='Chicken Stew')
+    calls = []
+    find_recipe_ids = search_planner.find_recipe_ids
+    monkeypatch.setattr(search_planner, 'find_recipe_ids', lambda plan: calls.append(plan) or find_recipe_ids(plan))
+
+    client.get('/api/search/recipes?q=chicken')
+    client.get('/api/search/recipes?q=CHICKEN&view=full')
+    assert len(calls) == 1
+
+    make_recipe(headers, title='Chicken Curry')
+    assert len(_ids(client.get('/api/search/recipes?q=chicken'))) == 2
+    assert len(calls) == 2
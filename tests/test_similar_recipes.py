@@ -0,0 +1,51 @@
+"""Tests for the MinHash/LSH similar-recipes endpoint."""
+
+import numpy as np
+
+from similar_recipes import minhash_signatures, rebuild_similarity_index
+
+STEW = ('Chicken', 'Garlic', 'Onion', 'Tomato', 'Ginger')
+
+
+def test_signatures_estimate_jaccard_similarity():
+    a = {f'item{i}' for i in range(40)}
+    b = {f'item{i}' for i in range(20, 60)}
+    signatures = minhash_signatures([a, b])
+
+    estimate = np.mean(signatures[0] == signatures[1])
+    assert abs(estimate - len(a & b) / len(a | b)) < 0.15
+
+
+def test_similar_recipes_share_ingredients(client, make_user, make_recipe):
+    headers = make_user('alice')
+    stew = make_recipe(headers, title='Chicken Stew', ingredients=STEW)
+    curry = make_recipe(headers, title='Chicken Curry', ingredients=STEW[:4] + ('Curry Powder',))
+    make_recipe(headers, title='Fruit Salad', ingredients=('Mango', 'Banana', 'Apple'))
+
+    response = client.get(f'/api/recipes/{stew}/similar?fields=recipe_id,similarity')
+    assert response.status_code == 200
+    recipes = response.get_json()['recipes']
+    assert [recipe['recipe_id'] for recipe in recipes] == [curry]
+    assert 0.5 < recipes[0]['similarity'] < 1
+
+
+def test_similar_recipes_follow_edits_and_rebuilds(client, make_user, make_recipe):
+    headers = make_user('alice')
+    stew = make_recipe(headers, title='Chicken Stew', ingredients=STEW)
+    salad = make_recipe(headers, title='Fruit Salad', ingredients=('Mango', 'Banana', 'Apple'))
+
+    client.put(f'/api/recipes/{salad}', headers=headers, json={
+        'ingredients': [{'name': name, 'quantity': '1'} for name in STEW]
+    })
+    assert [recipe['recipe_id'] for recipe in client.get(f'/api/recipes/{stew}/similar').get_json()['recipes']] == [
+        salad
+    ]
+
+    assert rebuild_similarity_index() == 2
+    assert [recipe['recipe_id'] for recipe in client.get(f'/api/recipes/{stew}/similar').get_json()['recipes']] == [
+        salad
+    ]
+
+
+def test_similar_recipes_of_a_missing_recipe(client):
+    assert client.get('/api/recipes/999/similar').status_code == 404
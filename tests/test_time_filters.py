@@ -0,0 +1,66 @@
+"""Tests for the total-time and prep-time range filters."""
+
+import pytest
+
+from models import db, Recipe
+from utils import backfill_recipe_total_time
+
+
+@pytest.fixture
+def recipes(make_user, make_recipe):
+    headers = make_user('alice')
+    return {
+        'quick': make_recipe(headers, title='Quick Salad', prep_time=5, cook_time=0),
+        'medium': make_recipe(headers, title='Chicken Stew', prep_time=15, cook_time=30),
+        'slow': make_recipe(headers, title='Slow Roast', prep_time=20, cook_time=180)
+    }
+
+
+def _ids(client, query):
+    response = client.get(f'/api/recipes/discover?{query}')
+    assert response.status_code == 200, response.get_json()
+    return {recipe['recipe_id'] for recipe in response.get_json()['recipes']}
+
+
+def test_total_time_range(client, recipes):
+    assert _ids(client, 'max_total_time=45') == {recipes['quick'], recipes['medium']}
+    assert _ids(client, 'min_total_time=45&max_total_time=60') == {recipes['medium']}
+    assert _ids(client, 'min_total_time=61') == {recipes['slow']}
+
+
+def test_max_prep_time(client, recipes):
+    assert _ids(client, 'max_prep_time=15') == {recipes['quick'], recipes['medium']}
+
+
+def test_total_time_follows_edits(client, make_user, recipes):
+    headers = make_user('alice')
+    client.put(f"/api/recipes/{recipes['slow']}", headers=headers, json={'cook_time': 10})
+    assert recipes['slow'] not in _ids(client, 'min_total_time=61')
+
+
+@pytest.mark.parametrize('query', ['max_total_time=-1', 'min_total_time=soon', 'max_prep_time=1.5'])
+def test_invalid_time_ranges_are_rejected(client, query):
+    assert client.get(f'/api/recipes/discover?{query}').status_code == 400
+
+
+def test_backfill_recomputes_stored_total_time(app, recipes):
+    db.session.execute(db.update(Recipe).values(recipe_total_time=0))
+    db.session.commit()
+
+    backfill_recipe_total_time()
+    assert db.session.get(Recipe, recipes['slow']).recipe_total_time == 200
+
+
+def test_edits_accept_numeric_strings(client, make_user, recipes):
+    headers = make_user('alice')
+    response = client.put(f"/api/recipes/{recipes['slow']}", headers=headers, json={'prep_time': '15'})
+    assert response.status_code == 200, response.get_json()
+    assert db.session.get(Recipe, recipes['slow']).recipe_total_time == 195
+
+
+@pytest.mark.parametrize('payload', [{'prep_time': 'soon'}, {'cook_time': -5}, {'cook_time': [10]}])
+def test_edits_reject_invalid_times(client, make_user, recipes, payload):
+    headers = make_user('alice')
+    response = client.put(f"/api/recipes/{recipes['slow']}", headers=headers, json=payload)
+    assert response.status_code == 400
+    assert db.session.get(Recipe, recipes['slow']).recipe_total_time == 200
@@ -0,0 +1,52 @@
+"""Tests for the Bayesian top-rated sort."""
+
+from utils import refresh_rating_prior
+
+
+def _titles(response):
+    assert response.status_code == 200, response.get_json()
+    return [recipe['title'] for recipe in response.get_json()['recipes']]
+
+
+def _rate(client, make_user, recipe_id, *values):
+    for i, value in enumerate(values):
+        client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user(f'rater{recipe_id}x{i}'),
+                    json={'value': value})
+
+
+def test_top_rated_shrinks_small_samples_towards_the_prior(client, make_user, make_recipe):
+    headers = make_user('alice')
+    once = make_recipe(headers, title='Rated Once')
+    often = make_recipe(headers, title='Rated Often')
+    make_recipe(headers, title='Unrated')
+    _rate(client, make_user, once, 5)
+    _rate(client, make_user, often, 4, 4, 4)
+
+    # Prior 3.0: a single 5 counts for less than three 4s; unrated comes last
+    assert _titles(client.get('/api/recipes/?sort=top_rated')) == ['Rated Often', 'Rated Once', 'Unrated']
+
+
+def test_prior_refresh_reorders_and_changes_etag(client, make_user, make_recipe):
+    headers = make_user('alice')
+    once = make_recipe(headers, title='Rated Once')
+    often = make_recipe(headers, title='Rated Often')
+    _rate(client, make_user, once, 5)
+    _rate(client, make_user, often, 4, 4, 4)
+
+    url = '/api/recipes/?sort=top_rated'
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert _titles(first) == ['Rated Often', 'Rated Once']
+
+    prior_mean, updated = refresh_rating_prior()
+    assert prior_mean == 4.25
+    assert updated == 2
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert _titles(response) == ['Rated Once', 'Rated Often']
+    assert _titles(client.get('/api/recipes/discover?sort=top_rated')) == ['Rated Once', 'Rated Often']
+
+
+def test_invalid_sort_is_rejected(client):
+    assert client.get('/api/recipes/?sort=oldest').status_code == 400
@@ -0,0 +1,91 @@
+"""Tests for the precomputed trending scores."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Rating
+from trending import update_trending, get_trending, RATING_WEIGHT, BOOKMARK_WEIGHT
+
+
+@pytest.fixture
+def now():
+    return datetime.utcnow()
+
+
+def _scores():
+    return dict(get_trending(limit=100))
+
+
+def test_first_run_starts_after_existing_ratings(client, make_user, make_recipe, now):
+    recipe_id = make_recipe(make_user('alice'))
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user('bob'), json={'value': 5})
+
+    assert update_trending(now) == 0
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user('carol'), json={'value': 4})
+    assert update_trending(now) == 1
+    assert _scores() == {recipe_id: RATING_WEIGHT}
+
+
+def test_scores_decay_by_half_life(app, client, make_user, make_recipe, now):
+    recipe_id = make_recipe(make_user('alice'))
+    update_trending(now)
+    client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user('bob'), json={'value': 5})
+    update_trending(now)
+
+    update_trending(now + timedelta(hours=app.config['TRENDING_HALF_LIFE_HOURS']))
+    assert _scores()[recipe_id] == pytest.approx(RATING_WEIGHT / 2)
+
+
+def test_late_committed_ids_below_the_watermark_are_counted_once(client, make_user, make_recipe, now):
+    recipe_id = make_recipe(make_user('alice'))
+    update_trending(now)
+    for name in ('bob', 'carol'):
+        client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user(name), json={'value': 5})
+
+    # The older rating commits only after the run has seen the newer one
+    late = db.session.query(Rating).order_by(Rating.id).first()
+    late_row = {'id': late.id, 'recipe_id': late.recipe_id, 'user_id': late.user_id, 'rating_value': 5}
+    db.session.delete(late)
+    db.session.commit()
+    update_trending(now)
+    assert _scores() == {recipe_id: RATING_WEIGHT}
+
+    db.session.execute(Rating.__table__.insert().values(**late_row))
+    db.session.commit()
+    update_trending(now)
+    assert _scores() == {recipe_id: 2 * RATING_WEIGHT}
+
+    update_trending(now)
+    assert _scores() == {recipe_id: 2 * RATING_WEIGHT}
+
+
+def test_bookmark_toggles_count_once(client, make_user, make_recipe, now):
+    headers = make_user('alice')
+    recipe_id = make_recipe(headers)
+    other_id = make_recipe(headers, title='Beef Stew')
+    update_trending(now)
+    bob = make_user('bob')
+
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=bob)
+    update_trending(now)
+    client.delete(f'/api/recipes/{recipe_id}/bookmark', headers=bob)
+    client.post(f'/api/recipes/{other_id}/bookmark', headers=make_user('carol'))
+    client.post(f'/api/recipes/{recipe_id}/bookmark', headers=bob)
+    update_trending(now)
+
+    assert _scores() == {recipe_id: BOOKMARK_WEIGHT, other_id: BOOKMARK_WEIGHT}
+
+
+def test_trending_endpoint_filters_by_country(client, make_user, make_recipe, now):
+    headers = make_user('alice')
+    kenyan = make_recipe(headers, country='Kenya')
+    italian = make_recipe(headers, title='Pasta', country='Italy')
+    update_trending(now)
+    for recipe_id in (kenyan, italian):
+        client.post(f'/api/recipes/{recipe_id}/rate', headers=make_user(f'fan{recipe_id}'), json={'value': 5})
+    update_trending(now)
+
+    response = client.get('/api/recipes/trending?country=italy')
+    assert response.status_code == 200
+    assert [recipe['recipe_id'] for recipe in response.get_json()['recipes']] == [italian]
@@ -0,0 +1,52 @@
+"""Tests for TF-IDF description search (describe=true)."""
+
+from vector_search import DescriptionVectorIndex, description_index, tokenize
+
+
+def _search(client, query):
+    response = client.get(f'/api/search/recipes?describe=true&q={query}')
+    assert response.status_code == 200, response.get_json()
+    return [recipe['title'] for recipe in response.get_json()['recipes']]
+
+
+def test_tokenize_drops_stop_words_and_numbers():
+    assert tokenize('Stir the sauce for 10 minutes, then SERVE!') == ['stir', 'sauce', 'minutes', 'serve']
+
+
+def test_describe_ranks_by_description_and_procedure(client, make_user, make_recipe):
+    headers = make_user('alice')
+    make_recipe(headers, title='Mac and Cheese', description='Creamy cheesy pasta bake',
+                procedure=('Bake until golden',))
+    make_recipe(headers, title='Weeknight Dal', description='Creamy lentils in one pot',
+                procedure=('Simmer everything in one pot',))
+    make_recipe(headers, title='Green Salad', description='Crunchy and fresh', procedure=('Toss the leaves',))
+
+    assert _search(client, 'creamy+one+pot') == ['Weeknight Dal', 'Mac and Cheese']
+    assert _search(client, 'simmer') == ['Weeknight Dal']
+
+
+def test_describe_follows_edits_and_deletes(client, make_user, make_recipe):
+    headers = make_user('alice')
+    dal = make_recipe(headers, title='Weeknight Dal', description='Creamy lentils in one pot')
+    salad = make_recipe(headers, title='Green Salad', description='Crunchy and fresh')
+    assert _search(client, 'lentils') == ['Weeknight Dal']
+
+    client.put(f'/api/recipes/{salad}', headers=headers, json={'description': 'Lentils with crunchy leaves'})
+    client.delete(f'/api/recipes/{dal}', headers=headers)
+    assert _search(client, 'lentils') == ['Green Salad']
+
+
+def test_pending_rows_rank_like_compacted_ones(app, make_user, make_recipe, monkeypatch):
+    headers = make_user('alice')
+    for i, description in enumerate(('Smoky grilled corn', 'Grilled fish with lime')):
+        make_recipe(headers, title=f'Recipe {i}', description=description)
+    description_index.search('smoky', limit=10)
+
+    make_recipe(headers, title='Chili', description='Smoky bean chili')
+    pending = description_index.search('smoky grilled', limit=10)
+    assert description_index._pending
+
+    monkeypatch.setattr(DescriptionVectorIndex, 'MAX_PENDING', 0)
+    compacted = description_index.search('smoky grilled', limit=10)
+    assert not description_index._pending
+    assert [recipe_id for recipe_id, _ in compacted] == [recipe_id for recipe_id, _ in pending]
@@ -0,0 +1,233 @@
+"""
+Recipe-Room Backend - Trending Recipes
+
+Each rating, bookmark and comment adds its weight to the recipe's trending
+score, and scores halve every TRENDING_HALF_LIFE_HOURS. The scores are
+precomputed in trending_scores by `flask update-trending`, meant to run
+periodically (e.g. every 10 minutes from cron). A run multiplies the stored
+scores by the decay since the previous run and adds only the events newer
+than its ID watermarks, so it never rescans history; requests just read the
+top rows of an index, globally or for one country.
+
+IDs do not commit in order (concurrent transactions, sequence caching), so
+each run also re-scans the last OVERLAP_IDS rows below every watermark.
+What was counted is recorded in trending_events per kind, user and recipe:
+an event is only counted if that user's engagement of that kind with the
+recipe was not already counted in the last INITIAL_HALF_LIVES half-lives,
+which also keeps bookmark toggles and comment threads from adding up.
+
+Ratings and bookmarks carry no timestamps, so they count from the run that
+first sees them. The first run starts their watermarks at the newest
+existing rows and counts the comments of the last INITIAL_HALF_LIVES
+half-lives by their creation time.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, func, select, tuple_
+
+from models import db, Recipe, Rating, Bookmark, Comment, trending_scores, trending_runs, trending_events
+
+RATING_WEIGHT = 1.0
+BOOKMARK_WEIGHT = 2.0
+COMMENT_WEIGHT = 1.5
+# Scores that decayed below this are dropped
+MIN_SCORE = 0.01
+# Comment history counted by the first run, and how long counted
+# engagement is remembered, in half-lives
+INITIAL_HALF_LIVES = 4
+# Rows below each watermark re-scanned by every run
+OVERLAP_IDS = 1000
+# trending_events.te_kind values
+RATING_EVENT, BOOKMARK_EVENT, COMMENT_EVENT = 1, 2, 3
+
+
+def decay_factor(hours: float, half_life: float) -> float:
+    """
+    Get the weight left after some time.
+
+    Args:
+        hours: Elapsed hours
+        half_life: Half-life in hours
+
+    Returns:
+        Factor between 0 and 1
+    """
+    return 0.5 ** (max(hours, 0.0) / half_life)
+
+
+def _max_id(model) -> int:
+    return db.session.query(func.coalesce(func.max(model.id), 0)).scalar()
+
+
+def _count_new_events(kind: int, events: Dict[Tuple[int, int], Tuple[int, float]], now: datetime,
+                      added: Dict[int, float], batch_size: int) -> None:
+    """
+    Add the weight of events whose (user, recipe) is not counted yet for
+    this kind, and record them as counted.
+
+    Args:
+        kind: Event kind (RATING_EVENT, BOOKMARK_EVENT or COMMENT_EVENT)
+        events: (user_id, recipe_id) -> (event ID, weight); a zero weight only records the event
+        now: Time of this run
+        added: Score to add per recipe, updated in place
+        batch_size: Number of keys looked up per statement
+    """
+    keys = sorted(events)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        counted = set(db.session.query(trending_events.c.te_user_id, trending_events.c.te_recipe_id).filter(
+            trending_events.c.te_kind == kind,
+            tuple_(trending_events.c.te_user_id, trending_events.c.te_recipe_id).in_(batch)
+        ))
+        rows = []
+        for user_id, recipe_id in batch:
+            if (user_id, recipe_id) in counted:
+                continue
+            event_id, weight = events[(user_id, recipe_id)]
+            rows.append({'te_kind': kind, 'te_user_id': user_id, 'te_recipe_id': recipe_id,
+                         'te_event_id': event_id, 'te_counted_at': now})
+            if weight:
+                added[recipe_id] += weight
+        if rows:
+            db.session.execute(trending_events.insert(), rows)
+
+
+def update_trending(now: Optional[datetime] = None, batch_size: int = 500) -> int:
+    """
+    Decay the stored trending scores to now, add the ratings, bookmarks and
+    comments created since the previous run and commit.
+
+    Args:
+        now: Time of this run (defaults to the current UTC time)
+        batch_size: Number of recipes written per statement
+
+    Returns:
+        Number of recipes with new events
+    """
+    now = now or datetime.utcnow()
+    half_life = current_app.config.get('TRENDING_HALF_LIFE_HOURS', 48)
+    state = db.session.execute(select(trending_runs).where(trending_runs.c.tr_id == 1)).first()
+    added: Dict[int, float] = defaultdict(float)
+
+    if state is None:
+        # Start at the newest rows; the window below them is recorded as
+        # already counted so later overlap scans skip it
+        last_rating_id = _max_id(Rating)
+        last_bookmark_id = _max_id(Bookmark)
+        last_comment_id = _max_id(Comment)
+        rating_weight = bookmark_weight = 0.0
+        comments = db.session.query(Comment.id, Comment.user_id, Comment.recipe_id, Comment.created_at).filter(
+            Comment.is_deleted == False,
+            Comment.created_at >= now - timedelta(hours=half_life * INITIAL_HALF_LIVES),
+            Comment.id <= last_comment_id
+        )
+    else:
+        factor = decay_factor((now - state.tr_ran_at).total_seconds() / 3600, half_life)
+        db.session.execute(trending_scores.update().values(ts_score=trending_scores.c.ts_score * factor))
+        db.session.execute(trending_scores.delete().where(trending_scores.c.ts_score < MIN_SCORE))
+
+        # Forget engagement counted long ago, unless a re-scan could still see it
+        forget_before = now - timedelta(hours=half_life * INITIAL_HALF_LIVES)
+        for kind, last_id in ((RATING_EVENT, state.tr_last_rating_id),
+                              (BOOKMARK_EVENT, state.tr_last_bookmark_id),
+                              (COMMENT_EVENT, state.tr_last_comment_id)):
+            db.session.execute(trending_events.delete().where(and_(
+                trending_events.c.te_kind == kind,
+                trending_events.c.te_counted_at < forget_before,
+                trending_events.c.te_event_id <= last_id - OVERLAP_IDS
+            )))
+
+        last_rating_id = state.tr_last_rating_id
+        last_bookmark_id = state.tr_last_bookmark_id
+        last_comment_id = state.tr_last_comment_id
+        rating_weight, bookmark_weight = RATING_WEIGHT, BOOKMARK_WEIGHT
+        comments = db.session.query(Comment.id, Comment.user_id, Comment.recipe_id, Comment.created_at).filter(
+            Comment.is_deleted == False,
+            Comment.id > last_comment_id - OVERLAP_IDS
+        )
+
+    ratings = {}
+    for rating_id, user_id, recipe_id in db.session.query(Rating.id, Rating.user_id, Rating.recipe_id).filter(
+        Rating.id > last_rating_id - OVERLAP_IDS
+    ):
+        ratings[(user_id, recipe_id)] = (rating_id, rating_weight)
+        last_rating_id = max(last_rating_id, rating_id)
+
+    bookmarks = {}
+    for bookmark_id, user_id, recipe_id in db.session.query(Bookmark.id, Bookmark.user_id, Bookmark.recipe_id).filter(
+        Bookmark.id > last_bookmark_id - OVERLAP_IDS
+    ):
+        bookmarks[(user_id, recipe_id)] = (bookmark_id, bookmark_weight)
+        last_bookmark_id = max(last_bookmark_id, bookmark_id)
+
+    # The newest comment of a user on a recipe counts (ascending IDs overwrite)
+    latest_comments = {}
+    for comment_id, user_id, recipe_id, created_at in comments.order_by(Comment.id):
+        weight = COMMENT_WEIGHT * decay_factor((now - created_at).total_seconds() / 3600, half_life)
+        latest_comments[(user_id, recipe_id)] = (comment_id, weight)
+        last_comment_id = max(last_comment_id, comment_id)
+
+    _count_new_events(RATING_EVENT, ratings, now, added, batch_size)
+    _count_new_events(BOOKMARK_EVENT, bookmarks, now, added, batch_size)
+    _count_new_events(COMMENT_EVENT, latest_comments, now, added, batch_size)
+
+    recipe_ids = sorted(added)
+    for start in range(0, len(recipe_ids), batch_size):
+        batch = recipe_ids[start:start + batch_size]
+        existing = {recipe_id for (recipe_id,) in db.session.query(trending_scores.c.ts_recipe_id).filter(
+            trending_scores.c.ts_recipe_id.in_(batch)
+        )}
+        updates = [{'b_recipe_id': recipe_id, 'b_score': added[recipe_id]} for recipe_id in batch
+                   if recipe_id in existing]
+        inserts = [{'ts_recipe_id': recipe_id, 'ts_score': added[recipe_id]} for recipe_id in batch
+                   if recipe_id not in existing]
+        if updates:
+            db.session.execute(trending_scores.update().where(
+                trending_scores.c.ts_recipe_id == bindparam('b_recipe_id')
+            ).values(ts_score=trending_scores.c.ts_score + bindparam('b_score')), updates)
+        if inserts:
+            db.session.execute(trending_scores.insert(), inserts)
+
+    # Follow country changes and deletions of the (few) trending recipes
+    db.session.execute(trending_scores.update().values(ts_country_id=select(Recipe.recipe_country_id).where(
+        Recipe.recipe_id == trending_scores.c.ts_recipe_id
+    ).scalar_subquery()))
+    db.session.execute(trending_scores.delete().where(trending_scores.c.ts_recipe_id.in_(
+        select(Recipe.recipe_id).where(Recipe.recipe_is_deleted == True)
+    )))
+
+    progress = {
+        'tr_ran_at': now,
+        'tr_last_rating_id': last_rating_id,
+        'tr_last_bookmark_id': last_bookmark_id,
+        'tr_last_comment_id': last_comment_id
+    }
+    if state is None:
+        db.session.execute(trending_runs.insert().values(tr_id=1, **progress))
+    else:
+        db.session.execute(trending_runs.update().where(trending_runs.c.tr_id == 1).values(**progress))
+    db.session.commit()
+    return len(recipe_ids)
+
+
+def get_trending(limit: int = 20, country_id: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    Get the top trending recipes, as of the last update_trending() run.
+
+    Args:
+        limit: Maximum number of recipes
+        country_id: Only recipes from this country (None for all)
+
+    Returns:
+        List of (recipe_id, score), highest first
+    """
+    query = db.session.query(trending_scores.c.ts_recipe_id, trending_scores.c.ts_score)
+    if country_id is not None:
+        query = query.filter(trending_scores.c.ts_country_id == country_id)
+    return [tuple(row) for row in query.order_by(
+        trending_scores.c.ts_score.desc(), trending_scores.c.ts_recipe_id.desc()
+    ).limit(limit)]
@@ -10,9 +10,46 @@ These functions are designed to be imported by route handlers.
 import cloudinary
 import cloudinary.uploader
 import base64
+import hashlib
+import json
 import re
-from typing import Dict, Optional, List, Any
+from datetime import datetime
+from typing import Dict, Optional, List, Any, Tuple, Set
+from flask import current_app, request, make_response
+from sqlalchemy import func, select, update, case, cast, or_, and_, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.attributes import set_committed_value
+from fieldsets import wants_field, load_only_for_fields
+from cache import recipe_cache, count_cache, response_cache, mark_recipes_changed, bump_catalog_version
+from models import (db, User, Recipe, RecipeGroup, Bookmark, Comment, Rating, Country, recipe_group_members,
+                    group_memberships, recipe_ingredient_terms, rating_prior)
 #validation functions for recipe data
+def validate_recipe_times(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Validate the optional prep_time/cook_time fields, converting numeric
+    strings to int in place.
+    
+    Args:
+        data: Dictionary containing recipe information
+        
+    Returns:
+        Error message string if validation fails, None if valid
+    """
+    for time_field in ['prep_time', 'cook_time']:
+        if time_field in data and data[time_field] is not None:
+            if not isinstance(data[time_field], int):
+                try:
+                    data[time_field] = int(data[time_field])
+                except (ValueError, TypeError):
+                    return f"{time_field} must be a number (minutes)"
+            if data[time_field] < 0:
+                return f"{time_field} cannot be negative"
+            if data[time_field] > 10080:  # 7 days in minutes
+                return f"{time_field} seems unreasonably long (max 7 days)"
+    return None
+
+
 def validate_recipe_data(data: Dict[str, Any]) -> Optional[str]:
     """
     Validate recipe data before creating/updating.
@@ -82,17 +119,9 @@ def validate_recipe_data(data: Dict[str, Any]) -> Optional[str]:
         return "people_served cannot exceed 1000"
     
     # Validate optional time fields if provided
-    for time_field in ['prep_time', 'cook_time']:
-        if time_field in data and data[time_field] is not None:
-            if not isinstance(data[time_field], int):
-                try:
-                    data[time_field] = int(data[time_field])
-                except (ValueError, TypeError):
-                    return f"{time_field} must be a number (minutes)"
-            if data[time_field] < 0:
-                return f"{time_field} cannot be negative"
-            if data[time_field] > 10080:  # 7 days in minutes
-                return f"{time_field} seems unreasonably long (max 7 days)"
+    time_error = validate_recipe_times(data)
+    if time_error:
+        return time_error
     
     # Validate country if provided
     if 'country' in data and data['country']:
@@ -134,10 +163,7 @@ def sanitize_recipe_data(data: Dict[str, Any]) -> Dict[str, Any]:
         sanitized['description'] = None
     
     # Sanitize country
-    if 'country' in data and data['country']:
-        sanitized['country'] = data['country'].strip().title()
-    else:
-        sanitized['country'] = None
+    sanitized['country'] = normalize_country_name(data.get('country'))
     
     # Sanitize ingredients
     if 'ingredients' in data:
@@ -301,6 +327,165 @@ def extract_ingredient_names(ingredients: List[Dict[str, Any]]) -> List[str]:
     """
     return [ing.get('name', '').lower().strip() for ing in ingredients if ing.get('name')]
 
+def normalize_ingredient_term(term: str) -> str:
+    """
+    Normalize an ingredient name or query term for the ingredient index.
+    
+    Args:
+        term: Raw ingredient name
+        
+    Returns:
+        Lowercase term with collapsed whitespace
+    """
+    return ' '.join(term.lower().split())
+
+
+def ingredient_name_terms(name: str) -> Set[str]:
+    """
+    Get the index terms for one ingredient name: the full normalized name
+    and each of its words.
+    
+    Args:
+        name: Ingredient name
+        
+    Returns:
+        Set of normalized terms (empty for a blank name)
+    """
+    name = normalize_ingredient_term(name)
+    if not name:
+        return set()
+    terms = {name}
+    terms.update(word for word in re.findall(r'[^\W\d_]+', name) if len(word) > 1)
+    return terms
+
+
+def ingredient_terms(ingredients: List[Dict[str, Any]]) -> Set[str]:
+    """
+    Get the ingredient index terms for a recipe: every full ingredient name
+    plus its individual words, so "chicken" also finds "chicken breast".
+    Quantities, units and notes are never indexed.
+    
+    Args:
+        ingredients: List of ingredient dictionaries
+        
+    Returns:
+        Set of normalized terms
+    """
+    terms = set()
+    for name in extract_ingredient_names(ingredients or []):
+        terms.update(ingredient_name_terms(name))
+    return terms
+
+
+def sync_recipe_ingredient_terms(recipe: Recipe) -> None:
+    """
+    Replace a recipe's rows in the ingredient index within the current
+    transaction. Soft-deleted recipes are removed from the index.
+    The recipe must have been flushed so it has an ID.
+    
+    Args:
+        recipe: Recipe object
+    """
+    db.session.execute(recipe_ingredient_terms.delete().where(
+        recipe_ingredient_terms.c.rit_recipe_id == recipe.recipe_id
+    ))
+    if recipe.recipe_is_deleted:
+        return
+    
+    terms = ingredient_terms(recipe.recipe_ingredients)
+    if terms:
+        db.session.execute(recipe_ingredient_terms.insert(), [
+            {'rit_recipe_id': recipe.recipe_id, 'rit_term': term} for term in sorted(terms)
+        ])
+
+
+def rebuild_ingredient_index(batch_size: int = 500) -> int:
+    """
+    Rebuild the ingredient index for every non-deleted recipe and commit.
+    
+    Args:
+        batch_size: Number of recipes loaded per batch
+        
+    Returns:
+        Number of recipes indexed
+    """
+    db.session.execute(recipe_ingredient_terms.delete())
+    
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Recipe.recipe_id, Recipe.recipe_ingredients).filter(
+            Recipe.recipe_is_deleted == False,
+            Recipe.recipe_id > last_id
+        ).order_by(Recipe.recipe_id).limit(batch_size).all()
+        if not rows:
+            break
+        
+        entries = [
+            {'rit_recipe_id': recipe_id, 'rit_term': term}
+            for recipe_id, ingredients in rows
+            for term in sorted(ingredient_terms(ingredients))
+        ]
+        if entries:
+            db.session.execute(recipe_ingredient_terms.insert(), entries)
+        indexed += len(rows)
+        last_id = rows[-1].recipe_id
+    
+    bump_catalog_version(db.session)
+    db.session.commit()
+    return indexed
+
+
+def parse_ingredient_terms(raw: Optional[str]) -> List[str]:
+    """
+    Parse a comma-separated ingredient list from a query parameter.
+    
+    Args:
+        raw: Raw query parameter value
+        
+    Returns:
+        List of unique normalized terms, in request order
+    """
+    terms = []
+    for term in (raw or '').split(','):
+        term = normalize_ingredient_term(term)
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def filter_by_ingredients(query, include: List[str], exclude: List[str], match: str = 'all'):
+    """
+    Filter a Recipe query through the ingredient index.
+    
+    Args:
+        query: Recipe query to filter
+        include: Terms the recipe must use
+        exclude: Terms the recipe must not use
+        match: 'all' to require every included term, 'any' for at least one
+        
+    Returns:
+        Filtered query
+    """
+    if include:
+        matching = select(recipe_ingredient_terms.c.rit_recipe_id).where(
+            recipe_ingredient_terms.c.rit_term.in_(include)
+        )
+        if match == 'all' and len(include) > 1:
+            matching = matching.group_by(recipe_ingredient_terms.c.rit_recipe_id).having(
+                func.count(recipe_ingredient_terms.c.rit_term) == len(include)
+            )
+        query = query.filter(Recipe.recipe_id.in_(matching))
+    
+    if exclude:
+        query = query.filter(~Recipe.recipe_id.in_(
+            select(recipe_ingredient_terms.c.rit_recipe_id).where(
+                recipe_ingredient_terms.c.rit_term.in_(exclude)
+            )
+        ))
+    return query
+
+
 def normalize_country_name(country: Optional[str]) -> Optional[str]:
     """
     Normalize country name for consistent storage.
@@ -317,19 +502,233 @@ def normalize_country_name(country: Optional[str]) -> Optional[str]:
     # Remove extra whitespace and capitalize properly
     normalized = ' '.join(country.strip().split()).title()
     
-    # Handle common variations
+    # Handle common variations, with or without dots ('U.S.A.', 'usa')
     country_mappings = {
-        'Usa': 'United States',
-        'Us': 'United States',
-        'U.s.': 'United States',
-        'U.s.a.': 'United States',
-        'Uk': 'United Kingdom',
-        'U.k.': 'United Kingdom',
-        'Uae': 'United Arab Emirates',
-        'U.a.e.': 'United Arab Emirates',
+        'usa': 'United States',
+        'us': 'United States',
+        'uk': 'United Kingdom',
+        'uae': 'United Arab Emirates',
     }
     
-    return country_mappings.get(normalized, normalized)
+    return country_mappings.get(normalized.replace('.', '').replace(' ', '').lower(), normalized)
+
+
+# Canonical country name -> country_id; rows are never renamed, so each
+# worker only has to learn names it has not seen yet
+_country_ids: Dict[str, int] = {}
+
+
+def get_country_id(country: Optional[str], create: bool = False) -> Optional[int]:
+    """
+    Get the countries row ID for a country name.
+    
+    Args:
+        country: Country name (normalized here)
+        create: Whether to insert the country if it does not exist yet
+        
+    Returns:
+        country_id, or None for an empty name or an unknown country
+    """
+    name = normalize_country_name(country)
+    if not name:
+        return None
+    if name in _country_ids:
+        return _country_ids[name]
+    
+    country_id = db.session.query(Country.country_id).filter_by(country_name=name).scalar()
+    if country_id is not None:
+        _country_ids[name] = country_id
+        return country_id
+    if not create:
+        return None
+    
+    try:
+        # Savepoint, so a concurrent insert of the same name only fails this block
+        with db.session.begin_nested():
+            new_country = Country(country_name=name)
+            db.session.add(new_country)
+        # Not memoized until seen committed: the transaction may still roll back
+        return new_country.country_id
+    except IntegrityError:
+        return db.session.query(Country.country_id).filter_by(country_name=name).scalar()
+
+
+def get_country_names(country_ids: List[int]) -> Dict[int, str]:
+    """
+    Look up the names of several countries with one query.
+    
+    Args:
+        country_ids: countries row IDs
+        
+    Returns:
+        Dictionary of country_id -> country name
+    """
+    if not country_ids:
+        return {}
+    return dict(db.session.query(Country.country_id, Country.country_name).filter(
+        Country.country_id.in_(country_ids)
+    ).all())
+
+
+def set_recipe_country(recipe, country: Optional[str]) -> None:
+    """
+    Store a recipe's country in canonical form: the normalized name and a
+    reference to its countries row (created if new).
+    
+    Args:
+        recipe: Recipe object
+        country: Raw country name from the request
+    """
+    recipe.recipe_country = normalize_country_name(country)
+    recipe.recipe_country_id = get_country_id(recipe.recipe_country, create=True)
+
+
+def add_missing_column(model, name: str, ddl: str) -> bool:
+    """
+    Add a column to an existing table created before the column was part
+    of the model (db.create_all() only creates missing tables), together
+    with the model's indexes that include it.
+    
+    Args:
+        model: Model class owning the table
+        name: Column name
+        ddl: Column type and constraints, e.g. 'INTEGER REFERENCES countries (country_id)'
+        
+    Returns:
+        True if the column was added
+    """
+    table = model.__table__
+    
+    def has_column() -> bool:
+        return name in {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    
+    if has_column():
+        return False
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {ddl}'))
+            for index in table.indexes:
+                if name in index.columns:
+                    index.create(conn, checkfirst=True)
+    except Exception:
+        # Another worker starting at the same time may have added it first
+        if has_column():
+            return False
+        raise
+    return True
+
+
+def add_missing_recipe_column(name: str, ddl: str) -> bool:
+    """
+    Add a column to an existing recipes table (see add_missing_column).
+    
+    Args:
+        name: Column name
+        ddl: Column type and constraints
+        
+    Returns:
+        True if the column was added
+    """
+    return add_missing_column(Recipe, name, ddl)
+
+
+# Recipe columns added after the recipes table was first released, in the
+# order they are added to existing databases
+RECIPE_UPGRADE_COLUMNS = (
+    ('recipe_bookmarks_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('recipe_comments_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('recipe_rating_sum', 'INTEGER NOT NULL DEFAULT 0'),
+    ('recipe_rating_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('recipe_average_rating', 'FLOAT NOT NULL DEFAULT 0'),
+    ('recipe_bayesian_rating', 'FLOAT NOT NULL DEFAULT 0'),
+    ('recipe_stats_updated_at', 'TIMESTAMP'),
+    ('recipe_country_id', 'INTEGER REFERENCES countries (country_id)'),
+    ('recipe_total_time', 'INTEGER NOT NULL DEFAULT 0')
+)
+RECIPE_COUNTER_COLUMNS = {'recipe_bookmarks_count', 'recipe_comments_count', 'recipe_rating_sum',
+                          'recipe_rating_count', 'recipe_average_rating', 'recipe_bayesian_rating'}
+
+
+def ensure_schema_columns() -> None:
+    """
+    Bring users and recipes tables created by an older release up to the
+    models: add the missing columns and indexes, then fill the derived
+    columns that were just added (engagement counters, country links,
+    total time). Every user and recipe query selects these columns, so
+    this runs at startup, after db.create_all(), rather than from the
+    backfill commands.
+    """
+    add_missing_column(User, 'updated_at', 'TIMESTAMP')
+    
+    added = {name for name, ddl in RECIPE_UPGRADE_COLUMNS if add_missing_recipe_column(name, ddl)}
+    with db.engine.begin() as conn:
+        for index in Recipe.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    
+    if added & RECIPE_COUNTER_COLUMNS:
+        reconcile_recipe_counters()
+    if 'recipe_country_id' in added:
+        backfill_recipe_countries()
+    if 'recipe_total_time' in added:
+        backfill_recipe_total_time()
+
+
+def backfill_recipe_countries() -> int:
+    """
+    Canonicalize the country of every recipe and link it to the countries
+    table. Runs one UPDATE per distinct stored spelling and commits.
+    
+    Returns:
+        Number of recipe rows updated
+    """
+    updated = 0
+    stored = db.session.query(Recipe.recipe_country, Recipe.recipe_country_id).distinct().all()
+    for raw_country, country_id in stored:
+        name = normalize_country_name(raw_country)
+        new_country_id = get_country_id(name, create=True)
+        if raw_country == name and country_id == new_country_id:
+            continue
+        condition = Recipe.recipe_country.is_(None) if raw_country is None else Recipe.recipe_country == raw_country
+        result = db.session.execute(
+            update(Recipe).where(
+                condition,
+                Recipe.recipe_country_id.is_(None) if country_id is None else Recipe.recipe_country_id == country_id
+            ).values(
+                recipe_country=name,
+                recipe_country_id=new_country_id,
+                # Canonical spelling, not an edit: keep the recipe's own timestamp
+                recipe_updated_at=Recipe.recipe_updated_at
+            ).execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    
+    if updated:
+        bump_catalog_version(db.session)
+    db.session.commit()
+    recipe_cache.clear()
+    return updated
+
+
+def backfill_recipe_total_time() -> int:
+    """
+    Recompute the stored recipe_total_time of every recipe with one bulk
+    UPDATE. Commits.
+    
+    Returns:
+        Number of recipe rows updated
+    """
+    total_time = func.coalesce(Recipe.recipe_prep_time, 0) + func.coalesce(Recipe.recipe_cook_time, 0)
+    result = db.session.execute(
+        update(Recipe).where(Recipe.recipe_total_time != total_time).values(
+            recipe_total_time=total_time,
+            # Derived value, not an edit: keep the recipe's own timestamp
+            recipe_updated_at=Recipe.recipe_updated_at
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        bump_catalog_version(db.session)
+    db.session.commit()
+    return result.rowcount
 
 # permission checks for recipe operations
 def can_edit_recipe(recipe, user_id: int, groups: Optional[List] = None) -> bool:
@@ -374,33 +773,717 @@ def can_delete_recipe(recipe, user_id: int) -> bool:
     return recipe.recipe_owner_id == user_id
 
 # recipe data formatting for API responses
-def format_recipe_for_api(recipe, include_full_details: bool = True) -> Dict[str, Any]:
+def format_recipe_for_api(recipe, include_full_details: bool = True, summary: bool = False,
+                          fields: Optional[Set[str]] = None) -> Dict[str, Any]:
     """
     Format recipe data for API response with consistent structure.
     
     Args:
         recipe: Recipe object
         include_full_details: Whether to include all related data
+        summary: Whether to leave out the ingredients and procedure
+        fields: Optional sparse fieldset (see fieldsets.parse_fields)
         
     Returns:
         Formatted recipe dictionary
     """
     return recipe.to_dict(
         include_owner=include_full_details,
-        include_stats=include_full_details
+        include_stats=include_full_details,
+        summary=summary,
+        fields=fields
     )
-def bulk_format_recipes(recipes: List, include_full_details: bool = False) -> List[Dict[str, Any]]:
+
+
+def is_summary_view(view: Optional[str], fields: Optional[Set[str]] = None) -> bool:
+    """
+    Check whether a list request wants the summary recipe representation.
+    Summary is the default; `view=full` opts back into the full recipe, and
+    an explicit `fields=` projection takes precedence over both.
+    
+    Args:
+        view: Value of the `view` query parameter
+        fields: Parsed `fields` query parameter
+        
+    Returns:
+        True for the summary representation, False otherwise
+    """
+    if fields is not None:
+        return False
+    return (view or 'summary').lower() != 'full'
+
+
+def apply_recipe_view(query, summary: bool, fields: Optional[Set[str]] = None):
+    """
+    Keep unneeded columns out of a recipe query.
+    With a sparse fieldset only the columns behind the requested fields are
+    loaded; for summary views the heavy JSON columns are deferred. Skipped
+    columns use raiseload, so they are never fetched, not even lazily.
+    
+    Args:
+        query: Recipe query
+        summary: Whether the summary representation is being served
+        fields: Optional sparse fieldset (see fieldsets.parse_fields)
+        
+    Returns:
+        The query with the loader options applied
+    """
+    if fields is not None:
+        return query.options(load_only_for_fields(Recipe, fields))
+    if not summary:
+        return query
+    return query.options(
+        defer(Recipe.recipe_ingredients, raiseload=True),
+        defer(Recipe.recipe_procedure, raiseload=True)
+    )
+
+
+# Bayesian rating: the prior counts as this many ratings of the global mean
+BAYESIAN_PRIOR_WEIGHT = 10
+# Prior mean until the first `flask refresh-rating-prior` (middle of 1-5)
+DEFAULT_PRIOR_MEAN = 3.0
+
+
+def bayesian_rating_expression(rating_sum, rating_count):
+    """
+    Build the SQL expression of a Bayesian average rating:
+    (BAYESIAN_PRIOR_WEIGHT * prior mean + rating sum) / (BAYESIAN_PRIOR_WEIGHT + rating count),
+    with the prior mean read from rating_prior in the same statement.
+    Unrated recipes get 0, so they sort after every rated one.
+    
+    Args:
+        rating_sum: Expression of the sum of rating values
+        rating_count: Expression of the number of ratings
+        
+    Returns:
+        SQL expression
+    """
+    prior_mean = func.coalesce(
+        select(rating_prior.c.rp_mean).where(rating_prior.c.rp_id == 1).scalar_subquery(),
+        DEFAULT_PRIOR_MEAN
+    )
+    return case(
+        (rating_count > 0, (BAYESIAN_PRIOR_WEIGHT * prior_mean + cast(rating_sum, db.Float)) /
+         (BAYESIAN_PRIOR_WEIGHT + rating_count)),
+        else_=0.0
+    )
+
+
+def adjust_recipe_counters(recipe_id: int, bookmarks: int = 0, comments: int = 0,
+                           rating_sum: int = 0, rating_count: int = 0) -> None:
+    """
+    Apply deltas to a recipe's denormalized engagement counters.
+    Runs as a single atomic UPDATE in the caller's transaction, so the
+    counters are committed together with the bookmark/rating/comment change.
+    
+    Args:
+        recipe_id: ID of the recipe to update
+        bookmarks: Change in bookmark count
+        comments: Change in (non-deleted) comment count
+        rating_sum: Change in the sum of rating values
+        rating_count: Change in the number of ratings
+    """
+    new_sum = Recipe.recipe_rating_sum + rating_sum
+    new_count = Recipe.recipe_rating_count + rating_count
+    
+    Recipe.query.filter_by(recipe_id=recipe_id).update({
+        Recipe.recipe_bookmarks_count: Recipe.recipe_bookmarks_count + bookmarks,
+        Recipe.recipe_comments_count: Recipe.recipe_comments_count + comments,
+        Recipe.recipe_rating_sum: new_sum,
+        Recipe.recipe_rating_count: new_count,
+        Recipe.recipe_average_rating: case(
+            (new_count > 0, cast(new_sum, db.Float) / new_count),
+            else_=0.0
+        ),
+        Recipe.recipe_bayesian_rating: bayesian_rating_expression(new_sum, new_count),
+        Recipe.recipe_stats_updated_at: datetime.utcnow(),
+        # Engagement is not an edit, keep the recipe's own timestamp untouched
+        Recipe.recipe_updated_at: Recipe.recipe_updated_at
+    }, synchronize_session=False)
+    mark_recipes_changed(db.session, recipe_id)
+
+
+def reconcile_recipe_counters() -> int:
+    """
+    Recompute every recipe's engagement counters from the bookmarks,
+    comments and ratings tables with one bulk UPDATE. Only rows whose
+    counters drifted are written, and their recipe_stats_updated_at is
+    bumped so ETags built from it change.
+    
+    Returns:
+        Number of recipe rows corrected
+    """
+    bookmarks_count = select(func.count(Bookmark.id)).where(
+        Bookmark.recipe_id == Recipe.recipe_id
+    ).scalar_subquery()
+    comments_count = select(func.count(Comment.id)).where(
+        Comment.recipe_id == Recipe.recipe_id,
+        Comment.is_deleted.is_(False)
+    ).scalar_subquery()
+    rating_sum = select(func.coalesce(func.sum(Rating.rating_value), 0)).where(
+        Rating.recipe_id == Recipe.recipe_id
+    ).scalar_subquery()
+    rating_count = select(func.count(Rating.id)).where(
+        Rating.recipe_id == Recipe.recipe_id
+    ).scalar_subquery()
+    average_rating = select(func.coalesce(func.avg(Rating.rating_value), 0)).where(
+        Rating.recipe_id == Recipe.recipe_id
+    ).scalar_subquery()
+    
+    result = db.session.execute(
+        update(Recipe).where(or_(
+            Recipe.recipe_bookmarks_count.is_distinct_from(bookmarks_count),
+            Recipe.recipe_comments_count.is_distinct_from(comments_count),
+            Recipe.recipe_rating_sum.is_distinct_from(rating_sum),
+            Recipe.recipe_rating_count.is_distinct_from(rating_count)
+        )).values(
+            recipe_bookmarks_count=bookmarks_count,
+            recipe_comments_count=comments_count,
+            recipe_rating_sum=rating_sum,
+            recipe_rating_count=rating_count,
+            recipe_average_rating=average_rating,
+            recipe_bayesian_rating=bayesian_rating_expression(rating_sum, rating_count),
+            recipe_stats_updated_at=datetime.utcnow(),
+            recipe_updated_at=Recipe.recipe_updated_at
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        bump_catalog_version(db.session)
+    db.session.commit()
+    if result.rowcount:
+        recipe_cache.clear()
+        response_cache.invalidate()
+    return result.rowcount
+
+
+def refresh_rating_prior() -> Tuple[float, int]:
+    """
+    Recompute the global prior mean rating from the recipe counters and
+    every recipe's Bayesian rating with it (one bulk UPDATE). Commits.
+    
+    Returns:
+        Tuple of (prior mean, number of recipe rows updated)
+    """
+    rating_sum, rating_count = db.session.query(
+        func.coalesce(func.sum(Recipe.recipe_rating_sum), 0),
+        func.coalesce(func.sum(Recipe.recipe_rating_count), 0)
+    ).filter(Recipe.recipe_is_deleted == False).one()
+    prior_mean = rating_sum / rating_count if rating_count else DEFAULT_PRIOR_MEAN
+    
+    values = {'rp_mean': prior_mean, 'rp_updated_at': datetime.utcnow()}
+    if db.session.execute(rating_prior.update().where(rating_prior.c.rp_id == 1).values(**values)).rowcount == 0:
+        db.session.execute(rating_prior.insert().values(rp_id=1, **values))
+    
+    bayesian_rating = bayesian_rating_expression(Recipe.recipe_rating_sum, Recipe.recipe_rating_count)
+    result = db.session.execute(
+        update(Recipe).where(Recipe.recipe_bayesian_rating != bayesian_rating).values(
+            recipe_bayesian_rating=bayesian_rating,
+            # Derived value, not an edit: keep the recipe's own timestamp but
+            # bump the stats one so top-rated ETags change with the order
+            recipe_stats_updated_at=datetime.utcnow(),
+            recipe_updated_at=Recipe.recipe_updated_at
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        bump_catalog_version(db.session)
+    db.session.commit()
+    if result.rowcount:
+        recipe_cache.clear()
+        response_cache.invalidate()
+    return prior_mean, result.rowcount
+
+
+def preload_recipe_owners(recipes: List) -> None:
+    """
+    Load the owners of many recipes with a single query and attach them
+    to each recipe, so recipe.recipe_owner never triggers its own query.
+    
+    Args:
+        recipes: List of Recipe objects
+    """
+    owner_ids = {recipe.recipe_owner_id for recipe in recipes}
+    if not owner_ids:
+        return
+    
+    owners = {user.id: user for user in User.query.filter(User.id.in_(owner_ids))}
+    for recipe in recipes:
+        set_committed_value(recipe, 'recipe_owner', owners.get(recipe.recipe_owner_id))
+
+
+def bulk_format_recipes(recipes: List, include_full_details: bool = False,
+                        summary: bool = False, fields: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
     """
     Format multiple recipes for API response.
+    Owners are loaded for the whole list up front (only when requested) and
+    stats come from the recipe counter columns, so the number of queries
+    does not grow with the number of recipes.
     
     Args:
         recipes: List of Recipe objects
         include_full_details: Whether to include all related data
+        summary: Whether to leave out the ingredients and procedure
+        fields: Optional sparse fieldset (see fieldsets.parse_fields)
         
     Returns:
         List of formatted recipe dictionaries
     """
+    if include_full_details and wants_field(fields, 'owner'):
+        preload_recipe_owners(recipes)
+    
     return [
-        format_recipe_for_api(recipe, include_full_details)
+        format_recipe_for_api(recipe, include_full_details, summary, fields)
         for recipe in recipes
-    ]
\ No newline at end of file
+    ]
+
+
+# search facets: (label, lower bound, upper bound or None), lowest first;
+# rating buckets exclude their upper bound (3.5 is in 3-4, 4.0 in 4-5)
+PEOPLE_SERVED_BUCKETS = [('1-2', 1, 2), ('3-4', 3, 4), ('5-6', 5, 6), ('7+', 7, None)]
+TOTAL_TIME_BUCKETS = [('0-15', 0, 15), ('16-30', 16, 30), ('31-60', 31, 60), ('61+', 61, None)]
+RATING_BUCKETS = [('1-2', 1, 2), ('2-3', 2, 3), ('3-4', 3, 4), ('4-5', 4, None)]
+FACET_NAMES = ('country', 'people_served', 'total_time', 'rating')
+
+
+def _bucket_case(column, buckets, else_label: str, inclusive: bool = True):
+    """CASE expression mapping a numeric column to its bucket label."""
+    whens = []
+    for label, low, high in buckets:
+        if high is None:
+            whens.append((column >= low, label))
+        elif inclusive:
+            whens.append((and_(column >= low, column <= high), label))
+        else:
+            whens.append((and_(column >= low, column < high), label))
+    return case(*whens, else_=else_label)
+
+
+def compute_search_facets(query) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count the recipes matched by a search query per country, people served
+    bucket, total time bucket and rating bucket with a single statement.
+    PostgreSQL uses GROUPING SETS; other databases group by all four
+    bucket columns at once and the per-facet totals are summed here.
+    
+    Args:
+        query: Filtered Recipe search query (ordering and extra columns are ignored)
+        
+    Returns:
+        Dictionary of facet name -> list of {'value', 'count'}; countries are
+        sorted by count, buckets in their natural order
+    """
+    buckets = query.order_by(None).with_entities(
+        Recipe.recipe_country_id.label('country'),
+        _bucket_case(Recipe.recipe_people_served, PEOPLE_SERVED_BUCKETS, 'other').label('people_served'),
+        case(
+            (and_(Recipe.recipe_prep_time.is_(None), Recipe.recipe_cook_time.is_(None)), 'unknown'),
+            else_=_bucket_case(Recipe.recipe_total_time, TOTAL_TIME_BUCKETS, 'unknown')
+        ).label('total_time'),
+        case(
+            (Recipe.recipe_rating_count == 0, 'unrated'),
+            else_=_bucket_case(Recipe.recipe_average_rating, RATING_BUCKETS, 'unrated', inclusive=False)
+        ).label('rating')
+    ).subquery('facet_buckets')
+    columns = [buckets.c[name] for name in FACET_NAMES]
+    
+    counts = {name: {} for name in FACET_NAMES}
+    if db.session.get_bind().dialect.name == 'postgresql':
+        rows = db.session.query(
+            *columns,
+            *(func.grouping(column) for column in columns),
+            func.count()
+        ).group_by(func.grouping_sets(*columns)).all()
+        for row in rows:
+            values, grouping, count = row[:4], row[4:8], row[8]
+            for name, value, not_grouped in zip(FACET_NAMES, values, grouping):
+                if not not_grouped:
+                    counts[name][value] = count
+    else:
+        rows = db.session.query(*columns, func.count()).group_by(*columns).all()
+        for row in rows:
+            for name, value in zip(FACET_NAMES, row[:4]):
+                counts[name][value] = counts[name].get(value, 0) + row[4]
+    
+    # Country facets are grouped by key; name them with one lookup
+    country_names = get_country_names([value for value in counts['country'] if value is not None])
+    countries = {}
+    for country_id, count in counts['country'].items():
+        name = country_names.get(country_id, 'Unknown')
+        countries[name] = countries.get(name, 0) + count
+    counts['country'] = countries
+    
+    bucket_order = {
+        'people_served': [label for label, _, _ in PEOPLE_SERVED_BUCKETS] + ['other'],
+        'total_time': [label for label, _, _ in TOTAL_TIME_BUCKETS] + ['unknown'],
+        'rating': [label for label, _, _ in RATING_BUCKETS] + ['unrated']
+    }
+    facets = {
+        'country': [
+            {'value': value, 'count': count}
+            for value, count in sorted(counts['country'].items(), key=lambda item: (-item[1], item[0]))
+        ]
+    }
+    for name, order in bucket_order.items():
+        facets[name] = [{'value': label, 'count': counts[name][label]} for label in order if label in counts[name]]
+    return facets
+
+
+# keyset (cursor) pagination for recipe feeds
+# sort parameter -> column recipe lists are ordered by (descending, ties
+# broken by recipe_id descending); each has a matching keyset index
+RECIPE_SORT_COLUMNS = {
+    'newest': Recipe.recipe_created_at,
+    'top_rated': Recipe.recipe_bayesian_rating
+}
+
+
+def parse_recipe_sort(raw: Optional[str]) -> str:
+    """
+    Validate the sort query parameter of a recipe list.
+    
+    Args:
+        raw: Value of the `sort` query parameter (newest by default)
+        
+    Returns:
+        Key of RECIPE_SORT_COLUMNS
+        
+    Raises:
+        ValueError with a client-facing message if the sort is unknown
+    """
+    sort = (raw or 'newest').lower()
+    if sort not in RECIPE_SORT_COLUMNS:
+        raise ValueError(f"sort must be one of: {', '.join(RECIPE_SORT_COLUMNS)}")
+    return sort
+
+
+def recipe_sort_order(sort: str = 'newest') -> Tuple:
+    """
+    Get the ORDER BY clauses of a recipe sort.
+    
+    Args:
+        sort: Key of RECIPE_SORT_COLUMNS
+        
+    Returns:
+        Tuple of order clauses
+    """
+    return RECIPE_SORT_COLUMNS[sort].desc(), Recipe.recipe_id.desc()
+
+
+def encode_recipe_cursor(recipe, sort: str = 'newest') -> str:
+    """
+    Build an opaque cursor pointing just past the given recipe.
+    
+    Args:
+        recipe: Last Recipe object of the current page
+        sort: Key of RECIPE_SORT_COLUMNS the page is ordered by
+        
+    Returns:
+        URL-safe cursor string encoding (sort value, recipe_id)
+    """
+    value = getattr(recipe, RECIPE_SORT_COLUMNS[sort].key)
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value, recipe.recipe_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_recipe_cursor(cursor: str, sort: str = 'newest'):
+    """
+    Decode a cursor produced by encode_recipe_cursor().
+    
+    Args:
+        cursor: Opaque cursor string from a previous response
+        sort: Key of RECIPE_SORT_COLUMNS the cursor was built for
+        
+    Returns:
+        Tuple of (sort value, recipe_id); the value is the created_at
+        datetime for the newest sort
+        
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, recipe_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if sort == 'newest':
+            return datetime.fromisoformat(value), int(recipe_id)
+        return float(value), int(recipe_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def paginate_recipes_by_cursor(query, cursor: Optional[str], per_page: int, sort: str = 'newest'):
+    """
+    Fetch one page of a recipe query using keyset pagination.
+    Seeks past the cursor on (sort column, recipe_id) instead of using
+    OFFSET, and fetches one extra row to detect a next page instead of
+    running a COUNT, so every page costs the same.
+    
+    Args:
+        query: Filtered Recipe query (ordering is applied here)
+        cursor: Cursor from the previous page, or empty/None for the first page
+        per_page: Number of recipes per page
+        sort: Key of RECIPE_SORT_COLUMNS
+        
+    Returns:
+        Tuple of (list of Recipe objects, next cursor or None)
+        
+    Raises:
+        ValueError if the cursor is malformed
+    """
+    column = RECIPE_SORT_COLUMNS[sort]
+    if cursor:
+        value, recipe_id = decode_recipe_cursor(cursor, sort)
+        query = query.filter(or_(
+            column < value,
+            and_(column == value, Recipe.recipe_id < recipe_id)
+        ))
+    
+    rows = query.order_by(*recipe_sort_order(sort)).limit(per_page + 1).all()
+    
+    recipes = rows[:per_page]
+    next_cursor = encode_recipe_cursor(recipes[-1], sort) if len(rows) > per_page else None
+    return recipes, next_cursor
+
+# offset pagination with optional, cached total counts
+def count_query_rows(query) -> int:
+    """
+    Run a plain SELECT COUNT(*) for a filtered (ungrouped) query.
+    Unlike Query.count() this does not wrap the full column list in a
+    subquery, so deferred columns stay out of the count as well.
+    
+    Args:
+        query: Query whose rows should be counted
+        
+    Returns:
+        Number of rows matched by the query
+    """
+    return query.order_by(None).with_entities(func.count()).scalar()
+
+
+def get_cached_count(key: str, query) -> int:
+    """
+    Return COUNT(*) for a query, served from a short-TTL cache.
+    The TTL comes from the COUNT_CACHE_TTL config value (seconds).
+    
+    Args:
+        key: Cache key identifying the counted collection
+        query: Query whose rows should be counted
+        
+    Returns:
+        Number of rows matched by the query
+    """
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    generation = count_cache.generation()
+    total = count_query_rows(query)
+    count_cache.set(key, total, generation=generation)
+    return total
+
+
+def invalidate_counts(*keys: str) -> None:
+    """
+    Drop cached counts after a write changes the counted collections.
+    
+    Args:
+        keys: Cache keys to invalidate
+    """
+    count_cache.delete(*keys)
+
+
+def paginate_query(query, page: int, per_page: int, include_total: bool = True,
+                   count_key: Optional[str] = None):
+    """
+    Fetch one page of an ordered query using LIMIT/OFFSET.
+    One extra row is fetched to work out has_next, so the COUNT(*) is only
+    run (or read from the count cache) when totals are requested.
+    
+    Args:
+        query: Ordered query to paginate
+        page: 1-based page number
+        per_page: Number of items per page
+        include_total: Whether to report total_items/total_pages
+        count_key: Count cache key; counts are not cached when omitted
+        
+    Returns:
+        Tuple of (list of items, pagination dictionary)
+    """
+    page = max(page, 1)
+    per_page = max(per_page, 1)
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    items = rows[:per_page]
+    
+    pagination = {
+        'current_page': page,
+        'per_page': per_page,
+        'has_next': len(rows) > per_page,
+        'has_prev': page > 1
+    }
+    
+    if include_total:
+        if count_key:
+            total = get_cached_count(count_key, query)
+        else:
+            total = count_query_rows(query)
+        pagination['total_items'] = total
+        pagination['total_pages'] = (total + per_page - 1) // per_page
+    
+    return items, pagination
+
+# conditional GET support (ETag / Last-Modified / 304)
+def get_recipe_version(recipe_id: int):
+    """
+    Look up everything a recipe's detail payload depends on, in one indexed
+    query: its own timestamps, its engagement counters and its owner profile.
+    
+    Args:
+        recipe_id: ID of the recipe
+        
+    Returns:
+        Row of version values, or None if the recipe does not exist
+    """
+    return db.session.query(
+        Recipe.recipe_updated_at,
+        Recipe.recipe_stats_updated_at,
+        Recipe.recipe_bookmarks_count,
+        Recipe.recipe_comments_count,
+        Recipe.recipe_rating_sum,
+        Recipe.recipe_rating_count,
+        User.username,
+        User.profile_image
+    ).join(User, User.id == Recipe.recipe_owner_id).filter(
+        Recipe.recipe_id == recipe_id,
+        Recipe.recipe_is_deleted.is_(False)
+    ).first()
+
+
+def load_recipe_detail(recipe_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Build the recipe detail cache entry: the version values used for the
+    ETag together with the full serialized recipe.
+    
+    Args:
+        recipe_id: ID of the recipe
+        
+    Returns:
+        Dictionary with 'version' and 'recipe', or None if the recipe does not exist
+    """
+    version = get_recipe_version(recipe_id)
+    if not version:
+        return None
+    
+    recipe = Recipe.query.filter_by(recipe_id=recipe_id, recipe_is_deleted=False).first()
+    if not recipe:
+        return None
+    
+    return {
+        'version': tuple(version),
+        'recipe': recipe.to_dict(include_owner=True, include_stats=True)
+    }
+
+
+def get_group_version(group_id: int):
+    """
+    Get the version of a group and the recipes in it with one query.
+    Adding/removing members or recipes bumps group_updated_at; recipe edits
+    and engagement are covered by the latest recipe timestamps, and renamed
+    members or recipe owners by the latest of their profile timestamps.
+    
+    Args:
+        group_id: ID of the group
+        
+    Returns:
+        Tuple of (group_updated_at, latest recipe_updated_at, latest recipe_stats_updated_at,
+        latest member/owner updated_at)
+    """
+    group_recipe_ids = select(recipe_group_members.c.rgm_recipe_id).where(
+        recipe_group_members.c.rgm_group_id == group_id
+    )
+    recipes_updated_at = select(func.max(Recipe.recipe_updated_at)).where(
+        Recipe.recipe_id.in_(group_recipe_ids)
+    ).scalar_subquery()
+    stats_updated_at = select(func.max(Recipe.recipe_stats_updated_at)).where(
+        Recipe.recipe_id.in_(group_recipe_ids)
+    ).scalar_subquery()
+    users_updated_at = select(func.max(User.updated_at)).where(or_(
+        User.id.in_(select(group_memberships.c.gm_user_id).where(group_memberships.c.gm_group_id == group_id)),
+        User.id.in_(select(Recipe.recipe_owner_id).where(Recipe.recipe_id.in_(group_recipe_ids)))
+    )).scalar_subquery()
+    
+    return tuple(db.session.query(
+        RecipeGroup.group_updated_at,
+        recipes_updated_at,
+        stats_updated_at,
+        users_updated_at
+    ).filter(RecipeGroup.group_id == group_id).one())
+
+
+def build_etag(*version_parts) -> str:
+    """
+    Build a strong ETag from version values, the request path and its query
+    parameters (which select the representation, e.g. fields= or view=).
+    
+    Args:
+        version_parts: Values that change whenever the response would
+        
+    Returns:
+        ETag value (unquoted)
+    """
+    representation = sorted(request.args.items(multi=True))
+    digest = hashlib.sha1(repr((request.path, version_parts, representation)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def latest_timestamp(*timestamps) -> Optional[datetime]:
+    """
+    Return the most recent of several optional timestamps.
+    
+    Args:
+        timestamps: datetime values, None entries are ignored
+        
+    Returns:
+        The latest timestamp, or None if none were given
+    """
+    present = [ts for ts in timestamps if ts is not None]
+    return max(present) if present else None
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None):
+    """
+    Return a 304 response if the client's cached copy is still current.
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when no ETag was sent.
+    
+    Args:
+        etag: Current ETag of the resource
+        last_modified: Current Last-Modified time of the resource
+        
+    Returns:
+        A 304 response, or None if the full response must be built
+    """
+    if request.if_none_match:
+        if not request.if_none_match.contains(etag):
+            return None
+    elif not (last_modified and request.if_modified_since
+              and last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)):
+        return None
+    
+    response = make_response('', 304)
+    return set_cache_validators(response, etag, last_modified)
+
+
+def set_cache_validators(response, etag: str, last_modified: Optional[datetime] = None):
+    """
+    Attach ETag and Last-Modified headers to a response.
+    
+    Args:
+        response: Flask response object
+        etag: ETag value (unquoted)
+        last_modified: Last-Modified time, if known
+        
+    Returns:
+        The same response
+    """
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
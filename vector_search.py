@@ -0,0 +1,237 @@
+"""
+Recipe-Room Backend - Description Vector Search
+
+"Search by description": recipes ranked by the cosine similarity between
+the query and TF-IDF vectors of their description and procedure
+instructions, for queries like "creamy one-pot weeknight" that describe a
+dish rather than name it.
+
+The vectors form a sparse matrix held in each worker's memory, stored term
+by term (compressed sparse columns) so a query is one sparse matrix-vector
+product over the columns of its terms. It is kept current like the other
+recipe indexes (see recipe_indexes.RecipeIndex): changed recipes are
+re-read as deltas and scored separately until enough accumulate, then the
+matrix is recompacted in memory with fresh IDF weights.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import case
+
+from models import db, Recipe
+from recipe_indexes import RecipeIndex
+
+_TOKEN_PATTERN = re.compile(r'[^\W\d_]{2,}', re.UNICODE)
+STOP_WORDS = frozenset((
+    'a', 'about', 'after', 'again', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'before',
+    'but', 'by', 'can', 'do', 'each', 'for', 'from', 'has', 'have', 'if', 'in', 'into', 'is', 'it',
+    'its', 'let', 'more', 'of', 'off', 'on', 'or', 'other', 'out', 'over', 'so', 'some', 'than',
+    'that', 'the', 'then', 'there', 'these', 'this', 'to', 'too', 'until', 'up', 'very', 'was',
+    'we', 'when', 'while', 'will', 'with', 'you', 'your'
+))
+
+
+def tokenize(value: str) -> List[str]:
+    """
+    Split text into lowercase word tokens without stop words.
+
+    Args:
+        value: Text to split
+
+    Returns:
+        List of tokens
+    """
+    return [token for token in _TOKEN_PATTERN.findall((value or '').lower()) if token not in STOP_WORDS]
+
+
+def _procedure_text(procedure) -> str:
+    """Join the instructions of a procedure (list of step objects)."""
+    if isinstance(procedure, str):
+        return procedure
+    return ' '.join(
+        step.get('instruction') or '' if isinstance(step, dict) else str(step)
+        for step in procedure or []
+    )
+
+
+def _term_weights(tokens: List[str]) -> Dict[str, float]:
+    """Sublinear term frequencies (1 + log tf)."""
+    return {term: 1.0 + math.log(count) for term, count in Counter(tokens).items()}
+
+
+class DescriptionVectorIndex(RecipeIndex):
+    """
+    TF-IDF vectors of recipe descriptions and procedures. Compacted rows
+    live in a term-major sparse matrix; rows changed since the last
+    compaction are kept apart (pending) and the rows they replace are
+    masked out, until MAX_PENDING of them trigger a recompaction.
+    """
+
+    COLUMNS = (Recipe.recipe_id, Recipe.recipe_description, Recipe.recipe_procedure)
+
+    # Pending rows tolerated before recompacting (or a tenth of the rows, if more)
+    MAX_PENDING = 1000
+
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def add(self, row) -> None:
+        text = f'{row.recipe_description or ""} {_procedure_text(row.recipe_procedure)}'
+        weights = _term_weights(tokenize(text))
+        if not weights:
+            return
+        self._docs[row.recipe_id] = weights
+        self._df.update(weights.keys())
+        self._pending.add(row.recipe_id)
+
+    def remove(self, recipe_id: int) -> None:
+        weights = self._docs.pop(recipe_id, None)
+        if weights is None:
+            return
+        self._df.subtract(weights.keys())
+        self._pending.discard(recipe_id)
+        slot = self._slots.pop(recipe_id, None)
+        if slot is not None:
+            self._live[slot] = False
+
+    def clear(self) -> None:
+        self._docs: Dict[int, Dict[str, float]] = {}
+        self._df: Counter = Counter()
+        self._pending: Set[int] = set()
+        # Compacted matrix: column of term t = entries _indptr[t]:_indptr[t + 1]
+        # of _rows (slot) and _data (normalized TF-IDF weight)
+        self._terms: Dict[str, int] = {}
+        self._idf = np.zeros(0)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._data = np.zeros(0)
+        self._slot_ids = np.zeros(0, dtype=np.int64)
+        self._live = np.zeros(0, dtype=bool)
+        self._slots: Dict[int, int] = {}
+        self._doc_count = 0
+
+    def _idf_of(self, term: str) -> float:
+        """IDF of a term as of the last compaction (smoothed; unseen terms get the maximum)."""
+        term_id = self._terms.get(term)
+        if term_id is not None:
+            return self._idf[term_id]
+        return math.log((1 + self._doc_count) / (1 + self._df.get(term, 0))) + 1.0
+
+    def _compact(self) -> None:
+        """Rebuild the matrix from every indexed row with current IDF weights."""
+        recipe_ids = list(self._docs)
+        terms: Dict[str, int] = {}
+        slots, term_ids, weights = [], [], []
+        for slot, recipe_id in enumerate(recipe_ids):
+            for term, weight in self._docs[recipe_id].items():
+                slots.append(slot)
+                term_ids.append(terms.setdefault(term, len(terms)))
+                weights.append(weight)
+
+        slots = np.asarray(slots, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        df = np.zeros(len(terms))
+        for term, term_id in terms.items():
+            df[term_id] = self._df[term]
+        idf = np.log((1 + len(recipe_ids)) / (1 + df)) + 1.0
+
+        data = np.asarray(weights, dtype=np.float64) * idf[term_ids]
+        norms = np.sqrt(np.bincount(slots, data * data, minlength=len(recipe_ids)))
+        data /= norms[slots]
+
+        order = np.argsort(term_ids, kind='stable')
+        self._terms = terms
+        self._idf = idf
+        self._indptr = np.concatenate(([0], np.cumsum(np.bincount(term_ids, minlength=len(terms)))))
+        self._rows = slots[order]
+        self._data = data[order]
+        self._slot_ids = np.asarray(recipe_ids, dtype=np.int64)
+        self._live = np.ones(len(recipe_ids), dtype=bool)
+        self._slots = {recipe_id: slot for slot, recipe_id in enumerate(recipe_ids)}
+        self._doc_count = len(recipe_ids)
+        # Drop terms no indexed recipe uses any more
+        self._df = Counter({term: count for term, count in self._df.items() if count > 0})
+        self._pending.clear()
+
+    def search(self, value: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        Rank recipes by cosine similarity to a text.
+
+        Args:
+            value: Text describing the dish
+            limit: Maximum number of matches
+
+        Returns:
+            List of (recipe_id, similarity), most similar first
+        """
+        self.ensure_current()
+        query_weights = _term_weights(tokenize(value))
+        if not query_weights or limit <= 0:
+            return []
+
+        with self._lock:
+            if self._pending and (not self._doc_count or
+                                  len(self._pending) > max(self.MAX_PENDING, self._doc_count // 10)):
+                self._compact()
+
+            query = {term: weight * self._idf_of(term) for term, weight in query_weights.items()}
+            query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+
+            # Sparse matrix-vector product over the query's columns
+            rows, data = [], []
+            for term, weight in query.items():
+                term_id = self._terms.get(term)
+                if term_id is not None:
+                    start, end = self._indptr[term_id], self._indptr[term_id + 1]
+                    rows.append(self._rows[start:end])
+                    data.append(self._data[start:end] * weight)
+            scores = np.zeros(len(self._slot_ids))
+            if rows:
+                scores = np.bincount(np.concatenate(rows), np.concatenate(data),
+                                     minlength=len(self._slot_ids)) / query_norm
+                scores[~self._live] = 0.0
+            matched = np.flatnonzero(scores > 0)
+            matches = list(zip(self._slot_ids[matched].tolist(), scores[matched].tolist()))
+
+            # Rows changed since the last compaction
+            for recipe_id in self._pending:
+                weights = {term: weight * self._idf_of(term) for term, weight in self._docs[recipe_id].items()}
+                dot = sum(weights.get(term, 0.0) * weight for term, weight in query.items())
+                if dot > 0:
+                    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+                    matches.append((recipe_id, dot / (norm * query_norm)))
+
+        matches.sort(key=lambda match: (-match[1], -match[0]))
+        return matches[:limit]
+
+
+description_index = DescriptionVectorIndex()
+
+
+def apply_description_search(query, description: str, max_candidates: int = 500):
+    """
+    Filter a Recipe query to the recipes whose description and procedure
+    best match a text and order it by cosine similarity. The query yields
+    (Recipe, similarity) rows.
+
+    Args:
+        query: Recipe query to filter
+        description: Text describing the dish
+        max_candidates: Most matches taken from the vector index
+
+    Returns:
+        Filtered and ordered query
+    """
+    matches = description_index.search(description or '', max_candidates)
+    if not matches:
+        return query.filter(db.false()).add_columns(db.literal(0.0))
+    scores = dict(matches)
+    similarity = case(scores, value=Recipe.recipe_id, else_=0.0)
+    return query.filter(Recipe.recipe_id.in_(list(scores))).add_columns(similarity).order_by(
+        similarity.desc(), Recipe.recipe_id.desc()
+    )